@@ -1,30 +1,63 @@
 import time
 from src.db import get_connection
 
-def apply():
-    print("Applying Stored Procedure...")
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    drop_sql = "DROP PROCEDURE IF EXISTS insert_operation_with_prefixes"
-    
-    create_sql = """
+# Tables added after the initial schema; created here for volumes that
+# were initialized from an older schema.sql
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS operation_prefix_rollup (
+        prefix        VARCHAR(191) NOT NULL,
+        hour_bucket   DATETIME NOT NULL,
+        total         BIGINT UNSIGNED NOT NULL,
+        errors        BIGINT UNSIGNED NOT NULL,
+        PRIMARY KEY (prefix, hour_bucket)
+    ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS prefixes (
+        prefix_id     INT UNSIGNED NOT NULL AUTO_INCREMENT,
+        prefix        VARCHAR(191) NOT NULL,
+        PRIMARY KEY (prefix_id),
+        UNIQUE KEY ux_prefix (prefix)
+    ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS operation_prefix_ids (
+        operation_id  BIGINT UNSIGNED NOT NULL,
+        prefix_id     INT UNSIGNED NOT NULL,
+        created_at    DATETIME(6) NOT NULL,
+        PRIMARY KEY (operation_id, prefix_id),
+        KEY ix_prefix_id_created (prefix_id, created_at DESC, operation_id)
+    ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS id_sequences (
+        name          VARCHAR(64) NOT NULL,
+        next_id       BIGINT UNSIGNED NOT NULL,
+        PRIMARY KEY (name)
+    ) ENGINE=InnoDB
+    """,
+]
+
+PROCEDURES = {
+    'insert_operation_with_prefixes': """
     CREATE PROCEDURE insert_operation_with_prefixes(
         IN p_type_path VARCHAR(191),
         IN p_created_at DATETIME(6),
         IN p_status TINYINT UNSIGNED,
         IN p_payload JSON,
-        IN p_prefixes JSON
+        IN p_prefixes JSON,
+        IN p_id BIGINT UNSIGNED  -- NULL: AUTO_INCREMENT
     )
     BEGIN
         DECLARE new_op_id BIGINT UNSIGNED;
-        
+
         -- Insert operation
-        INSERT INTO operations (type_path, created_at, status, payload_json)
-        VALUES (p_type_path, p_created_at, p_status, p_payload);
-        
-        SET new_op_id = LAST_INSERT_ID();
-        
+        INSERT INTO operations (id, type_path, created_at, status, payload_json)
+        VALUES (p_id, p_type_path, p_created_at, p_status, p_payload);
+
+        SET new_op_id = COALESCE(p_id, LAST_INSERT_ID());
+
         -- Insert prefixes from JSON array
         INSERT INTO operation_prefixes (operation_id, prefix, created_at)
         SELECT new_op_id, prefix, p_created_at
@@ -33,13 +66,102 @@ def apply():
             "$[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
         ) AS jt;
     END
-    """
-    
+    """,
+
+    'insert_operation_with_prefixes_rollup': """
+    CREATE PROCEDURE insert_operation_with_prefixes_rollup(
+        IN p_type_path VARCHAR(191),
+        IN p_created_at DATETIME(6),
+        IN p_status TINYINT UNSIGNED,
+        IN p_payload JSON,
+        IN p_prefixes JSON,
+        IN p_id BIGINT UNSIGNED  -- NULL: AUTO_INCREMENT
+    )
+    BEGIN
+        DECLARE new_op_id BIGINT UNSIGNED;
+
+        INSERT INTO operations (id, type_path, created_at, status, payload_json)
+        VALUES (p_id, p_type_path, p_created_at, p_status, p_payload);
+
+        SET new_op_id = COALESCE(p_id, LAST_INSERT_ID());
+
+        INSERT INTO operation_prefixes (operation_id, prefix, created_at)
+        SELECT new_op_id, prefix, p_created_at
+        FROM JSON_TABLE(
+            p_prefixes,
+            "$[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+        ) AS jt;
+
+        -- One counter row per prefix and hour
+        INSERT INTO operation_prefix_rollup (prefix, hour_bucket, total, errors)
+        SELECT prefix, DATE_FORMAT(p_created_at, '%Y-%m-%d %H:00:00'), 1, p_status
+        FROM JSON_TABLE(
+            p_prefixes,
+            "$[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+        ) AS jt
+        ON DUPLICATE KEY UPDATE
+            total = total + 1,
+            errors = errors + p_status;
+    END
+    """,
+
+    'insert_operations_batch': """
+    CREATE PROCEDURE insert_operations_batch(
+        IN p_ops JSON,  -- [{"type_path", "created_at", "status", "payload", "prefixes": [...]}, ...]
+        IN p_first_id BIGINT UNSIGNED  -- ids p_first_id.. in array order; NULL: AUTO_INCREMENT
+    )
+    BEGIN
+        DECLARE first_id BIGINT UNSIGNED;
+
+        -- Set-based insert of every operation in array order
+        INSERT INTO operations (id, type_path, created_at, status, payload_json)
+        SELECT p_first_id + jt.ord - 1, jt.type_path, jt.created_at, jt.status, jt.payload
+        FROM JSON_TABLE(
+            p_ops,
+            "$[*]" COLUMNS(
+                ord FOR ORDINALITY,
+                type_path VARCHAR(191) PATH "$.type_path",
+                created_at DATETIME(6) PATH "$.created_at",
+                status TINYINT UNSIGNED PATH "$.status",
+                payload JSON PATH "$.payload"
+            )
+        ) AS jt
+        ORDER BY jt.ord;
+
+        -- AUTO_INCREMENT ids of an INSERT ... SELECT are only consecutive with
+        -- innodb_autoinc_lock_mode <= 1 (docker-compose.yml sets 1); client-assigned
+        -- ids (p_first_id) don't depend on it
+        SET first_id = COALESCE(p_first_id, LAST_INSERT_ID());
+
+        -- One prefix row per (operation, prefix), flattened with NESTED PATH
+        INSERT INTO operation_prefixes (operation_id, prefix, created_at)
+        SELECT first_id + jt.ord - 1, jt.prefix, jt.created_at
+        FROM JSON_TABLE(
+            p_ops,
+            "$[*]" COLUMNS(
+                ord FOR ORDINALITY,
+                created_at DATETIME(6) PATH "$.created_at",
+                NESTED PATH "$.prefixes[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+            )
+        ) AS jt;
+    END
+    """,
+}
+
+def apply():
+    print("Applying Stored Procedures...")
+    conn = get_connection()
+    cursor = conn.cursor()
+
     try:
-        cursor.execute(drop_sql)
-        cursor.execute(create_sql)
+        for create_sql in TABLES:
+            cursor.execute(create_sql)
+        for name, create_sql in PROCEDURES.items():
+            cursor.execute(f"DROP PROCEDURE IF EXISTS {name}")
+            cursor.execute(create_sql)
+            print(f"  {name}")
         conn.commit()
-        print("Success! Stored Procedure created.")
+        print("Success! Stored Procedures created.")
     except Exception as e:
         print(f"Error: {e}")
     finally:
@@ -48,4 +170,3 @@ def apply():
 
 if __name__ == "__main__":
     apply()
-
@@ -1,5 +1,38 @@
 import json
 from src.db import get_connection
+from src.stats import LAYOUT_TABLES, existing_tables, table_sizes, index_residency
+
+def print_layout_report(conn):
+    # Side-table layouts: index size and how much of it is in the buffer pool.
+    # Layouts whose tables were never built (e.g. no dictionary strategy)
+    # are left out.
+    cursor = conn.cursor()
+    mb = 1024 * 1024
+    try:
+        tables = existing_tables(cursor, LAYOUT_TABLES)
+        print("\n\n=== Prefix Layouts (string vs dictionary) ===\n")
+        if not tables:
+            print("No side tables in this volume.")
+            return
+        rows = {name: count for name, count, _, _ in table_sizes(cursor, tables)}
+        print(f"{'Index':<45} | {'Size (MB)':<10} | {'Cached (MB)':<11} | {'Resident':<8}")
+        print("-" * 83)
+        totals = {'string': [0, 0], 'dict': [0, 0]}
+        for table, index, size, cached in index_residency(cursor, tables):
+            layout = 'string' if table == 'operation_prefixes' else 'dict'
+            totals[layout][0] += size
+            totals[layout][1] += cached
+            resident = min(cached / size, 1.0) * 100 if size else 0.0
+            print(f"{table + '.' + index:<45} | {size / mb:<10.2f} | {cached / mb:<11.2f} | {resident:>7.1f}%")
+        print("-" * 83)
+        for layout, (size, cached) in totals.items():
+            if not size:
+                continue
+            table = 'operation_prefixes' if layout == 'string' else 'operation_prefix_ids'
+            print(f"{layout:<7} layout: {rows.get(table, 0)} rows, {size / mb:.2f} MB, "
+                  f"{min(cached / size, 1.0) * 100:.1f}% resident")
+    finally:
+        cursor.close()
 
 def cmd_debug_view():
     conn = get_connection()
@@ -17,7 +50,7 @@ def cmd_debug_view():
                 table_rows AS `Row Count`
             FROM information_schema.TABLES 
             WHERE table_schema = 'ops_bench'
-            AND table_name IN ('operations', 'operation_prefixes');
+            AND table_name IN ('operations', 'operation_prefixes', 'prefixes', 'operation_prefix_ids');
         """)
         stats = cursor.fetchall()
         
@@ -36,6 +69,8 @@ def cmd_debug_view():
             print("-" * 56)
             print(f"Amplification Factor: {amp:.2f}x (Prefix Rows / Operation Rows)")
 
+        print_layout_report(conn)
+
         # Recent Operations
         print("\n\n=== Top 5 Recent Operations ===\n")
         cursor.execute("""
@@ -45,6 +80,7 @@ def cmd_debug_view():
             LIMIT 5
         """)
         ops = cursor.fetchall()
+        has_prefixes = any(r['Table'] == 'operation_prefixes' for r in stats)
         
         for op in ops:
             print(f"OP #{op['id']}")
@@ -53,17 +89,18 @@ def cmd_debug_view():
             print(f"  Status:  {'ERROR' if op['status'] else 'OK'}")
             
             # Get related prefixes
-            cursor.execute("""
-                SELECT prefix, created_at 
-                FROM operation_prefixes 
-                WHERE operation_id = %s 
-                ORDER BY length(prefix) ASC
-            """, (op['id'],))
-            prefixes = cursor.fetchall()
+            if has_prefixes:
+                cursor.execute("""
+                    SELECT prefix, created_at 
+                    FROM operation_prefixes 
+                    WHERE operation_id = %s 
+                    ORDER BY length(prefix) ASC
+                """, (op['id'],))
+                prefixes = cursor.fetchall()
             
-            print(f"  Prefixes ({len(prefixes)}):")
-            for p in prefixes:
-                print(f"    - {p['prefix']:<40} | {p['created_at']}")
+                print(f"  Prefixes ({len(prefixes)}):")
+                for p in prefixes:
+                    print(f"    - {p['prefix']:<40} | {p['created_at']}")
             print("-" * 60)
             
     except Exception as e:
@@ -1,53 +1,203 @@
 import argparse
 import time
 import threading
+import multiprocessing
 import json
+import datetime
 import numpy as np
 from src.config import Config
 from src.loader import Loader
 from src.benchmark import Workload
-from src.db import get_connection
+from src.db import get_connection, get_manager
+from src.generator import Generator, Timeline
+from src.stats import print_size_report
+from src.timeseries import IntervalReporter
+from src.rollup import rebuild_rollup
+from src.cache import LatestCache
+from src.ids import IdAllocator
+from src.strategies import STRATEGIES, make_strategies
+from src.bulk import BulkLoader, next_operation_id, drop_secondary_indexes, create_secondary_indexes
+from src.partitions import (PartitionManager, PartitionDropper, PARTITIONED_TABLES, WINDOW_DAYS,
+                            table_partitions, explain_partitions)
+from src.purge import Purger
+from src.trace import TraceWriter, read_trace, import_trace
+from src.results import merge_results, build_results, write_results, load_results, default_path, compare, METRICS
+from src.plans import sample_path, capture, write_plans, load_plans, describe, diff
+from src.server_metrics import ServerSampler, align, INDICATORS
+from src.distributed import Coordinator, serve, parse_address, dump_metrics, DEFAULT_PORT
+import queue
+import os
+import sys
+import socket
+import secrets
+import subprocess
 
-def seed_worker(loader, batch_size, batches_per_worker, worker_id, progress_list):
-    inserted = 0
-    for _ in range(batches_per_worker):
+class ThreadCounter:
+    # Same interface as multiprocessing.Value, for thread workers
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+def _add(counter, n):
+    with counter.get_lock():
+        counter.value += n
+
+def _strategy_arg(value):
+    # argparse type for --strategy: 'a,b,...' of STRATEGIES names
+    try:
+        make_strategies(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def _create_strategies(spec):
+    # Strategy instances with their DDL applied (idempotent)
+    strategies = make_strategies(spec)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for strategy in strategies:
+            strategy.create(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return strategies
+
+def _strategy_tables(strategies):
+    tables = ['operations']
+    for strategy in strategies:
+        tables += [t for t in strategy.TABLES_DDL if t not in tables]
+    return tuple(tables)
+
+def _batch_window(timeline, batch_no):
+    if timeline is None:
+        return None, 0
+    return timeline.window(batch_no), timeline.jitter_us
+
+def seed_worker(loader, batch_size, batch_nos, worker_id, timeline, progress, errors, gen=None):
+    # `gen`: this worker's own Generator when threads share the loader, so
+    # each worker's rows come from its own seed whatever the scheduling
+    for batch_no in batch_nos:
+        window, jitter_us = _batch_window(timeline, batch_no)
         try:
-            rows, _ = loader.insert_batch(batch_size)
-            inserted += rows
-            # Update shared progress (simple list append is thread-safe enough for progress bar)
-            progress_list.append(rows)
+            rows, _ = loader.insert_batch(batch_size, window=window, jitter_us=jitter_us, gen=gen)
+            _add(progress, rows)
         except Exception as e:
             print(f"Worker {worker_id} error: {e}")
+            _add(errors, 1)
             break
 
+def bulk_seed_worker(batch_size, batch_nos, worker_id, seed, anchor, timeline, first_id, progress, errors):
+    # Each worker owns its connection and a disjoint ID range starting at first_id
+    loader = BulkLoader(first_id, seed=seed, anchor=anchor)
+    try:
+        for batch_no in batch_nos:
+            window, jitter_us = _batch_window(timeline, batch_no)
+            _add(progress, loader.add_batch(batch_size, window=window, jitter_us=jitter_us))
+        _add(progress, loader.flush())
+    except Exception as e:
+        print(f"Worker {worker_id} error: {e}")
+        _add(errors, 1)
+    finally:
+        loader.close()
+
+def seed_process_worker(batch_size, batch_nos, worker_id, seed, anchor, timeline, rollup, id_block,
+                        strategy, progress, errors):
+    # Runs in a child process: own Loader, own connection pool, own seed
+    loader = Loader(seed=seed, anchor=anchor, rollup=rollup, id_block=id_block, strategy=strategy)
+    seed_worker(loader, batch_size, batch_nos, worker_id, timeline, progress, errors)
+
 def cmd_seed(args):
-    print(f"Seeding {args.amount} operations with {args.concurrency} threads...")
-    loader = Loader()
+    unit = "processes" if args.workers_mode == 'process' else "threads"
+    print(f"Seeding {args.amount} operations with {args.concurrency} {unit} ({args.method}, {args.time_order} order)...")
     start_time = time.time()
     
     batch_size = args.batch_size
     total_batches = args.amount // batch_size
-    batches_per_worker = total_batches // args.concurrency
-    
-    threads = []
-    progress_list = [] # Shared list to track progress
+
+    # Workers stride over global batch numbers (i, i + C, ...). In chrono
+    # order each batch number is a time slice, so all workers move forward
+    # through the 30-day window together.
+    timeline = None
+    anchor = args.anchor
+    if args.time_order == 'chrono':
+        anchor = anchor or datetime.datetime.utcnow()
+        timeline = Timeline(anchor, total_batches, jitter_sec=args.jitter_sec)
     
-    import datetime
+    if args.workers_mode == 'process':
+        # Spawned children never inherit the parent's connections
+        ctx = multiprocessing.get_context('spawn')
+        progress = ctx.Value('q', 0)
+        errors = ctx.Value('q', 0)
+        spawn = ctx.Process
+    else:
+        progress = ThreadCounter()
+        errors = ThreadCounter()
+        spawn = threading.Thread
+
+    strategies = _create_strategies(args.strategy)
 
-    # Start threads
+    if args.partitioned:
+        # Day partitions over the generator's window, before any rows land
+        day = (anchor or datetime.datetime.utcnow()).date()
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            manager = PartitionManager(future_days=args.future_days)
+            created = manager.create(cursor, day - datetime.timedelta(days=WINDOW_DAYS), today=day)
+        finally:
+            cursor.close()
+            conn.close()
+        if created:
+            print(f"Partitioned {', '.join(created)} by day ({WINDOW_DAYS + args.future_days + 1} day partitions + pfuture)")
+
+    if args.method == 'load-data':
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            if args.id_block:
+                # Reserve the whole load in id_sequences so later allocator
+                # runs continue after it
+                next_id = IdAllocator().reserve(total_batches * batch_size)
+            else:
+                next_id = next_operation_id(cursor)
+            if args.defer_indexes:
+                print("Dropping secondary indexes until the load finishes...")
+                drop_secondary_indexes(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+    elif args.workers_mode == 'thread':
+        loader = Loader(seed=args.seed, anchor=anchor, rollup=args.rollup, id_block=args.id_block,
+                        strategy=args.strategy)
+
+    # Start workers
+    workers = []
     for i in range(args.concurrency):
-        # Distribute remaining batches to last worker
-        if i == args.concurrency - 1:
-            batches_per_worker += total_batches % args.concurrency
-            
-        t = threading.Thread(target=seed_worker, args=(loader, batch_size, batches_per_worker, i, progress_list))
-        threads.append(t)
-        t.start()
+        batch_nos = range(i, total_batches, args.concurrency)
+        seed = args.seed + i if args.seed is not None else None
+        if args.method == 'load-data':
+            w = spawn(target=bulk_seed_worker,
+                      args=(batch_size, batch_nos, i, seed, anchor, timeline, next_id, progress, errors))
+            next_id += len(batch_nos) * batch_size
+        elif args.workers_mode == 'process':
+            w = spawn(target=seed_process_worker,
+                      args=(batch_size, batch_nos, i, seed, anchor, timeline, args.rollup, args.id_block,
+                            args.strategy, progress, errors))
+        else:
+            w = spawn(target=seed_worker,
+                      args=(loader, batch_size, batch_nos, i, timeline, progress, errors, loader.gen.fork(seed)))
+        workers.append(w)
+        w.start()
 
     # Monitor progress
     total_inserted = 0
-    while any(t.is_alive() for t in threads):
-        current_total = sum(progress_list)
+    while any(w.is_alive() for w in workers):
+        current_total = progress.value
         if current_total > total_inserted: # Only print if changed
             total_inserted = current_total
             elapsed = time.time() - start_time
@@ -57,11 +207,195 @@ def cmd_seed(args):
             print(f"Inserted {total_inserted}/{args.amount} ops ({rate:.0f} ops/s) - ETA: {eta}", end='\r')
         time.sleep(0.5)
             
-    for t in threads:
-        t.join()
+    for w in workers:
+        w.join()
         
-    total_inserted = sum(progress_list)
-    print(f"\nSeeding complete. {total_inserted} ops in {str(datetime.timedelta(seconds=int(time.time() - start_time)))}")
+    total_inserted = progress.value
+    load_sec = time.time() - start_time
+    print(f"\nSeeding complete. {total_inserted} ops in {str(datetime.timedelta(seconds=int(load_sec)))}")
+    if errors.value:
+        print(f"Workers stopped on error: {errors.value}")
+
+    if args.method == 'load-data' and args.defer_indexes:
+        print("Rebuilding secondary indexes...")
+        t0 = time.time()
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            create_secondary_indexes(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+        print(f"Indexes rebuilt in {str(datetime.timedelta(seconds=int(time.time() - t0)))}")
+
+    if args.method == 'load-data' and args.rollup:
+        # LOAD DATA bypasses the Loader, so build the rollup from the side table
+        print("Rebuilding operation_prefix_rollup...")
+        conn = get_connection()
+        try:
+            rebuild_rollup(conn)
+        finally:
+            conn.close()
+
+    if args.method == 'load-data':
+        # LOAD DATA only writes operations and operation_prefixes; derive
+        # the other strategies' rows from them
+        conn = get_connection()
+        try:
+            for strategy in strategies:
+                if strategy.name != 'side_table':
+                    print(f"Building {strategy.name} strategy...")
+                    strategy.build(conn)
+        finally:
+            conn.close()
+
+    # Summary: compare random vs chrono loads on throughput and index size
+    total_sec = time.time() - start_time
+    print(f"\nInsert throughput: {total_inserted / load_sec if load_sec > 0 else 0:.0f} ops/s "
+          f"(load), {total_inserted / total_sec if total_sec > 0 else 0:.0f} ops/s (incl. index rebuild)")
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        print_size_report(cursor, _strategy_tables(strategies))
+    finally:
+        cursor.close()
+        conn.close()
+
+def cmd_gen_bench(args):
+    # Per-row cost of generating a batch and flattening its INSERT params:
+    # legacy list-of-dicts vs columnar batches
+    print(f"Generating {args.batches} batches of {args.batch_size} rows...")
+    anchor = args.anchor or datetime.datetime(2025, 1, 1)
+    n_rows = args.batches * args.batch_size
+
+    gen = Generator(seed=args.seed, anchor=anchor)
+    start = time.perf_counter()
+    for _ in range(args.batches):
+        ops = gen.generate_batch_ops(args.batch_size)
+        val_ops, val_pref = [], []
+        for i, op in enumerate(ops):
+            val_ops.extend([op['type_path'], op['created_at'], op['status'], op['payload_json']])
+            for p in gen.expand_prefixes(op['type_path']):
+                val_pref.extend([i, p, op['created_at']])
+    legacy = time.perf_counter() - start
+
+    gen = Generator(seed=args.seed, anchor=anchor)
+    start = time.perf_counter()
+    for _ in range(args.batches):
+        batch = gen.generate_batch(args.batch_size)
+        batch.operation_params()
+        batch.prefix_params(range(len(batch)))
+    columnar = time.perf_counter() - start
+
+    print(f"  {'generate_batch_ops':<20}: {legacy / n_rows * 1e6:.2f} us/row")
+    print(f"  {'generate_batch':<20}: {columnar / n_rows * 1e6:.2f} us/row ({legacy / columnar:.1f}x)")
+
+    # Same seed + anchor must give identical columns
+    a = Generator(seed=args.seed, anchor=anchor).generate_batch(args.batch_size)
+    b = Generator(seed=args.seed, anchor=anchor).generate_batch(args.batch_size)
+    same = (a.type_paths() == b.type_paths()
+            and np.array_equal(a.created_at, b.created_at)
+            and np.array_equal(a.status, b.status))
+    print(f"Reproducible from seed {args.seed}: {'yes' if same else 'NO'}")
+
+def cmd_rollup_rebuild(args):
+    print("Rebuilding operation_prefix_rollup from operation_prefixes...")
+    start = time.time()
+    conn = get_connection()
+    try:
+        rebuild_rollup(conn)
+    finally:
+        conn.close()
+    print(f"Done in {time.time() - start:.1f}s")
+
+def cmd_strategy_build(args):
+    # Creates each strategy's schema and backfills it from existing data
+    strategies = make_strategies(args.strategy)
+    conn = get_connection()
+    try:
+        for strategy in strategies:
+            print(f"Building {strategy.name} strategy...")
+            start = time.time()
+            strategy.build(conn)
+            print(f"  done in {time.time() - start:.1f}s")
+        cursor = conn.cursor()
+        try:
+            print_size_report(cursor, _strategy_tables(strategies))
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+def _print_partitions(cursor):
+    for table in PARTITIONED_TABLES:
+        parts = table_partitions(cursor, table)
+        rows = sum(r or 0 for _, _, r in parts)
+        print(f"  {table:<20}: {len(parts)} partitions, ~{rows} rows"
+              f" ({parts[0][0]} .. {parts[-1][0]})" if parts else f"  {table:<20}: not partitioned")
+
+def cmd_partition_maintain(args):
+    manager = PartitionManager(retention_days=args.retention_days, future_days=args.future_days)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if not manager.is_partitioned(cursor):
+            print("operations / operation_prefixes are not partitioned (seed with --partitioned)")
+            return
+        start = time.time()
+        added, dropped = manager.maintain(conn, today=args.today)
+        print(f"Added {len(added)} partitions{': ' + ', '.join(added) if added else ''}")
+        print(f"Dropped {len(dropped)} expired partitions (older than {args.retention_days} days)"
+              f"{': ' + ', '.join(dropped) if dropped else ''}")
+        print(f"Done in {time.time() - start:.2f}s")
+        _print_partitions(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+def _purger(args):
+    return Purger(args.purge_days, target_chunk=args.purge_target_ms / 1000.0, pause=args.purge_pause_ms / 1000.0,
+                  max_history=args.purge_max_history, max_lag=args.purge_max_lag, max_wait=args.purge_max_wait)
+
+def _print_purge(p):
+    print(f"  Deleted {p['operations']} operations / {p['prefixes']} prefix rows in {p['chunks']} chunks "
+          f"({p['passes']} full passes)")
+    print(f"  Chunk (ms) mean / p99 / max: {p['mean_chunk_ms']:.1f} / {p['p99_chunk_ms']:.1f} / {p['max_chunk_ms']:.1f}, "
+          f"final span {p['span']} ids")
+    print(f"  Backoff: {p['stalls']} waits, {p['stall_time']:.1f}s (history list / replica lag)")
+    if p['forced']:
+        print(f"  Went on without catching up after --purge-max-wait: {p['forced']} times")
+
+def cmd_purge(args):
+    purger = _purger(args)
+    print(f"Purging operations older than {args.purge_days} days "
+          f"(target {args.purge_target_ms:.0f} ms per chunk, history list <= {args.purge_max_history})...")
+    start = time.time()
+    last_print = [0.0]
+
+    def progress(purger, hi, last):
+        if time.time() - last_print[0] >= 0.5:
+            last_print[0] = time.time()
+            s = purger.stats
+            print(f"id {min(hi, last)}/{last}: {s['operations']} ops deleted, span {purger.span}", end='\r')
+
+    conn = get_connection()
+    try:
+        purger.run_pass(conn, progress)
+    finally:
+        conn.close()
+        purger.close()
+    print(f"\nPurge complete in {time.time() - start:.1f}s")
+    _print_purge(purger.summary())
+
+def _print_overlap(all_histograms, tag, tags):
+    # p50 / p99 of ops that overlapped the actor's work vs the rest
+    print(f"Latency overlapping {tag} vs not (p50 / p99 ms):")
+    for op_type, hist in all_histograms.items():
+        during = all_histograms.get(f"{op_type}_{tag}")
+        if any(op_type.endswith('_' + t) for t in tags) or not (during and during.total and hist.total):
+            continue
+        print(f"  {op_type:<15}: {during.percentile(50) * 1000:.2f} / {during.percentile(99) * 1000:.2f} "
+              f"vs {hist.percentile(50) * 1000:.2f} / {hist.percentile(99) * 1000:.2f} ({during.total} ops overlapped)")
 
 def cmd_validate(args):
     print("Running validations...")
@@ -76,7 +410,7 @@ def cmd_validate(args):
                 EXPLAIN ANALYZE
                 SELECT o.id
                 FROM operation_prefixes p
-                JOIN operations o ON o.id = p.operation_id
+                JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
                 WHERE p.prefix = 'labs.result_webhooks'
                 ORDER BY p.created_at DESC
                 LIMIT 100;
@@ -91,7 +425,7 @@ def cmd_validate(args):
                 EXPLAIN
                 SELECT o.id
                 FROM operation_prefixes p
-                JOIN operations o ON o.id = p.operation_id
+                JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
                 WHERE p.prefix = 'labs.result_webhooks'
                 ORDER BY p.created_at DESC
                 LIMIT 100;
@@ -113,80 +447,599 @@ def cmd_validate(args):
         if ops_count > 0:
             print(f"Avg amplification: {count / ops_count:.2f}")
 
+        # 3. Partition pruning of the side-table reads
+        if PartitionManager().is_partitioned(cursor):
+            print("\nChecking partition pruning (EXPLAIN)...")
+            _print_partitions(cursor)
+            totals = {table: len(table_partitions(cursor, table)) for table in PARTITIONED_TABLES}
+            aliases = {'p': 'operation_prefixes', 'o': 'operations'}
+            strategy = make_strategies('side_table')[0]
+            prefix = 'labs.result_webhooks'
+            for shape, (sql, params) in (('latest', strategy.latest(prefix, 100, 0)),
+                                         ('count_24h', strategy.count_24h(prefix)),
+                                         ('error_rate', strategy.error_rate(prefix))):
+                for table, partitions, access, key in explain_partitions(cursor, sql, params):
+                    total = totals.get(aliases.get(table))
+                    read = len(partitions.split(',')) if partitions else 0
+                    if access == 'eq_ref' and key == 'PRIMARY':
+                        # Plan lists every partition; each (id, created_at)
+                        # lookup goes to one at execution time
+                        verdict = "one per row (full primary key)"
+                    elif total and read < total:
+                        verdict = "pruned"
+                    else:
+                        verdict = "all partitions (no created_at bound)"
+                    print(f"  {shape:<11} {table}: {read}/{total} partitions, {access} {key} -> {verdict}")
+
     finally:
         cursor.close()
         conn.close()
 
-def run_worker(mix_func, duration, results, index):
-    metrics = mix_func(duration)
-    results[index] = metrics
+def _capture_plans(args, path=None, strategy=None):
+    conn = get_connection()
+    try:
+        if path is None:
+            cursor = conn.cursor()
+            try:
+                path = sample_path(cursor)
+            finally:
+                cursor.close()
+        print(f"Capturing plans for {path} ({strategy}, {'EXPLAIN ANALYZE' if args.analyze else 'executed'})...")
+        doc = capture(conn, make_strategies(strategy), path, analyze=args.analyze)
+    finally:
+        conn.close()
+    for key, entry in doc['queries'].items():
+        print(f"  {key:<32} {describe(entry)}")
+    return doc
 
-def cmd_run(args):
-    print(f"Running Mix {args.mix} with {args.concurrency} workers for {args.time}s...")
+def cmd_plan_capture(args):
+    doc = _capture_plans(args, args.path, args.strategy)
+    write_plans(args.out, doc)
+    print(f"\nSaved {len(doc['queries'])} plans to {args.out}")
+
+def cmd_plan_diff(args):
+    # Exit status 1 on a plan regression
+    try:
+        baseline = load_plans(args.baseline)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read baseline: {e}")
+        sys.exit(2)
+    # Same path and strategies as the baseline, so every key lines up
+    current = _capture_plans(args, args.path or baseline['path'], args.strategy or ','.join(baseline['strategies']))
+    if args.out:
+        write_plans(args.out, current)
+    git = baseline['git']
+    print(f"\nAgainst {args.baseline} (captured {baseline['captured_at']}, git {git['revision'] or '?'}, "
+          f"MySQL {baseline['server_version']}):")
+    changes = diff(baseline, current, rows_factor=args.rows_factor, min_rows=args.min_rows)
+    for key, severity, message in changes:
+        print(f"  {'REGRESSION' if severity == 'regression' else 'change':<10} {key:<32} {message}")
+    regressions = sum(1 for _, severity, _ in changes if severity == 'regression')
+    if regressions:
+        print(f"\n{regressions} plan regression(s)")
+        sys.exit(1)
+    print(f"\nNo plan regressions ({len(changes)} other changes)")
+
+def print_results(results, elapsed, hist_digits, rate=None, intended=None):
+    # Totals, per-op latency percentiles and per-row write cost; returns
+    # the merged histograms. `intended`: latency is measured from intended
+    # send times (default: when running open loop, i.e. with a rate).
+    totals, all_histograms = merge_results(results, hist_digits)
+    print(f"\nResults:")
+    print(f"Total Ops: {totals['ops']}")
+    print(f"QPS: {totals['ops'] / elapsed:.2f}")
+    print(f"Errors: {totals['errors']}")
+    if rate:
+        print(f"Target QPS: {rate:.2f}")
+        print(f"Missed (unsent at end): {totals['missed']}")
+    if totals['short_walks']:
+        print(f"Short seek walks (prefix had fewer than N pages, not recorded): {totals['short_walks']}")
     
+    intended = bool(rate) if intended is None else intended
+    kind = "from intended send time" if intended else "service time"
+    print(f"\nLatency (ms, {kind}) p50 / p95 / p99 / p99.9 / p99.99 / max:")
+    for op_type, hist in all_histograms.items():
+        if not hist.total:
+            continue
+        p = [hist.percentile(q) * 1000 for q in (50, 95, 99, 99.9, 99.99)] # to ms
+        print(f"  {op_type:<15}: {' / '.join(f'{v:.2f}' for v in p)} / {hist.max() * 1000:.2f}")
+
+    # Per-row cost of write ops (latency / rows per call)
+    writes = [(op, h) for op, h in all_histograms.items() if op in Workload.ROWS_PER_OP and h.total]
+    if writes:
+        print("\nPer-row latency (ms) p50 / p99:")
+        for op_type, hist in writes:
+            n = Workload.ROWS_PER_OP[op_type]
+            print(f"  {op_type:<15}: {hist.percentile(50) * 1000 / n:.3f} / {hist.percentile(99) * 1000 / n:.3f}")
+    return all_histograms
+
+def run_worker(mix_func, duration, results, index, rate=None, arrival='poisson'):
+    # results[index] is pre-filled with Workload.new_metrics() so the
+    # interval reporter can watch it while the worker runs
+    mix_func(duration, rate=rate, arrival=arrival, metrics=results[index])
+
+def cmd_compare(args):
+    # Exit status 1 when any op regressed significantly by more than the threshold
+    try:
+        base, new = load_results(args.base), load_results(args.new)
+    except (OSError, ValueError) as e:
+        print(f"Cannot compare: {e}")
+        sys.exit(2)
+    for label, doc in (('base', base), ('new', new)):
+        git = doc['git']
+        print(f"{label}: Mix {doc['mix']}, {len(doc['runs'])} x {doc['duration']}s, {doc['created_at']}, "
+              f"git {git['revision'] or '?'}{' (dirty)' if git['dirty'] else ''}")
+    if base['mix'] != new['mix']:
+        print(f"Warning: comparing different mixes ({base['mix']} vs {new['mix']})")
+
+    metrics = args.metrics.split(',')
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        print(f"Unknown metrics: {', '.join(unknown)} (use {', '.join(METRICS)})")
+        sys.exit(2)
+    rows = compare(base, new, metrics, confidence=args.confidence, threshold=args.threshold, rounds=args.bootstrap)
+    print(f"\nChange new vs base ({args.confidence * 100:g}% CI; flagged past {args.threshold:g}%):")
+    for r in rows:
+        unit = 'ops/s' if r['metric'] == 'qps' else 'ms'
+        ci = f"[{r['low_pct']:+.1f}%, {r['high_pct']:+.1f}%]" if r['low_pct'] is not None else 'no CI'
+        if r['verdict']:
+            flag = f"  {r['verdict'].upper()}"
+        elif r['low_pct'] is None:
+            flag = '  (untested: needs --repeat runs)'
+        else:
+            flag = '' if r['significant'] else '  (not significant)'
+        print(f"  {r['op']:<15} {r['metric']:<5}: {r['base']:.2f} -> {r['new']:.2f} {unit:<5} "
+              f"{r['change_pct']:+.1f}% {ci} {r['method']}{flag}")
+    regressions = [r for r in rows if r['verdict'] == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} significant regression(s)")
+        sys.exit(1)
+    print("\nNo significant regressions")
+
+def _make_cache(args):
+    if args.cache_mb > 0:
+        return LatestCache(max_bytes=int(args.cache_mb * 1024 * 1024), ttl=args.cache_ttl)
+    return None
+
+def _make_workload(args, cache=None):
+    return Workload(histogram_digits=args.hist_digits, protocol=args.protocol, rollup=args.rollup, cache=cache,
+                    gc_max_delay=args.gc_max_delay_ms / 1000.0, gc_max_batch=args.gc_max_batch,
+                    id_block=args.id_block, strategy=args.strategy)
+
+def _mix_func(workload, mix):
+    # The workload method running a mix, or None for an unknown mix
+    if mix == 'A':
+        return workload.run_mix_a
+    elif mix == 'B':
+        return workload.run_mix_b
+    elif mix == 'C':
+        return workload.run_mix_c
+    elif mix == 'D':
+        return workload.run_mix_realtime
+    elif mix == 'E':
+        return workload.run_mix_pagination
+    elif mix == 'R':
+        return workload.run_mix_rollup
+    elif mix == 'S':
+        return workload.run_mix_sp_batch
+    elif mix == 'G':
+        return workload.run_mix_group_commit
+    elif mix == 'J':
+        return workload.run_mix_covering
+    elif mix == 'P':
+        return workload.run_mix_partition_drop
+    return None
+
+def _run_workers(func, duration, results, rate=None, arrival='poisson'):
+    # One thread per results slot, each running the mix for `duration`
     threads = []
-    results = [None] * args.concurrency
-    workload = Workload()
-    
-    func = None
-    if args.mix == 'A':
-        func = workload.run_mix_a
-    elif args.mix == 'B':
-        func = workload.run_mix_b
-    elif args.mix == 'C':
-        func = workload.run_mix_c
-    elif args.mix == 'D':
-        func = workload.run_mix_realtime
-    else:
-        print("Unknown mix. Use A, B, C, or D.")
+    for i in range(len(results)):
+        t = threading.Thread(target=run_worker, args=(func, duration, results, i, rate, arrival))
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+
+def cmd_replay(args):
+    Config.CONNECTIONS = args.connections
+    Config.CONCURRENCY = args.concurrency # sizes the legacy pool
+    header, ops = read_trace(args.trace)
+    print(f"Replaying {args.trace} (mix {header.get('mix', '?')}, recorded {header.get('recorded_at', '?')}) "
+          f"with {args.concurrency} workers at "
+          f"{'full speed' if not args.speed else f'{args.speed:g}x recorded timing'}...")
+    _create_strategies(args.strategy)
+    workload = Workload(histogram_digits=args.hist_digits, protocol=args.protocol, rollup=args.rollup,
+                        id_block=args.id_block, strategy=args.strategy, heavy_paths=header.get('heavy_paths'))
+
+    # Bounded queue: the reader stays at most a few thousand ops ahead of
+    # the workers, so memory doesn't grow with the trace
+    pending = queue.Queue(maxsize=args.concurrency * 256)
+    results = [Workload.new_metrics() for _ in range(args.concurrency)]
+    reporter = IntervalReporter(results, interval=args.interval, path=args.timeseries, live=not args.quiet)
+    reporter.start()
+    start = time.perf_counter() + 0.1 # let the workers connect first
+    threads = []
+    for i in range(args.concurrency):
+        t = threading.Thread(target=workload.run_replay, args=(pending, start, args.speed, results[i]))
+        threads.append(t)
+        t.start()
+
+    sent = 0
+    last_t = 0.0
+    for item in ops:
+        if args.limit and sent >= args.limit:
+            break
+        pending.put(item)
+        sent += 1
+        last_t = item[0]
+    for _ in threads:
+        pending.put(None)
+    for t in threads:
+        t.join()
+    reporter.stop()
+    workload.close()
+
+    elapsed = time.perf_counter() - start
+    recorded = last_t / args.speed if args.speed else 0.0
+    print(f"Replay finished in {elapsed:.2f}s ({sent} ops; schedule {recorded:.2f}s, "
+          f"{max(elapsed - recorded, 0.0):.2f}s behind at the end)")
+    print_results(results, elapsed, args.hist_digits, intended=bool(args.speed))
+
+def cmd_trace_import(args):
+    # Seeded workload: whatever parameters the log lacks are drawn reproducibly
+    workload = Workload(seed=args.seed)
+    print(f"Importing {args.source} -> {args.out}...")
+    written, skipped = import_trace(args.source, args.out, workload, Workload.OP_TYPES, default_op=args.default_op,
+                                    ts_field=args.ts_field, op_field=args.op_field,
+                                    prefix_field=args.prefix_field, rate=args.rate)
+    print(f"Wrote {written} ops ({skipped} lines skipped)")
+
+def _print_server(sampler, intervals):
+    s = sampler.summary()
+    if not s['samples']:
+        return
+    st, peak = s['status'], s['max']
+    print(f"\nServer ({s['samples']} samples every {sampler.interval:g}s, dedicated connection):")
+    print(f"  Questions: {st.get('Questions', 0):.0f}/s, threads running mean {st.get('Threads_running', 0):.1f} "
+          f"/ max {peak.get('Threads_running', 0)}")
+    print(f"  Buffer pool: {st['bp_miss_pct']:.3f}% of page reads from disk "
+          f"({st.get('Innodb_buffer_pool_reads', 0):.0f}/s), {st.get('Innodb_buffer_pool_wait_free', 0):.2f} free-page waits/s")
+    print(f"  Redo log: {st.get('Innodb_log_waits', 0):.2f} waits/s, {st.get('Innodb_os_log_fsyncs', 0):.1f} fsyncs/s; "
+          f"history list max {s['max_history_len']}")
+    print(f"  Row locks: {st.get('Innodb_row_lock_waits', 0):.2f} waits/s, mean wait {st['row_lock_wait_ms']:.1f} ms, "
+          f"max {peak.get('Innodb_row_lock_current_waits', 0)} waiting at once")
+
+    # The slowest client interval against the run average
+    measured = [i for i in intervals if i['server'] and i['client']['p99_ms'] is not None]
+    if measured:
+        worst = max(measured, key=lambda i: i['client']['p99_ms'])
+        median = float(np.median([i['client']['p99_ms'] for i in measured]))
+        print(f"  Worst interval at {worst['elapsed']:.0f}s: p99 {worst['client']['p99_ms']:.1f} ms "
+              f"(median interval {median:.1f} ms), {worst['client']['qps']:.0f} ops/s")
+        for name, label in INDICATORS:
+            print(f"    {label:<20}: {worst['server']['status'].get(name, 0):.1f} (run mean {st.get(name, 0):.1f})")
+
+    if s['top_digests']:
+        print("  Top statements by server time:")
+        for d in s['top_digests']:
+            calls = d['calls']
+            print(f"    {d['time_ms'] / calls:.3f} ms x {calls} ({d['rows_examined'] / calls:.0f} rows examined each): "
+                  f"{d['text'][:80]}")
+
+def _save_results(args, runs, intervals=None):
+    # runs: [(wall seconds, worker metrics)] per measured repetition
+    path = args.results or default_path(args.mix)
+    try:
+        write_results(path, build_results(vars(args), runs, args.time, args.hist_digits, intervals))
+    except OSError as e:
+        print(f"Could not write results to {path}: {e}")
+        return
+    print(f"\nResults written to {path}")
+
+# Options a coordinator forwards to its agents; each agent runs the mix
+# with `concurrency` workers of its own
+AGENT_OPTIONS = ('mix', 'time', 'concurrency', 'rollup', 'cache_mb', 'cache_ttl', 'strategy', 'id_block',
+                 'gc_max_delay_ms', 'gc_max_batch', 'connections', 'protocol', 'hist_digits', 'arrival')
+
+def _agent_session(channel, config):
+    # One coordinated run: prepare + warm up, wait for the common start,
+    # run, send the metrics back
+    args = argparse.Namespace(**config)
+    print(f"Mix {args.mix}: {args.concurrency} workers for {args.time}s "
+          f"({args.protocol} protocol, {args.strategy} strategy, {args.connections} connections)")
+    Config.CONNECTIONS = args.connections
+    Config.CONCURRENCY = args.concurrency # sizes the legacy pool
+    _create_strategies(args.strategy)
+    workload = _make_workload(args, _make_cache(args))
+    func = _mix_func(workload, args.mix)
+    if func is None:
+        raise ValueError(f"unknown mix {args.mix}")
+    worker_rate = args.rate / args.concurrency if args.rate else None
+    results = [Workload.new_metrics() for _ in range(args.concurrency)]
+    try:
+        print("Warming up...")
+        func(args.warmup)
+        channel.send({'status': 'ready', 'host': socket.gethostname()})
+        at = channel.recv()['at']
+        delay = at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        started = time.time()
+        _run_workers(func, args.time, results, worker_rate, args.arrival)
+        elapsed = time.time() - started
+    finally:
+        workload.close()
+    print(f"Finished: {sum(r['ops'] for r in results)} ops in {elapsed:.2f}s")
+    channel.send({'status': 'done', 'started': started, 'elapsed': elapsed,
+                  'results': [dump_metrics(r) for r in results]})
+
+def cmd_agent(args):
+    try:
+        serve(parse_address(args.listen), _agent_session, token=Config.AGENT_TOKEN, once=args.once)
+    except ValueError as e:
+        print(f"Agent not started: {e}")
+        sys.exit(2)
+
+def _spawn_agents(count, port, token):
+    # Local agent processes on consecutive ports, one run each; the token
+    # goes through the environment, not the command line
+    procs, addresses = [], []
+    env = dict(os.environ, AGENT_TOKEN=token)
+    for i in range(count):
+        address = ('127.0.0.1', port + i)
+        procs.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), 'agent',
+                                       '--listen', f'{address[0]}:{address[1]}', '--once'],
+                                      stdout=subprocess.DEVNULL, env=env))
+        addresses.append(address)
+    return procs, addresses
+
+def cmd_coordinate(args):
+    if args.mix == 'P' or args.purge_days is not None or args.record or args.repeat > 1:
+        # Background actors and the trace writer live in one process, and
+        # agents exit after one run
+        print("Mix P, --purge-days, --record and --repeat need a single-process run (no --agents).")
+        return
+    addresses = [parse_address(a) for a in args.agents.split(',')] if args.agents else []
+    # Agents started by hand share AGENT_TOKEN (or its absence) with this
+    # process; spawned ones get a fresh token of their own
+    tokens = [Config.AGENT_TOKEN] * len(addresses)
+    procs = []
+    if args.spawn_agents:
+        token = secrets.token_hex(16)
+        procs, spawned = _spawn_agents(args.spawn_agents, args.agent_port, token)
+        addresses += spawned
+        tokens += [token] * len(spawned)
+    n = len(addresses)
+    print(f"Running Mix {args.mix} on {n} agents x {args.concurrency} workers for {args.time}s "
+          f"({args.protocol} protocol, {args.strategy} strategy, {args.connections} connections)...")
+    config = {name: getattr(args, name) for name in AGENT_OPTIONS}
+    config['warmup'] = 10
+    # Open loop: each agent gets an equal share of the target rate
+    config['rate'] = args.rate / n if args.rate else None
+    if args.rate:
+        print(f"Open loop: {args.rate:.0f} ops/s target, {args.arrival} arrivals")
+
+    coordinator = Coordinator(addresses, tokens)
+    try:
+        coordinator.connect()
+        print("Agents warming up...")
+        at, done = coordinator.run([config] * n)
+    except (OSError, RuntimeError) as e:
+        print(f"Distributed run failed: {e}")
+        return
+    finally:
+        coordinator.close()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.terminate()
+                p.wait()
+
+    print(f"Benchmark finished in {max(m['started'] + m['elapsed'] for m in done) - at:.2f}s")
+    print("\nAgents (start offset from the common start time):")
+    results = []
+    for (host, port), msg in zip(addresses, done):
+        ops = sum(r['ops'] for r in msg['results'])
+        errors = sum(r['errors'] for r in msg['results'])
+        print(f"  {host}:{port} ({msg['host']}): {ops} ops, {errors} errors, "
+              f"start {(msg['started'] - at) * 1000:+.1f} ms, ran {msg['elapsed']:.2f}s")
+        results += msg['results']
+    print_results(results, args.time, args.hist_digits, args.rate)
+    _save_results(args, [(max(m['elapsed'] for m in done), results)])
+
+def cmd_run(args):
+    if args.agents or args.spawn_agents:
+        cmd_coordinate(args)
+        return
+    print(f"Running Mix {args.mix} with {args.concurrency} workers for {args.time}s "
+          f"({args.protocol} protocol, {args.strategy} strategy, {args.connections} connections)...")
+    # Before the first checkout
+    Config.CONNECTIONS = args.connections
+    Config.CONCURRENCY = args.concurrency # sizes the legacy pool
+    if args.connections == 'pool' and args.concurrency * 2 + 1 > 32:
+        # A read and a write connection per worker plus the group-commit
+        # writer's; the pool can't grow past 32
+        print(f"Warning: {args.concurrency} workers can exhaust the 32-connection pool; "
+              f"use --concurrency 15 or less, or --connections sticky")
+    _create_strategies(args.strategy)
+    worker_rate = None
+    if args.rate:
+        # Open loop: each worker gets an equal share of the target rate
+        worker_rate = args.rate / args.concurrency
+        print(f"Open loop: {args.rate:.0f} ops/s target, {args.arrival} arrivals")
+    
+    # One set of worker metrics per measured repetition
+    repeats = [[Workload.new_metrics() for _ in range(args.concurrency)] for _ in range(args.repeat)]
+    results = [metrics for rep in repeats for metrics in rep]
+    cache = _make_cache(args)
+    workload = _make_workload(args, cache)
+    func = _mix_func(workload, args.mix)
+    if func is None:
+        print("Unknown mix. Use A, B, C, D, E, G, J, P, R, or S.")
         return
+    if args.mix in ('D', 'G', 'P', 'S') and not workload.loader.uses_procedures:
+        print(f"Note: --strategy {args.strategy} needs rows the stored procedures don't write, so "
+              f"insert_single / sp_batch_* use multi-row INSERTs (Loader.write_batch) in this run")
+
+    actors = []
+    if args.mix == 'P':
+        manager = PartitionManager(retention_days=args.retention_days)
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            if not manager.is_partitioned(cursor):
+                print("Mix P needs partitioned tables (seed with --partitioned).")
+                return
+            expired = manager.expired(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+        print(f"{len(expired)} day partitions past {args.retention_days} days retention; "
+              f"dropping one every {args.drop_interval:.0f}s")
+        actors.append(PartitionDropper(manager, args.drop_interval))
+    if args.purge_days is not None:
+        print(f"Purging operations older than {args.purge_days} days in the background")
+        actors.append(_purger(args))
 
     # Warmup
     print("Warming up...")
     func(10) # 10 seconds warmup (spec says 2-5 mins, but keeping it short for demo)
     
+    sampler = None
+    if args.server_metrics:
+        sampler = ServerSampler(interval=args.interval)
+        try:
+            sampler.open()
+        except Exception as e:
+            print(f"Server metrics disabled: {e}")
+            sampler = None
+
     print("Starting benchmark...")
+    reporter = IntervalReporter(results, interval=args.interval, path=args.timeseries, live=not args.quiet)
+    reporter.start()
+    if sampler is not None:
+        sampler.start()
     start_global = time.time()
+    # Background actors start after the warmup, so every op they overlap
+    # is in the measured run
+    workload.actors = actors
+    for actor in actors:
+        actor.start()
+    recorder = None
+    if args.record:
+        # Measured run only; the warmup's ops aren't in the trace
+        recorder = TraceWriter(args.record, workload.gen.heavy_paths, mix=args.mix, rate=args.rate,
+                               concurrency=args.concurrency, strategy=args.strategy)
+        recorder.start()
+        workload.recorder = recorder
     
-    for i in range(args.concurrency):
-        t = threading.Thread(target=run_worker, args=(func, args.time, results, i))
-        threads.append(t)
-        t.start()
-        
-    for t in threads:
-        t.join()
+    run_elapsed = []
+    for i, rep in enumerate(repeats):
+        if args.repeat > 1:
+            print(f"Repetition {i + 1}/{args.repeat}...")
+        t0 = time.time()
+        _run_workers(func, args.time, rep, worker_rate, args.arrival)
+        run_elapsed.append(time.time() - t0)
+    reporter.stop()
+    if sampler is not None:
+        sampler.stop()
+    workload.close()
+    for actor in actors:
+        actor.stop()
+    if recorder is not None:
+        workload.recorder = None
+        recorder.close()
         
     end_global = time.time()
     print(f"Benchmark finished in {end_global - start_global:.2f}s")
+    if recorder is not None:
+        print(f"Recorded {recorder.count} ops to {args.record}")
     
-    # Aggregate results
-    total_ops = 0
-    total_errors = 0
-    all_latencies = {} # type -> list of latencies
-    
-    for r in results:
-        if r:
-            total_ops += r['ops']
-            total_errors += r['errors']
-            for op_type, lat in r['latencies']:
-                if op_type not in all_latencies:
-                    all_latencies[op_type] = []
-                all_latencies[op_type].append(lat)
-    
-    print(f"\nResults:")
-    print(f"Total Ops: {total_ops}")
-    print(f"QPS: {total_ops / args.time:.2f}")
-    print(f"Errors: {total_errors}")
-    
-    print("\nLatency (ms) p50 / p95 / p99:")
-    for op_type, lats in all_latencies.items():
-        if not lats:
-            continue
-        a = np.array(lats) * 1000 # to ms
-        p50 = np.percentile(a, 50)
-        p95 = np.percentile(a, 95)
-        p99 = np.percentile(a, 99)
-        print(f"  {op_type:<15}: {p50:.2f} / {p95:.2f} / {p99:.2f}")
+    if args.repeat > 1:
+        print("Per repetition QPS: " + ", ".join(f"{sum(m['ops'] for m in rep) / args.time:.2f}" for rep in repeats))
+    all_histograms = print_results(results, args.time * args.repeat, args.hist_digits, args.rate)
+    # Client timeline with the server sample of each interval
+    intervals = align(reporter.timeline, sampler.samples if sampler else [], args.interval)
+    _save_results(args, list(zip(run_elapsed, repeats)), intervals)
+    if sampler is not None:
+        _print_server(sampler, intervals)
+
+    tags = [actor.tag for actor in actors]
+    for actor in actors:
+        if isinstance(actor, PartitionDropper):
+            d = actor.summary()
+            print(f"\nPartition drops: {d['drops']} (mean {d['mean_drop_ms']:.1f} ms, max {d['max_drop_ms']:.1f} ms)"
+                  f"{': ' + ', '.join(d['partitions']) if d['partitions'] else ''}")
+            if d['timeouts']:
+                print(f"  {d['timeouts']} drops gave up waiting for the metadata lock (retried on the next tick)")
+        else:
+            print(f"\nPurge (older than {args.purge_days} days):")
+            _print_purge(actor.summary())
+        _print_overlap(all_histograms, actor.tag, tags)
+
+    if workload.writer is not None:
+        # Includes the warmup
+        g = workload.writer.summary()
+        print(f"\nGroup commit (max delay {args.gc_max_delay_ms:.1f} ms, max batch {args.gc_max_batch}):")
+        print(f"  Flushes: {g['flushes']} for {g['requests']} requests "
+              f"({g['mean_rows_per_flush']:.1f} rows/flush, {g['commits_saved']} commits saved)")
+        print(f"  Mean flush (write + commit): {g['mean_flush_ms']:.3f} ms, failed requests: {g['failed']}")
+
+    # Storage next to latency: what the read strategy adds on top of operations
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        sizes = workload.strategy.storage(cursor)
+        if args.mix == 'J':
+            join_sizes = workload.get_strategy('side_table').storage(cursor)
+            covering_sizes = workload.get_strategy('covering').storage(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"\nStorage ({workload.strategy.name}): {sum(size for _, size in sizes) / 1024 / 1024:.2f} MB")
+    for name, size in sizes:
+        print(f"  {name:<40}: {size / 1024 / 1024:.2f} MB")
+
+    if args.mix == 'J':
+        # Share of each read spent joining back to operations, vs the bytes
+        # the covering side table adds to get rid of it
+        print("\nJoin share of read latency (p50 / p99 ms, join vs covering):")
+        for base in ('latest_l1', 'latest_l2', 'latest_l3', 'latest_l4', 'error_rate'):
+            join, cov = all_histograms.get(base + '_join'), all_histograms.get(base + '_covering')
+            if not (join and cov and join.total and cov.total):
+                continue
+            j50, j99 = join.percentile(50) * 1000, join.percentile(99) * 1000
+            c50, c99 = cov.percentile(50) * 1000, cov.percentile(99) * 1000
+            share = (j50 - c50) / j50 * 100 if j50 else 0.0
+            print(f"  {base:<15}: {j50:.2f} / {j99:.2f} vs {c50:.2f} / {c99:.2f} -> join {share:.1f}% of p50")
+        mb = 1024 * 1024
+        join_bytes = sum(size for _, size in join_sizes)
+        covering_bytes = sum(size for name, size in covering_sizes if name != 'prefixes')
+        dict_bytes = sum(size for name, size in covering_sizes if name == 'prefixes')
+        print(f"  Side table: {join_bytes / mb:.2f} MB joined vs {covering_bytes / mb:.2f} MB covering "
+              f"(+{(covering_bytes - join_bytes) / mb:.2f} MB, plus {dict_bytes / mb:.2f} MB path dictionary)")
+
+    if args.connections == 'sticky':
+        # Includes the warmup
+        m = get_manager().summary()
+        print(f"\nConnections (sticky, {m['open']} open):")
+        print(f"  Checkouts: {m['checkouts']} ({m['opened']} opened, {m['reused']} reused), "
+              f"mean {m['mean_checkout_us']:.1f} us")
+        print(f"  Wait for a free slot (max {Config.MAX_CONNECTIONS}): mean {m['mean_wait_ms']:.2f} ms, "
+              f"max {m['max_wait'] * 1000:.2f} ms")
+        print(f"  Resets: {m['resets']} rollbacks on return ({m['resets_avoided']} session resets avoided), "
+              f"{m['health_checks']} idle health checks, {m['reconnects']} reconnects")
+
+    if cache is not None:
+        # Stats include the warmup, which is what filled the cache
+        c = cache.summary()
+        gain = (1 - c['mean_hit_ms'] / c['mean_miss_ms']) * 100 if c['mean_miss_ms'] else 0.0
+        print(f"\nLatest cache ({c['entries']} entries, {c['bytes'] / 1024 / 1024:.1f} MB):")
+        print(f"  Hit rate: {c['hit_rate'] * 100:.1f}% ({c['hits']} hits / {c['misses']} misses, {c['expired']} expired)")
+        print(f"  Staleness bound: {c['staleness_bound_s']:.1f}s (own writes applied on commit: "
+              f"{c['updates']} updates, {c['invalidations']} invalidations)")
+        print(f"  Mean latency (ms) hit / miss: {c['mean_hit_ms']:.3f} / {c['mean_miss_ms']:.3f} ({gain:.1f}% lower on hit)")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ops Bench Tool")
@@ -196,21 +1049,231 @@ if __name__ == "__main__":
     p_seed = subparsers.add_parser('seed')
     p_seed.add_argument('--amount', type=int, default=Config.TOTAL_OPS, help='Number of operations to insert')
     p_seed.add_argument('--batch-size', type=int, default=Config.BATCH_SIZE)
-    p_seed.add_argument('--concurrency', type=int, default=1, help='Number of seeding threads')
+    p_seed.add_argument('--concurrency', type=int, default=1, help='Number of seeding workers')
+    p_seed.add_argument('--workers-mode', type=str, default='thread', choices=['thread', 'process'],
+                        help='Seed with threads sharing one Loader, or processes with their own pools')
+    p_seed.add_argument('--method', type=str, default='insert', choices=['insert', 'load-data'],
+                        help='Multi-row INSERTs, or streamed TSV through LOAD DATA LOCAL INFILE')
+    p_seed.add_argument('--defer-indexes', action='store_true',
+                        help='With --method load-data: drop secondary indexes and rebuild them at the end')
+    p_seed.add_argument('--time-order', type=str, default='random', choices=['random', 'chrono'],
+                        help='random: every batch spans 30 days; chrono: batches advance through time in order')
+    p_seed.add_argument('--jitter-sec', type=float, default=0.0,
+                        help='With --time-order chrono: max out-of-order displacement of created_at')
+    p_seed.add_argument('--rollup', action='store_true',
+                        help='Also maintain operation_prefix_rollup')
+    p_seed.add_argument('--strategy', type=_strategy_arg, default='side_table',
+                        help=f"Prefix-lookup strategies to maintain, comma-separated ({', '.join(STRATEGIES)})")
+    p_seed.add_argument('--id-block', type=int, default=0,
+                        help='Assign operation ids client-side in blocks of this size from id_sequences (0 = AUTO_INCREMENT)')
+    p_seed.add_argument('--partitioned', action='store_true',
+                        help='RANGE-partition operations and operation_prefixes by day on created_at first '
+                             '(instant on empty tables, a full rebuild otherwise)')
+    p_seed.add_argument('--future-days', type=int, default=3,
+                        help='With --partitioned: day partitions created ahead of the anchor')
+    p_seed.add_argument('--seed', type=int, default=None, help='Generator seed (reproducible data)')
+    p_seed.add_argument('--anchor', type=datetime.datetime.fromisoformat, default=None,
+                        help='Fixed "now" for generated timestamps, e.g. 2025-01-01T00:00:00')
+    
+    # Generator micro-benchmark (no database needed)
+    p_gen = subparsers.add_parser('gen-bench')
+    p_gen.add_argument('--batch-size', type=int, default=5000)
+    p_gen.add_argument('--batches', type=int, default=20)
+    p_gen.add_argument('--seed', type=int, default=42)
+    p_gen.add_argument('--anchor', type=datetime.datetime.fromisoformat, default=None)
+    
+    # Rebuild the optional per-prefix hourly rollup
+    subparsers.add_parser('rollup-rebuild')
+    
+    # Create and backfill prefix-lookup strategies from existing data
+    p_strat = subparsers.add_parser('strategy-build')
+    p_strat.add_argument('--strategy', type=_strategy_arg, required=True,
+                         help=f"Comma-separated ({', '.join(STRATEGIES)})")
+    
+    # Add future day partitions and drop expired ones
+    p_part = subparsers.add_parser('partition-maintain')
+    p_part.add_argument('--retention-days', type=int, default=30, help='Drop days older than this')
+    p_part.add_argument('--future-days', type=int, default=3, help='Keep this many day partitions ahead of today')
+    p_part.add_argument('--today', type=datetime.date.fromisoformat, default=None,
+                        help='Reference day, e.g. 2025-01-01 for a seed with --anchor (default: today)')
+    
+    # Delete operations past the retention window in bounded chunks
+    p_purge = subparsers.add_parser('purge')
+    p_purge.add_argument('--days', dest='purge_days', type=int, required=True,
+                         help='Delete operations (and their prefix rows) older than this')
+    p_purge.add_argument('--purge-target-ms', type=float, default=50.0,
+                         help='Purge: chunk span adapts so each chunk takes about this long')
+    p_purge.add_argument('--purge-pause-ms', type=float, default=10.0,
+                         help='Purge: rest between chunks')
+    p_purge.add_argument('--purge-max-history', type=int, default=100000,
+                         help='Purge: wait while the InnoDB history list is longer than this')
+    p_purge.add_argument('--purge-max-lag', type=float, default=5.0,
+                         help='Purge: wait while the replica at REPLICA_HOST lags more than this (s)')
+    p_purge.add_argument('--purge-max-wait', type=float, default=60.0,
+                         help='Purge: longest backoff before a chunk (s); then it deletes anyway')
+    
+    # Replay a recorded (or imported) trace
+    p_replay = subparsers.add_parser('replay')
+    p_replay.add_argument('trace', help='Trace from run --record or trace-import (.jsonl or .jsonl.gz)')
+    p_replay.add_argument('--speed', type=float, default=1.0,
+                          help='Timing multiplier: 2 sends twice as fast as recorded; 0 sends as fast as possible')
+    p_replay.add_argument('--concurrency', type=int, default=Config.CONCURRENCY)
+    p_replay.add_argument('--limit', type=int, default=0, help='Stop after this many ops (0 = whole trace)')
+    p_replay.add_argument('--strategy', type=_strategy_arg, default='side_table')
+    p_replay.add_argument('--rollup', action='store_true')
+    p_replay.add_argument('--id-block', type=int, default=0)
+    p_replay.add_argument('--protocol', type=str, default='text', choices=['text', 'prepared'])
+    p_replay.add_argument('--connections', type=str, default=Config.CONNECTIONS, choices=['sticky', 'pool'])
+    p_replay.add_argument('--hist-digits', type=int, default=3, choices=[1, 2, 3, 4, 5])
+    p_replay.add_argument('--interval', type=float, default=1.0)
+    p_replay.add_argument('--timeseries', type=str, default=None)
+    p_replay.add_argument('--quiet', action='store_true')
+
+    # Convert a JSONL request log into a trace
+    p_import = subparsers.add_parser('trace-import')
+    p_import.add_argument('source', help='JSONL, one request object per line')
+    p_import.add_argument('--out', required=True, help='Trace to write (.jsonl or .jsonl.gz)')
+    p_import.add_argument('--ts-field', default='timestamp', help='Epoch seconds or ISO-8601 send time')
+    p_import.add_argument('--op-field', default='op', help='Op type (one of the mix op types)')
+    p_import.add_argument('--prefix-field', default='prefix', help='Prefix (or type_path for exact)')
+    p_import.add_argument('--default-op', default='latest_l2', help='Op for lines without a known op type')
+    p_import.add_argument('--rate', type=float, default=100.0, help='Spacing (ops/s) for lines without a timestamp')
+    p_import.add_argument('--seed', type=int, default=0, help='Seed for parameters the log does not have')
+    
+    # Load-generating agent for coordinated runs (run --agents)
+    p_agent = subparsers.add_parser('agent')
+    p_agent.add_argument('--listen', type=str, default=f'127.0.0.1:{DEFAULT_PORT}',
+                         help='host:port to accept coordinators on (other than loopback needs AGENT_TOKEN)')
+    p_agent.add_argument('--once', action='store_true', help='Exit after one run')
+    
+    # Compare two results files
+    p_cmp = subparsers.add_parser('compare')
+    p_cmp.add_argument('base', help='Results file of the baseline run')
+    p_cmp.add_argument('new', help='Results file of the changed run')
+    p_cmp.add_argument('--metrics', type=str, default='qps,p50,p99',
+                       help=f"Comma-separated ({', '.join(METRICS)})")
+    p_cmp.add_argument('--threshold', type=float, default=5.0,
+                       help='Significant changes larger than this (percent) count as regressions')
+    p_cmp.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the intervals')
+    p_cmp.add_argument('--bootstrap', type=int, default=1000,
+                       help='Resampling rounds for single-run percentiles')
+    
+    # Capture the plans of every read shape at every prefix depth
+    p_plans = subparsers.add_parser('plan-capture')
+    p_plans.add_argument('--out', type=str, default='plans-baseline.json', help='Plan file to write')
+    p_plans.add_argument('--strategy', type=_strategy_arg, default='side_table',
+                         help='Strategies whose read shapes are captured, comma-separated')
+    p_plans.add_argument('--path', type=str, default=None,
+                         help='type_path whose prefixes are queried (default: oldest 4-level path in the data)')
+    p_plans.add_argument('--no-analyze', dest='analyze', action='store_false',
+                         help='Execute the queries directly instead of through EXPLAIN ANALYZE')
+    
+    # Capture again and diff against a saved plan file
+    p_pdiff = subparsers.add_parser('plan-diff')
+    p_pdiff.add_argument('baseline', help='Plan file from plan-capture')
+    p_pdiff.add_argument('--out', type=str, default=None, help='Also save the new capture here')
+    p_pdiff.add_argument('--strategy', type=_strategy_arg, default=None, help='Default: the baseline\'s strategies')
+    p_pdiff.add_argument('--path', type=str, default=None, help='Default: the baseline\'s path')
+    p_pdiff.add_argument('--rows-factor', type=float, default=2.0,
+                         help='Rows examined growing more than this many times is a regression')
+    p_pdiff.add_argument('--min-rows', type=int, default=1000,
+                         help='... and only when it grew by at least this many rows')
+    p_pdiff.add_argument('--no-analyze', dest='analyze', action='store_false')
     
     # Validate command
     p_val = subparsers.add_parser('validate')
     
     # Run command
     p_run = subparsers.add_parser('run')
-    p_run.add_argument('--mix', type=str, required=True, choices=['A', 'B', 'C', 'D'])
+    p_run.add_argument('--mix', type=str, required=True, choices=['A', 'B', 'C', 'D', 'E', 'G', 'J', 'P', 'R', 'S'])
     p_run.add_argument('--time', type=int, default=60, help='Duration in seconds')
     p_run.add_argument('--concurrency', type=int, default=Config.CONCURRENCY)
+    p_run.add_argument('--rollup', action='store_true',
+                       help='Maintain operation_prefix_rollup on writes; count_24h/error_rate read it')
+    p_run.add_argument('--cache-mb', type=float, default=0,
+                       help='In-process cache for latest_l* reads, in MB (0 = off)')
+    p_run.add_argument('--cache-ttl', type=float, default=5.0,
+                       help='Cache entry lifetime in seconds; bounds staleness from outside writes')
+    p_run.add_argument('--strategy', type=_strategy_arg, default='side_table',
+                       help='Prefix-lookup strategies, comma-separated; all are written, the first serves reads')
+    p_run.add_argument('--id-block', type=int, default=0,
+                       help='Writes take operation ids from client-side blocks of this size (0 = AUTO_INCREMENT)')
+    p_run.add_argument('--gc-max-delay-ms', type=float, default=2.0,
+                       help='insert_coalesced: longest a request waits for others to join its commit')
+    p_run.add_argument('--gc-max-batch', type=int, default=256,
+                       help='insert_coalesced: flush as soon as this many rows are queued')
+    p_run.add_argument('--retention-days', type=int, default=20,
+                       help='Mix P: day partitions older than this are dropped during the run')
+    p_run.add_argument('--drop-interval', type=float, default=5.0,
+                       help='Mix P: seconds between partition drops')
+    p_run.add_argument('--purge-days', type=int, default=None,
+                       help='Run the retention purge (older than this many days) next to the mix')
+    p_run.add_argument('--purge-target-ms', type=float, default=50.0,
+                       help='Purge: chunk span adapts so each chunk takes about this long')
+    p_run.add_argument('--purge-pause-ms', type=float, default=10.0,
+                       help='Purge: rest between chunks')
+    p_run.add_argument('--purge-max-history', type=int, default=100000,
+                       help='Purge: wait while the InnoDB history list is longer than this')
+    p_run.add_argument('--purge-max-lag', type=float, default=5.0,
+                       help='Purge: wait while the replica at REPLICA_HOST lags more than this (s)')
+    p_run.add_argument('--purge-max-wait', type=float, default=60.0,
+                       help='Purge: longest backoff before a chunk (s); then it deletes anyway')
+    p_run.add_argument('--connections', type=str, default=Config.CONNECTIONS, choices=['sticky', 'pool'],
+                       help='Sticky per-thread connections, or the session-resetting pool (max 32)')
+    p_run.add_argument('--record', type=str, default=None,
+                       help='Write every op of the measured run to this trace (.jsonl, or .jsonl.gz) for replay')
+    p_run.add_argument('--protocol', type=str, default='text', choices=['text', 'prepared'],
+                       help='Client-side interpolated SQL, or server-side prepared statements')
+    p_run.add_argument('--hist-digits', type=int, default=3, choices=[1, 2, 3, 4, 5],
+                       help='Latency histogram precision (significant decimal digits)')
+    p_run.add_argument('--interval', type=float, default=1.0,
+                       help='Seconds between time-series snapshots')
+    p_run.add_argument('--timeseries', type=str, default=None,
+                       help='Write per-interval metrics to this file (.csv, otherwise JSONL)')
+    p_run.add_argument('--quiet', action='store_true', help='No live per-interval console line')
+    p_run.add_argument('--rate', type=float, default=None,
+                       help='Open loop: target arrival rate in ops/s across all workers')
+    p_run.add_argument('--arrival', type=str, default='poisson', choices=['poisson', 'constant'],
+                       help='Arrival schedule for --rate')
+    p_run.add_argument('--no-server-metrics', dest='server_metrics', action='store_false',
+                       help='Do not sample server status, InnoDB metrics and statement digests during the run')
+    p_run.add_argument('--repeat', type=int, default=1,
+                       help='Measured repetitions of --time each after one warmup (samples for compare)')
+    p_run.add_argument('--results', type=str, default=None,
+                       help='Results file to write (default: results/run-<mix>-<time>.json)')
+    p_run.add_argument('--agents', type=str, default=None,
+                       help='Coordinate agents (main.py agent) at host:port,...; each runs --concurrency workers')
+    p_run.add_argument('--spawn-agents', type=int, default=0,
+                       help='Start this many local agent processes and coordinate them (with any --agents)')
+    p_run.add_argument('--agent-port', type=int, default=DEFAULT_PORT + 1,
+                       help='First port for --spawn-agents')
     
     args = parser.parse_args()
     
     if args.command == 'seed':
         cmd_seed(args)
+    elif args.command == 'gen-bench':
+        cmd_gen_bench(args)
+    elif args.command == 'rollup-rebuild':
+        cmd_rollup_rebuild(args)
+    elif args.command == 'strategy-build':
+        cmd_strategy_build(args)
+    elif args.command == 'partition-maintain':
+        cmd_partition_maintain(args)
+    elif args.command == 'purge':
+        cmd_purge(args)
+    elif args.command == 'replay':
+        cmd_replay(args)
+    elif args.command == 'trace-import':
+        cmd_trace_import(args)
+    elif args.command == 'agent':
+        cmd_agent(args)
+    elif args.command == 'compare':
+        cmd_compare(args)
+    elif args.command == 'plan-capture':
+        cmd_plan_capture(args)
+    elif args.command == 'plan-diff':
+        cmd_plan_diff(args)
     elif args.command == 'validate':
         cmd_validate(args)
     elif args.command == 'run':
@@ -28,6 +28,43 @@ CREATE TABLE IF NOT EXISTS operation_prefixes (
   KEY ix_prefix_created (prefix, created_at DESC, operation_id) -- top-K scans
 ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC;
 
+-- Optional rollup: per-prefix hourly counters for windowed counts and error
+-- rates. Maintained by Loader / insert_operation_with_prefixes_rollup when
+-- rollup is enabled; rebuild with `main.py rollup-rebuild`.
+CREATE TABLE IF NOT EXISTS operation_prefix_rollup (
+  prefix        VARCHAR(191) NOT NULL,
+  hour_bucket   DATETIME NOT NULL,         -- created_at truncated to the hour
+  total         BIGINT UNSIGNED NOT NULL,
+  errors        BIGINT UNSIGNED NOT NULL,
+  PRIMARY KEY (prefix, hour_bucket)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC;
+
+-- Optional dictionary layout (the `dict` strategy, src/strategies/dictionary.py):
+-- each prefix string stored once, the side table keyed by a 4-byte prefix_id.
+-- Backfill with `main.py strategy-build --strategy dict`.
+CREATE TABLE IF NOT EXISTS prefixes (
+  prefix_id     INT UNSIGNED NOT NULL AUTO_INCREMENT,
+  prefix        VARCHAR(191) NOT NULL,
+  PRIMARY KEY (prefix_id),
+  UNIQUE KEY ux_prefix (prefix)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC;
+
+CREATE TABLE IF NOT EXISTS operation_prefix_ids (
+  operation_id  BIGINT UNSIGNED NOT NULL,
+  prefix_id     INT UNSIGNED NOT NULL,
+  created_at    DATETIME(6) NOT NULL,
+  PRIMARY KEY (operation_id, prefix_id),
+  KEY ix_prefix_id_created (prefix_id, created_at DESC, operation_id)
+) ENGINE=InnoDB ROW_FORMAT=DYNAMIC;
+
+-- Client-side id blocks (src/ids.py): one row per sequence, next_id is the
+-- first id not yet handed out. Only used when a Loader has id_block > 0.
+CREATE TABLE IF NOT EXISTS id_sequences (
+  name          VARCHAR(64) NOT NULL,
+  next_id       BIGINT UNSIGNED NOT NULL,
+  PRIMARY KEY (name)
+) ENGINE=InnoDB;
+
 -- Stored Procedure for optimized single-row insertion
 DROP PROCEDURE IF EXISTS insert_operation_with_prefixes;
 
@@ -38,16 +75,17 @@ CREATE PROCEDURE insert_operation_with_prefixes(
     IN p_created_at DATETIME(6),
     IN p_status TINYINT UNSIGNED,
     IN p_payload JSON,
-    IN p_prefixes JSON
+    IN p_prefixes JSON,
+    IN p_id BIGINT UNSIGNED  -- NULL: AUTO_INCREMENT
 )
 BEGIN
     DECLARE new_op_id BIGINT UNSIGNED;
     
     -- Insert operation
-    INSERT INTO operations (type_path, created_at, status, payload_json)
-    VALUES (p_type_path, p_created_at, p_status, p_payload);
+    INSERT INTO operations (id, type_path, created_at, status, payload_json)
+    VALUES (p_id, p_type_path, p_created_at, p_status, p_payload);
     
-    SET new_op_id = LAST_INSERT_ID();
+    SET new_op_id = COALESCE(p_id, LAST_INSERT_ID());
     
     -- Insert prefixes from JSON array
     INSERT INTO operation_prefixes (operation_id, prefix, created_at)
@@ -59,3 +97,92 @@ BEGIN
 END //
 
 DELIMITER ;
+
+-- Same as above, plus the rollup upsert
+DROP PROCEDURE IF EXISTS insert_operation_with_prefixes_rollup;
+
+DELIMITER //
+
+CREATE PROCEDURE insert_operation_with_prefixes_rollup(
+    IN p_type_path VARCHAR(191),
+    IN p_created_at DATETIME(6),
+    IN p_status TINYINT UNSIGNED,
+    IN p_payload JSON,
+    IN p_prefixes JSON,
+    IN p_id BIGINT UNSIGNED  -- NULL: AUTO_INCREMENT
+)
+BEGIN
+    DECLARE new_op_id BIGINT UNSIGNED;
+    
+    INSERT INTO operations (id, type_path, created_at, status, payload_json)
+    VALUES (p_id, p_type_path, p_created_at, p_status, p_payload);
+    
+    SET new_op_id = COALESCE(p_id, LAST_INSERT_ID());
+    
+    INSERT INTO operation_prefixes (operation_id, prefix, created_at)
+    SELECT new_op_id, prefix, p_created_at
+    FROM JSON_TABLE(
+        p_prefixes,
+        "$[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+    ) AS jt;
+    
+    -- One counter row per prefix and hour
+    INSERT INTO operation_prefix_rollup (prefix, hour_bucket, total, errors)
+    SELECT prefix, DATE_FORMAT(p_created_at, '%Y-%m-%d %H:00:00'), 1, p_status
+    FROM JSON_TABLE(
+        p_prefixes,
+        "$[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+    ) AS jt
+    ON DUPLICATE KEY UPDATE
+        total = total + 1,
+        errors = errors + p_status;
+END //
+
+DELIMITER ;
+
+-- Multi-row variant: a whole batch of operations per CALL
+DROP PROCEDURE IF EXISTS insert_operations_batch;
+
+DELIMITER //
+
+CREATE PROCEDURE insert_operations_batch(
+    IN p_ops JSON,  -- [{"type_path", "created_at", "status", "payload", "prefixes": [...]}, ...]
+    IN p_first_id BIGINT UNSIGNED  -- ids p_first_id.. in array order; NULL: AUTO_INCREMENT
+)
+BEGIN
+    DECLARE first_id BIGINT UNSIGNED;
+
+    -- Set-based insert of every operation in array order
+    INSERT INTO operations (id, type_path, created_at, status, payload_json)
+    SELECT p_first_id + jt.ord - 1, jt.type_path, jt.created_at, jt.status, jt.payload
+    FROM JSON_TABLE(
+        p_ops,
+        "$[*]" COLUMNS(
+            ord FOR ORDINALITY,
+            type_path VARCHAR(191) PATH "$.type_path",
+            created_at DATETIME(6) PATH "$.created_at",
+            status TINYINT UNSIGNED PATH "$.status",
+            payload JSON PATH "$.payload"
+        )
+    ) AS jt
+    ORDER BY jt.ord;
+
+    -- AUTO_INCREMENT ids of an INSERT ... SELECT are only consecutive with
+    -- innodb_autoinc_lock_mode <= 1 (docker-compose.yml sets 1); client-assigned
+    -- ids (p_first_id) don't depend on it
+    SET first_id = COALESCE(p_first_id, LAST_INSERT_ID());
+
+    -- One prefix row per (operation, prefix), flattened with NESTED PATH
+    INSERT INTO operation_prefixes (operation_id, prefix, created_at)
+    SELECT first_id + jt.ord - 1, jt.prefix, jt.created_at
+    FROM JSON_TABLE(
+        p_ops,
+        "$[*]" COLUMNS(
+            ord FOR ORDINALITY,
+            created_at DATETIME(6) PATH "$.created_at",
+            NESTED PATH "$.prefixes[*]" COLUMNS(prefix VARCHAR(191) PATH "$")
+        )
+    ) AS jt;
+END //
+
+DELIMITER ;
@@ -0,0 +1,36 @@
+import threading
+
+
+class BackgroundActor(threading.Thread):
+    """Maintenance thread that runs next to a benchmark's workers
+    (partition drops, retention purges).
+
+    `epoch` moves when a unit of the actor's work starts and when it ends,
+    and `active` is set in between. A worker reads the epoch before an
+    operation and checks overlapped() after it, so ops that ran into the
+    actor's work are recorded separately as '<op>_<tag>'.
+    """
+
+    tag = None
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.active = False
+        self.epoch = 0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.ident is not None:
+            self.join()
+
+    def overlapped(self, epoch):
+        return self.active or self.epoch != epoch
+
+    def _begin(self):
+        self.active = True
+        self.epoch += 1
+
+    def _end(self):
+        self.active = False
+        self.epoch += 1
@@ -1,97 +1,249 @@
 import time
 import random
 import threading
+import numpy as np
+from datetime import datetime
 from src.db import get_connection
 from src.generator import Generator
 from src.loader import Loader
+from src.histogram import LatencyHistogram
+from src.group_commit import GroupCommitWriter, RESULT_TIMEOUT
+from src.strategies import make_strategies
+
+# Query shapes. Kept at module level so each can be prepared once per
+# connection (see Workload._open_cursors). The prefix reads (latest,
+# latest_seek, count_24h, error_rate) come from the prefix strategy.
+
+# Cursor for the first page: sorts after every real row
+SEEK_START = (datetime(9999, 12, 31, 23, 59, 59, 999999), 0)
+
+SQL_EXACT_TYPE_PATH = """
+    SELECT id, created_at, status, type_path
+    FROM operations
+    WHERE type_path = %s
+    ORDER BY created_at DESC
+    LIMIT %s
+"""
+
+# Rollup variants: sum hourly buckets instead of scanning side-table rows.
+# Hour granularity: the oldest, partial hour of the window is left out.
+SQL_COUNT_24H_ROLLUP = """
+    SELECT r.prefix, SUM(r.total) AS cnt
+    FROM operation_prefix_rollup r
+    WHERE r.prefix = %s
+      AND r.hour_bucket >= NOW() - INTERVAL 1 DAY
+    GROUP BY r.prefix
+"""
+
+SQL_ERROR_RATE_ROLLUP = """
+    SELECT r.prefix,
+           SUM(r.errors) AS errors,
+           SUM(r.total) AS total,
+           SUM(r.errors)/SUM(r.total) AS error_rate
+    FROM operation_prefix_rollup r
+    WHERE r.prefix = %s
+      AND r.hour_bucket >= NOW() - INTERVAL 7 DAY
+    GROUP BY r.prefix
+"""
+
+class ShortWalk(Exception):
+    # A seek_pN walk whose prefix ran out of pages before page N
+    pass
 
 class Workload:
-    def __init__(self):
-        self.gen = Generator()
-        self.loader = Loader()
+    # Rows written per call, for per-row cost in the run report
+    ROWS_PER_OP = {
+        'insert': 1000, 'insert_500': 500, 'insert_plain': 500, 'insert_rollup': 500,
+        'insert_single': 1, 'insert_coalesced': 1,
+        'sp_batch_1': 1, 'sp_batch_10': 10, 'sp_batch_100': 100, 'sp_batch_1000': 1000,
+    }
+
+    # Every op type the mixes send (what a trace can contain)
+    OP_TYPES = (
+        'exact', 'latest_l1', 'latest_l2', 'latest_l3', 'latest_l4', 'latest_l3_cold', 'latest_offset',
+        'count_24h', 'count_24h_scan', 'count_24h_rollup', 'error_rate', 'error_rate_scan', 'error_rate_rollup',
+        'offset_p1', 'offset_p10', 'offset_p100', 'offset_p1000', 'seek_p1', 'seek_p10', 'seek_p100', 'seek_p1000',
+        'latest_l1_join', 'latest_l2_join', 'latest_l3_join', 'latest_l4_join', 'error_rate_join',
+        'latest_l1_covering', 'latest_l2_covering', 'latest_l3_covering', 'latest_l4_covering', 'error_rate_covering',
+        'insert', 'insert_500', 'insert_plain', 'insert_rollup', 'insert_single', 'insert_coalesced',
+        'sp_batch_1', 'sp_batch_10', 'sp_batch_100', 'sp_batch_1000',
+    )
+
+    QUERY_SHAPES = ('latest', 'latest_seek', 'exact', 'count_24h', 'error_rate',
+                    'count_24h_rollup', 'error_rate_rollup', 'latest_covering', 'error_rate_covering')
+
+    def __init__(self, histogram_digits=3, protocol='text', rollup=False, cache=None,
+                 gc_max_delay=0.002, gc_max_batch=256, id_block=0, strategy='side_table',
+                 seed=None, heavy_paths=None):
+        # Reads and writes skew towards the same heavy paths (recorded in
+        # trace headers, so a replay uses the same ones)
+        self.gen = Generator(seed=seed, heavy_paths=heavy_paths)
+        self.random = random.Random(seed) # op parameters (_op_args)
+        # With rollup, writes maintain operation_prefix_rollup and the
+        # count_24h / error_rate ops read it
+        self.loader = Loader(rollup=rollup, id_block=id_block, strategy=strategy, heavy_paths=self.gen.heavy_paths)
+        self.rollup = rollup
+        # Prefix reads go through the first strategy; anything it does on
+        # the client (e.g. a dictionary lookup) is part of the timed read
+        self.strategy = self.loader.strategies[0]
+        self._strategies = {s.name: s for s in self.loader.strategies}
+        # Optional LatestCache in front of the latest_l* reads, kept
+        # current by this workload's own inserts
+        self.cache = cache
+        if cache is not None:
+            self.loader.write_listeners.append(cache.on_write)
+        self.histogram_digits = histogram_digits
+        self.protocol = protocol
+        # Shared group-commit writer for insert_coalesced, started on first use
+        self.gc_max_delay = gc_max_delay
+        self.gc_max_batch = gc_max_batch
+        self.writer = None
+        self._writer_lock = threading.Lock()
+        # BackgroundActors running next to the workers (partition drops,
+        # purges): ops that overlap their work are recorded as '<op>_<tag>'
+        self.actors = []
+        # Optional TraceWriter (src/trace.py) every op is recorded to
+        self.recorder = None
+
+    def _group_writer(self):
+        if self.writer is None:
+            with self._writer_lock:
+                if self.writer is None:
+                    writer = GroupCommitWriter(self.loader, self.gc_max_delay, self.gc_max_batch)
+                    writer.start()
+                    self.writer = writer
+        return self.writer
+
+    def close(self):
+        # Stops the group-commit writer, if one was started
+        if self.writer is not None:
+            self.writer.stop()
+
+    @staticmethod
+    def _set_autocommit(conn, on):
+        # Worker read connections run in autocommit while a loop uses them:
+        # every read is its own transaction, so a worker never holds a
+        # metadata lock (which DROP PARTITION waits for) or a read view
+        # (which stops InnoDB purge) between ops. Writes check out their
+        # own connections. Switched back before the connection is returned,
+        # since sticky connections keep their session.
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SET SESSION autocommit = {1 if on else 0}")
+        finally:
+            cursor.close()
+
+    def _open_cursors(self, conn):
+        # text: one client-side interpolating cursor, SQL re-sent and
+        # re-parsed on every call. prepared: one server-side prepared
+        # cursor per query shape; the connector only re-prepares when a
+        # cursor's statement text changes, so each shape is prepared once
+        # and then executed by statement id for the life of the worker
+        # (strategies whose SQL varies per prefix, like depth_columns,
+        # re-prepare whenever it changes).
+        if self.protocol == 'prepared':
+            return {shape: conn.cursor(prepared=True) for shape in self.QUERY_SHAPES}
+        cursor = conn.cursor()
+        return {shape: cursor for shape in self.QUERY_SHAPES}
         
-    def q_latest_by_prefix(self, cursor, prefix, limit=100, offset=0):
-        sql = """
-            SELECT o.id, o.created_at, o.status, o.type_path
-            FROM operation_prefixes p
-            JOIN operations o ON o.id = p.operation_id
-            WHERE p.prefix = %s
-            ORDER BY p.created_at DESC
-            LIMIT %s OFFSET %s
-        """
+    def get_strategy(self, name):
+        # A named strategy for reads outside the default (Mix J, the run
+        # report). Ones not maintained by this run's writes are read-only:
+        # their rows must exist from the seed or strategy-build.
+        strategy = self._strategies.get(name)
+        if strategy is None:
+            strategy = self._strategies.setdefault(name, make_strategies(name)[0])
+        return strategy
+
+    def q_latest_by_prefix(self, cursor, prefix, limit=100, offset=0, strategy=None):
+        strategy = strategy or self.strategy
         start = time.time()
-        cursor.execute(sql, (prefix, limit, offset))
-        cursor.fetchall()
+        cursor.execute(*strategy.latest(prefix, limit, offset))
+        strategy.rows(cursor.fetchall())
         return time.time() - start
 
+    def _q_latest(self, cursor, prefix, limit=100):
+        # latest_l* reads, through the cache when one is attached
+        if self.cache is None:
+            return self.q_latest_by_prefix(cursor, prefix, limit)
+        start = time.time()
+        version = self.cache.version(prefix)
+        hit = self.cache.get(prefix, limit) is not None
+        if not hit:
+            cursor.execute(*self.strategy.latest(prefix, limit, 0))
+            self.cache.put(prefix, limit, self.strategy.rows(cursor.fetchall()), version)
+        latency = time.time() - start
+        self.cache.record_latency(hit, latency)
+        return latency
+
+    def q_latest_by_prefix_seek(self, cursor, prefix, limit=100, after=None):
+        # Keyset page after the (created_at, operation_id) cursor `after`.
+        # Returns (latency, next cursor or None on the last page).
+        created_at, op_id = after or SEEK_START
+        start = time.time()
+        cursor.execute(*self.strategy.seek(prefix, created_at, op_id, limit))
+        rows = self.strategy.rows(cursor.fetchall())
+        latency = time.time() - start
+        if len(rows) < limit:
+            return latency, None
+        return latency, (rows[-1][1], rows[-1][0])
+
     def q_exact_type_path(self, cursor, path, limit=100):
-        sql = """
-            SELECT id, created_at, status, type_path
-            FROM operations
-            WHERE type_path = %s
-            ORDER BY created_at DESC
-            LIMIT %s
-        """
         start = time.time()
-        cursor.execute(sql, (path, limit))
+        cursor.execute(SQL_EXACT_TYPE_PATH, (path, limit))
         cursor.fetchall()
         return time.time() - start
 
     def q_count_24h(self, cursor, prefix):
-        sql = """
-            SELECT p.prefix, COUNT(*) AS cnt
-            FROM operation_prefixes p
-            WHERE p.created_at >= NOW() - INTERVAL 1 DAY
-            AND p.prefix = %s
-            GROUP BY p.prefix
-        """
         start = time.time()
-        cursor.execute(sql, (prefix,))
+        cursor.execute(*self.strategy.count_24h(prefix))
+        cursor.fetchall()
+        return time.time() - start
+
+    def q_error_rate(self, cursor, prefix, strategy=None):
+        strategy = strategy or self.strategy
+        start = time.time()
+        cursor.execute(*strategy.error_rate(prefix))
         cursor.fetchall()
         return time.time() - start
 
-    def q_error_rate(self, cursor, prefix):
-        sql = """
-            SELECT p.prefix,
-                   SUM(o.status=1) AS errors,
-                   COUNT(*) AS total,
-                   SUM(o.status=1)/COUNT(*) AS error_rate
-            FROM operation_prefixes p
-            JOIN operations o ON o.id = p.operation_id
-            WHERE p.prefix = %s
-              AND p.created_at >= NOW() - INTERVAL 7 DAY
-            GROUP BY p.prefix
-        """
+    def q_count_24h_rollup(self, cursor, prefix):
         start = time.time()
-        cursor.execute(sql, (prefix,))
+        cursor.execute(SQL_COUNT_24H_ROLLUP, (prefix,))
         cursor.fetchall()
         return time.time() - start
 
-    def run_mix_a(self, duration_sec):
+    def q_error_rate_rollup(self, cursor, prefix):
+        start = time.time()
+        cursor.execute(SQL_ERROR_RATE_ROLLUP, (prefix,))
+        cursor.fetchall()
+        return time.time() - start
+
+    def run_mix_a(self, duration_sec, **kwargs):
         return self._run_loop(duration_sec, [
             (0.6, 'latest_l2'),
             (0.8, 'latest_l3'),
             (0.9, 'exact'),
             (1.0, 'count_24h')
-        ])
+        ], **kwargs)
 
-    def run_mix_b(self, duration_sec):
+    def run_mix_b(self, duration_sec, **kwargs):
         return self._run_loop(duration_sec, [
             (0.7, 'insert'),
             (0.8, 'latest_l2'),
             (0.9, 'latest_l3_cold'),
             (1.0, 'error_rate')
-        ])
+        ], **kwargs)
 
-    def run_mix_c(self, duration_sec):
+    def run_mix_c(self, duration_sec, **kwargs):
         return self._run_loop(duration_sec, [
             (0.4, 'latest_offset'),
             (0.6, 'count_24h'),
             (0.8, 'exact'),
             (1.0, 'insert_500')
-        ])
+        ], **kwargs)
 
-    def run_mix_realtime(self, duration_sec):
+    def run_mix_realtime(self, duration_sec, **kwargs):
         # Mix D: Realtime
         # 50% Single Optimized Inserts
         # 10% Exact
@@ -106,106 +258,348 @@ class Workload:
             (0.8, 'latest_l2'),
             (0.9, 'latest_l3'),
             (1.0, 'latest_l4')
-        ])
+        ], **kwargs)
 
-    def _run_loop(self, duration, distribution):
-        start_time = time.time()
-        metrics = {
+    def run_mix_pagination(self, duration_sec, **kwargs):
+        # Mix E: OFFSET vs keyset pagination at pages 1, 10, 100, 1000
+        return self._run_loop(duration_sec, [
+            (0.125, 'offset_p1'),
+            (0.25, 'offset_p10'),
+            (0.375, 'offset_p100'),
+            (0.5, 'offset_p1000'),
+            (0.625, 'seek_p1'),
+            (0.75, 'seek_p10'),
+            (0.875, 'seek_p100'),
+            (1.0, 'seek_p1000')
+        ], **kwargs)
+
+    def run_mix_rollup(self, duration_sec, **kwargs):
+        # Mix R: rollup write amplification vs read gain, same data.
+        # Rollup counts only cover rows written with rollup on (or rebuilt).
+        return self._run_loop(duration_sec, [
+            (0.2, 'insert_plain'),
+            (0.4, 'insert_rollup'),
+            (0.55, 'count_24h_scan'),
+            (0.7, 'count_24h_rollup'),
+            (0.85, 'error_rate_scan'),
+            (1.0, 'error_rate_rollup')
+        ], **kwargs)
+
+    def run_mix_sp_batch(self, duration_sec, **kwargs):
+        # Mix S: insert_operations_batch per-row cost at batch sizes 1..1000
+        return self._run_loop(duration_sec, [
+            (0.25, 'sp_batch_1'),
+            (0.5, 'sp_batch_10'),
+            (0.75, 'sp_batch_100'),
+            (1.0, 'sp_batch_1000')
+        ], **kwargs)
+
+    def run_mix_group_commit(self, duration_sec, **kwargs):
+        # Mix G: per-transaction single inserts vs group-committed ones,
+        # with Mix D's reads alongside
+        return self._run_loop(duration_sec, [
+            (0.25, 'insert_single'),
+            (0.5, 'insert_coalesced'),
+            (0.6, 'exact'),
+            (0.7, 'latest_l1'),
+            (0.8, 'latest_l2'),
+            (0.9, 'latest_l3'),
+            (1.0, 'latest_l4')
+        ], **kwargs)
+
+    def run_mix_covering(self, duration_sec, **kwargs):
+        # Mix J: the same reads joining operations (side_table) vs
+        # index-only (covering), at every prefix depth. Needs both
+        # strategies seeded / built on the same data.
+        return self._run_loop(duration_sec, [
+            (0.1, 'latest_l1_join'),
+            (0.2, 'latest_l1_covering'),
+            (0.3, 'latest_l2_join'),
+            (0.4, 'latest_l2_covering'),
+            (0.5, 'latest_l3_join'),
+            (0.6, 'latest_l3_covering'),
+            (0.7, 'latest_l4_join'),
+            (0.8, 'latest_l4_covering'),
+            (0.9, 'error_rate_join'),
+            (1.0, 'error_rate_covering')
+        ], **kwargs)
+
+    def run_mix_partition_drop(self, duration_sec, **kwargs):
+        # Mix P: single inserts and prefix reads on partitioned tables while
+        # a PartitionDropper removes expired days
+        return self._run_loop(duration_sec, [
+            (0.3, 'insert_single'),
+            (0.5, 'latest_l2'),
+            (0.7, 'latest_l3'),
+            (0.85, 'count_24h'),
+            (1.0, 'error_rate')
+        ], **kwargs)
+
+    def _level_prefix(self, level):
+        # First `level` labels of a heavy path (a random deeper path when
+        # the heavy one is too shallow)
+        parts = self.random.choice(self.gen.heavy_paths).split('.')
+        if len(parts) < level:
+            parts = self.gen._random_path(max_depth=5).split('.')
+        return ".".join(parts[:level])
+
+    def _l2_prefix(self):
+        parts = self.random.choice(self.gen.heavy_paths).split('.')
+        return ".".join(parts[:2]) if len(parts) >= 2 else ".".join(parts)
+
+    def _op_args(self, op_type):
+        # The random parameters of one operation: everything a trace needs
+        # to send it again. Inserts carry a seed their rows are generated
+        # from (Generator.fork), not the rows themselves.
+        if op_type == 'exact':
+            return {'path': self.random.choice(self.gen.heavy_paths)}
+        if op_type.endswith(('_join', '_covering')):
+            base = op_type.rsplit('_', 1)[0]
+            return {'prefix': self._l2_prefix() if base == 'error_rate' else self._level_prefix(int(base[-1]))}
+        if op_type == 'latest_l3_cold':
+            parts = self.gen._random_path().split('.')
+            return {'prefix': ".".join(parts[:3])}
+        if op_type.startswith('latest_l'):
+            return {'prefix': self._level_prefix(int(op_type[-1]))}
+        if op_type.startswith(('count_24h', 'error_rate')):
+            return {'prefix': self._l2_prefix()}
+        if op_type == 'latest_offset':
+            return {'prefix': self._l2_prefix(), 'offset': self.random.randint(0, 5000)}
+        if op_type.startswith(('offset_p', 'seek_p')):
+            return {'prefix': self.random.choice(self.gen.heavy_paths).split('.')[0]}
+        if op_type.startswith(('insert', 'sp_batch_')):
+            return {'seed': self.random.getrandbits(32)}
+        raise ValueError(f"Unknown op type: {op_type}")
+
+    def _execute_op(self, cursors, op_type, args=None):
+        # Runs one operation of the mix and returns its service time (s).
+        # `args` from _op_args (or a trace); drawn here when not given.
+        if args is None:
+            args = self._op_args(op_type)
+        latency = 0
+        
+        if op_type == 'exact':
+            latency = self.q_exact_type_path(cursors['exact'], args['path'])
+
+        elif op_type.endswith(('_join', '_covering')):
+            # Mix J: side_table (join to operations) vs covering (index-only),
+            # no cache in front
+            base, variant = op_type.rsplit('_', 1)
+            strategy = self.get_strategy('side_table' if variant == 'join' else 'covering')
+            suffix = '' if variant == 'join' else '_covering'
+            if base == 'error_rate':
+                latency = self.q_error_rate(cursors['error_rate' + suffix], args['prefix'], strategy)
+            else:
+                latency = self.q_latest_by_prefix(cursors['latest' + suffix], args['prefix'], 100, 0, strategy)
+
+        elif op_type.startswith('latest_l'):
+            # latest_l1..l4 and latest_l3_cold
+            latency = self._q_latest(cursors['latest'], args['prefix'], 100)
+            
+        elif op_type in ('count_24h', 'count_24h_scan', 'count_24h_rollup'):
+            if op_type == 'count_24h_rollup' or (op_type == 'count_24h' and self.rollup):
+                latency = self.q_count_24h_rollup(cursors['count_24h_rollup'], args['prefix'])
+            else:
+                latency = self.q_count_24h(cursors['count_24h'], args['prefix'])
+            
+        elif op_type in ('error_rate', 'error_rate_scan', 'error_rate_rollup'):
+            if op_type == 'error_rate_rollup' or (op_type == 'error_rate' and self.rollup):
+                latency = self.q_error_rate_rollup(cursors['error_rate_rollup'], args['prefix'])
+            else:
+                latency = self.q_error_rate(cursors['error_rate'], args['prefix'])
+            
+        elif op_type == 'latest_offset':
+            latency = self.q_latest_by_prefix(cursors['latest'], args['prefix'], 100, args['offset'])
+
+        elif op_type.startswith('offset_p'):
+            # Page N of a top-level prefix via LIMIT/OFFSET
+            page = int(op_type[len('offset_p'):])
+            latency = self.q_latest_by_prefix(cursors['latest'], args['prefix'], 100, (page - 1) * 100)
+
+        elif op_type.startswith('seek_p'):
+            # Walk N pages with the keyset cursor; latency is the whole
+            # walk, the same quantity open loop measures from the send time.
+            # A prefix with fewer than N pages raises ShortWalk: it didn't
+            # reach page N, so it isn't a seek_pN sample.
+            page = int(op_type[len('seek_p'):])
+            after = None
+            for fetched in range(1, page + 1):
+                page_latency, after = self.q_latest_by_prefix_seek(cursors['latest_seek'], args['prefix'], 100, after)
+                latency += page_latency
+                if after is None and fetched < page:
+                    raise ShortWalk(f"{args['prefix']} ended after {fetched} pages")
+
+        else:
+            # Writes: rows come from a generator seeded per op
+            gen = self.loader.gen.fork(args['seed'])
+            t0 = time.time()
+            if op_type == 'insert':
+                self.loader.insert_batch(1000, gen=gen)
+            elif op_type == 'insert_500':
+                self.loader.insert_batch(500, gen=gen)
+            elif op_type in ('insert_plain', 'insert_rollup'):
+                self.loader.insert_batch(500, rollup=(op_type == 'insert_rollup'), gen=gen)
+            elif op_type.startswith('sp_batch_'):
+                self.loader.insert_batch_sp(self.ROWS_PER_OP[op_type], gen=gen)
+            elif op_type == 'insert_single':
+                self.loader.insert_single_optimized(gen=gen)
+            elif op_type == 'insert_coalesced':
+                # Includes the wait for the flush window and the shared commit
+                self._group_writer().submit(gen.generate_batch(1)).result(timeout=RESULT_TIMEOUT)
+            latency = time.time() - t0
+
+        return latency
+
+    def _arrivals(self, rate, arrival):
+        # Intended send offsets (s from start) for one worker. Drawn in NumPy
+        # chunks so the hot loop only pops Python floats.
+        rng = np.random.default_rng()
+        mean_gap = 1.0 / rate
+        t = rng.uniform(0, mean_gap)  # random phase so workers don't fire in lockstep
+        while True:
+            if arrival == 'poisson':
+                gaps = rng.exponential(mean_gap, 4096)
+            else:
+                gaps = np.full(4096, mean_gap)
+            offsets = t + np.cumsum(gaps)
+            t = offsets[-1]
+            yield from offsets.tolist()
+
+    @staticmethod
+    def new_metrics():
+        return {
             'ops': 0,
             'errors': 0,
-            'latencies': [] # list of (type, latency)
+            'op_errors': {}, # op type -> error count
+            'missed': 0, # open loop: scheduled sends still pending at the end
+            'short_walks': 0, # seek_pN walks that ran out of pages before N
+            'histograms': {} # op type -> LatencyHistogram (constant memory)
         }
+
+    def _timed_op(self, cursors, op_type, args, intended, metrics):
+        # Executes one op and records its latency (from `intended`, the
+        # scheduled send time, when there is one) in `metrics`
+        actors = self.actors
+        epochs = [actor.epoch for actor in actors]
+        try:
+            latency = self._execute_op(cursors, op_type, args)
+            if intended is not None:
+                latency = time.perf_counter() - intended
+
+            key = op_type
+            for actor, epoch in zip(actors, epochs):
+                if actor.overlapped(epoch):
+                    key += '_' + actor.tag
+            histograms = metrics['histograms']
+            hist = histograms.get(key)
+            if hist is None:
+                hist = histograms[key] = LatencyHistogram(self.histogram_digits)
+            hist.record(latency)
+            # Per-interval copy, swapped out by a running IntervalReporter
+            interval = metrics.get('interval')
+            if interval is not None:
+                hist = interval.get(key)
+                if hist is None:
+                    hist = interval[key] = LatencyHistogram(self.histogram_digits)
+                hist.record(latency)
+            metrics['ops'] += 1
+
+        except ShortWalk:
+            metrics['short_walks'] += 1
+        except Exception as e:
+            metrics['errors'] += 1
+            metrics['op_errors'][op_type] = metrics['op_errors'].get(op_type, 0) + 1
+            if metrics['errors'] <= 5:
+                print(f"Error in workload ({op_type}): {e}")
+
+    def run_replay(self, ops, start, speed=1.0, metrics=None):
+        # Replay worker: takes (t, op_type, args) from the `ops` queue until
+        # None and sends each at start + t / speed (perf_counter seconds;
+        # speed 0: as fast as possible). Latency is measured from that
+        # intended time, like an open-loop run.
+        if metrics is None:
+            metrics = self.new_metrics()
+        conn = get_connection()
+        self._set_autocommit(conn, True)
+        cursors = self._open_cursors(conn)
+        try:
+            while True:
+                item = ops.get()
+                if item is None:
+                    break
+                t, op_type, args = item
+                intended = None
+                if speed:
+                    intended = start + t / speed
+                    delay = intended - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self._timed_op(cursors, op_type, args, intended, metrics)
+        finally:
+            for cursor in set(cursors.values()):
+                cursor.close()
+            try:
+                self._set_autocommit(conn, False)
+            except Exception:
+                pass # connection lost; a reconnect starts with autocommit off
+            conn.close()
+        return metrics
+
+    def _run_loop(self, duration, distribution, rate=None, arrival='poisson', metrics=None):
+        # Closed loop by default. With `rate` (ops/s for this worker) the loop
+        # is open: ops are sent on an arrival schedule and latency is measured
+        # from the intended send time, so queueing delay is not hidden when
+        # the server falls behind (coordinated omission).
+        # Pass `metrics` (from new_metrics) to watch it while the loop runs
+        start_time = time.time()
+        if metrics is None:
+            metrics = self.new_metrics()
         
         conn = get_connection()
-        cursor = conn.cursor()
+        self._set_autocommit(conn, True)
+        cursors = self._open_cursors(conn)
+        
+        schedule = self._arrivals(rate, arrival) if rate else None
+        start_perf = time.perf_counter()
+        intended = None
         
         try:
             while time.time() - start_time < duration:
+                if schedule is not None:
+                    intended = start_perf + next(schedule)
+                    if intended - start_perf >= duration:
+                        intended = None
+                        break
+                    delay = intended - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
                 r = random.random()
                 op_type = None
                 for prob, name in distribution:
                     if r < prob:
                         op_type = name
                         break
-                
-                try:
-                    latency = 0
-                    
-                    if op_type == 'exact':
-                        path = random.choice(self.gen.heavy_paths)
-                        latency = self.q_exact_type_path(cursor, path)
-
-                    elif op_type.startswith('latest_l'):
-                        path = random.choice(self.gen.heavy_paths)
-                        # For synthetic test, sometimes heavy paths aren't deep enough
-                        # fallback to random path if needed
-                        parts = path.split('.')
-                        
-                        level = int(op_type[-1]) # 1, 2, 3, 4
-                        
-                        if len(parts) < level:
-                            # Generate deeper path if needed
-                            path = self.gen._random_path(max_depth=5)
-                            parts = path.split('.')
-                        
-                        if len(parts) >= level:
-                            prefix = ".".join(parts[:level])
-                            latency = self.q_latest_by_prefix(cursor, prefix, 100)
-                        else:
-                            # Fallback if still not deep enough (rare)
-                            prefix = path
-                            latency = self.q_latest_by_prefix(cursor, prefix, 100)
-                            
-                    elif op_type == 'latest_l3_cold':
-                        path = self.gen._random_path()
-                        parts = path.split('.')
-                        prefix = ".".join(parts[:3]) if len(parts) >= 3 else path
-                        latency = self.q_latest_by_prefix(cursor, prefix, 100)
-                        
-                    elif op_type == 'count_24h':
-                        path = random.choice(self.gen.heavy_paths)
-                        parts = path.split('.')
-                        prefix = ".".join(parts[:2]) if len(parts) >= 2 else path
-                        latency = self.q_count_24h(cursor, prefix)
-                        
-                    elif op_type == 'error_rate':
-                        path = random.choice(self.gen.heavy_paths)
-                        parts = path.split('.')
-                        prefix = ".".join(parts[:2]) if len(parts) >= 2 else path
-                        latency = self.q_error_rate(cursor, prefix)
-                        
-                    elif op_type == 'latest_offset':
-                        path = random.choice(self.gen.heavy_paths)
-                        parts = path.split('.')
-                        prefix = ".".join(parts[:2]) if len(parts) >= 2 else path
-                        offset = random.randint(0, 5000)
-                        latency = self.q_latest_by_prefix(cursor, prefix, 100, offset)
-
-                    elif op_type == 'insert':
-                        t0 = time.time()
-                        self.loader.insert_batch(1000)
-                        latency = time.time() - t0
-                        
-                    elif op_type == 'insert_500':
-                        t0 = time.time()
-                        self.loader.insert_batch(500)
-                        latency = time.time() - t0
-                        
-                    elif op_type == 'insert_single':
-                        t0 = time.time()
-                        self.loader.insert_single_optimized()
-                        latency = time.time() - t0
-
-                    metrics['latencies'].append((op_type, latency))
-                    metrics['ops'] += 1
-                    
-                except Exception as e:
-                    metrics['errors'] += 1
-                    if metrics['errors'] <= 5:
-                        print(f"Error in workload ({op_type}): {e}")
+
+                args = self._op_args(op_type)
+                if self.recorder is not None:
+                    self.recorder.write(intended if intended is not None else time.perf_counter(), op_type, args)
+                self._timed_op(cursors, op_type, args, intended, metrics)
+
+            if intended is not None:
+                # Ran out of time while behind schedule: count the backlog
+                for offset in schedule:
+                    if offset >= duration:
+                        break
+                    metrics['missed'] += 1
                     
         finally:
-            cursor.close()
+            for cursor in set(cursors.values()):
+                cursor.close()
+            try:
+                self._set_autocommit(conn, False)
+            except Exception:
+                pass # connection lost; a reconnect starts with autocommit off
             conn.close()
             
         return metrics
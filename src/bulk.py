@@ -0,0 +1,142 @@
+import os
+import tempfile
+import numpy as np
+from src.config import Config
+from src.db import get_bulk_connection
+from src.generator import Generator
+
+# Secondary indexes that --defer-indexes drops before loading and rebuilds
+# afterwards. Must match schema.sql.
+SECONDARY_INDEXES = {
+    'operations': [
+        ('ix_created_at', 'KEY ix_created_at (created_at)'),
+        ('ix_type_path', 'KEY ix_type_path (type_path)'),
+    ],
+    'operation_prefixes': [
+        ('ix_prefix_created', 'KEY ix_prefix_created (prefix, created_at DESC, operation_id)'),
+    ],
+}
+
+LOAD_OPS_SQL = """
+    LOAD DATA LOCAL INFILE %s INTO TABLE operations
+    FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+    (id, type_path, created_at, status, payload_json)
+"""
+
+LOAD_PREFIXES_SQL = """
+    LOAD DATA LOCAL INFILE %s INTO TABLE operation_prefixes
+    FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+    (operation_id, prefix, created_at)
+"""
+
+
+def next_operation_id(cursor):
+    cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM operations")
+    return cursor.fetchone()[0]
+
+
+def _existing_indexes(cursor, table):
+    cursor.execute("""
+        SELECT DISTINCT index_name FROM information_schema.STATISTICS
+        WHERE table_schema = %s AND table_name = %s
+    """, (Config.DB_NAME, table))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def drop_secondary_indexes(cursor):
+    for table, indexes in SECONDARY_INDEXES.items():
+        existing = _existing_indexes(cursor, table)
+        drops = [f"DROP INDEX {name}" for name, _ in indexes if name in existing]
+        if drops:
+            cursor.execute(f"ALTER TABLE {table} {', '.join(drops)}")
+
+
+def create_secondary_indexes(cursor):
+    for table, indexes in SECONDARY_INDEXES.items():
+        existing = _existing_indexes(cursor, table)
+        adds = [f"ADD {ddl}" for name, ddl in indexes if name not in existing]
+        if adds:
+            # One ALTER per table so InnoDB sorts each index in a single pass
+            cursor.execute(f"ALTER TABLE {table} {', '.join(adds)}")
+
+
+class BulkLoader:
+    """Seeds through LOAD DATA LOCAL INFILE instead of multi-row INSERTs.
+
+    Operation IDs are assigned client-side from `first_id`, so prefix rows
+    are written alongside their operations without waiting for lastrowid.
+    Rows are staged as TSV in temp files and loaded every `chunk_rows`.
+    """
+
+    def __init__(self, first_id, seed=None, anchor=None, chunk_rows=100000):
+        self.gen = Generator(seed=seed, anchor=anchor)
+        self.next_id = first_id
+        self.chunk_rows = chunk_rows
+        self.conn = get_bulk_connection()
+        self._ops_file = None
+        self._pref_file = None
+        self._pending = 0
+
+    def _open_chunk(self):
+        self._ops_file = tempfile.NamedTemporaryFile('w', suffix='.ops.tsv', delete=False)
+        self._pref_file = tempfile.NamedTemporaryFile('w', suffix='.prefixes.tsv', delete=False)
+
+    def add_batch(self, batch_size, window=None, jitter_us=0):
+        # Returns rows loaded by this call (0 until a chunk is flushed)
+        if self._ops_file is None:
+            self._open_chunk()
+
+        batch = self.gen.generate_batch(batch_size, window=window, jitter_us=jitter_us)
+        ids = np.arange(self.next_id, self.next_id + len(batch), dtype=np.int64)
+        self.next_id += len(batch)
+
+        ts = np.datetime_as_string(batch.created_at, unit='us').tolist()
+        payload = batch.payload_json
+        self._ops_file.write("".join(
+            f"{i}\t{p}\t{t}\t{s}\t{payload}\n"
+            for i, p, t, s in zip(ids.tolist(), batch.type_paths(), ts, batch.status.tolist())
+        ))
+
+        pref_ids, prefixes, pref_created = batch.prefix_columns(ids)
+        pref_ts = np.datetime_as_string(pref_created, unit='us').tolist()
+        self._pref_file.write("".join(
+            f"{i}\t{p}\t{t}\n" for i, p, t in zip(pref_ids.tolist(), prefixes, pref_ts)
+        ))
+
+        self._pending += len(batch)
+        if self._pending >= self.chunk_rows:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        if self._ops_file is None:
+            return 0
+
+        paths = [self._ops_file.name, self._pref_file.name]
+        self._ops_file.close()
+        self._pref_file.close()
+        self._ops_file = self._pref_file = None
+        rows, self._pending = self._pending, 0
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(LOAD_OPS_SQL, (paths[0],))
+            cursor.execute(LOAD_PREFIXES_SQL, (paths[1],))
+            self.conn.commit()
+            return rows
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error loading chunk: {e}")
+            raise
+        finally:
+            cursor.close()
+            for path in paths:
+                os.unlink(path)
+
+    def close(self):
+        if self._ops_file is not None:
+            for f in (self._ops_file, self._pref_file):
+                f.close()
+                os.unlink(f.name)
+            self._ops_file = self._pref_file = None
+        self.conn.close()
@@ -0,0 +1,125 @@
+import sys
+import time
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from src.generator import Generator
+
+
+def _estimate_size(rows):
+    # Rough bytes for a list of (id, created_at, status, type_path) tuples
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + 32 + 48 + 28 + sys.getsizeof(row[3])
+    return size
+
+
+class LatestCache:
+    """In-process read-through cache for latest-N-by-prefix results.
+
+    Entries are keyed by (prefix, limit) and evicted LRU once their
+    estimated size passes `max_bytes`. Writes made through an attached
+    Loader are applied on commit to every ancestor prefix of the written
+    path: rows with a known id are merged into the cached top-N, rows
+    without one invalidate the entry. Writes from anywhere else are only
+    picked up when an entry expires, so `ttl` is the staleness bound.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict() # (prefix, limit) -> [rows, size, fetched_at]
+        self._limits = {}             # prefix -> set of cached limits
+        self._versions = {}           # prefix -> write counter, guards racing fills
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0,
+            'updates': 0, 'invalidations': 0,
+            'hit_time': 0.0, 'miss_time': 0.0,
+        }
+
+    def version(self, prefix):
+        return self._versions.get(prefix, 0)
+
+    def get(self, prefix, limit):
+        key = (prefix, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if time.time() - entry[2] > self.ttl:
+                self._drop(key)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def put(self, prefix, limit, rows, version):
+        # `version` is version(prefix) read before the query; a write that
+        # committed in between makes these rows stale, so skip them
+        rows = list(rows)
+        size = _estimate_size(rows)
+        key = (prefix, limit)
+        with self._lock:
+            if self._versions.get(prefix, 0) != version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = [rows, size, time.time()]
+            self._limits.setdefault(prefix, set()).add(limit)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def record_latency(self, hit, latency):
+        with self._lock:
+            self.stats['hit_time' if hit else 'miss_time'] += latency
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+        limits = self._limits.get(key[0])
+        if limits is not None:
+            limits.discard(key[1])
+            if not limits:
+                del self._limits[key[0]]
+
+    def on_write(self, rows):
+        # rows: (id or None, created_at, status, type_path), already committed
+        with self._lock:
+            for row in rows:
+                for prefix in Generator.expand_prefixes(row[3]):
+                    self._versions[prefix] = self._versions.get(prefix, 0) + 1
+                    for limit in list(self._limits.get(prefix, ())):
+                        self._apply(prefix, limit, row)
+
+    def _apply(self, prefix, limit, row):
+        key = (prefix, limit)
+        cached = self._entries[key][0]
+        if row[0] is None:
+            self._drop(key)
+            self.stats['invalidations'] += 1
+            return
+        if len(cached) >= limit and row[1] <= cached[-1][1]:
+            return # older than everything cached: not in the top N
+        # Cached rows are newest first; find the slot by created_at
+        pos = bisect_left([-r[1].timestamp() for r in cached], -row[1].timestamp())
+        cached.insert(pos, row)
+        del cached[limit:]
+        self.stats['updates'] += 1
+
+    def summary(self):
+        s = dict(self.stats)
+        lookups = s['hits'] + s['misses']
+        s['hit_rate'] = s['hits'] / lookups if lookups else 0.0
+        s['mean_hit_ms'] = s['hit_time'] / s['hits'] * 1000 if s['hits'] else 0.0
+        s['mean_miss_ms'] = s['miss_time'] / s['misses'] * 1000 if s['misses'] else 0.0
+        s['staleness_bound_s'] = self.ttl
+        s['entries'] = len(self._entries)
+        s['bytes'] = self._bytes
+        return s
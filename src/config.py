@@ -6,6 +6,17 @@ class Config:
     DB_USER = os.getenv("DB_USER", "root")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
     DB_NAME = os.getenv("DB_NAME", "ops_bench")
+    # sticky: per-thread connections (src/connections.py); pool: the
+    # MySQLConnectionPool with session reset, capped at 32
+    CONNECTIONS = os.getenv("CONNECTIONS", "sticky")
+    MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", "512"))
+    # Connections idle longer than this are pinged before reuse
+    IDLE_CHECK_SEC = float(os.getenv("IDLE_CHECK_SEC", "30"))
+    # Optional replica, polled for replication lag by the purge job
+    REPLICA_HOST = os.getenv("REPLICA_HOST", "")
+    REPLICA_PORT = int(os.getenv("REPLICA_PORT", "3306"))
+    # Shared secret between a coordinator and its agents (main.py agent)
+    AGENT_TOKEN = os.getenv("AGENT_TOKEN", "")
     
     # Workload config
     TOTAL_OPS = int(os.getenv("TOTAL_OPS", "10000000"))
@@ -0,0 +1,193 @@
+import time
+import weakref
+import threading
+from collections import deque
+import mysql.connector
+from src.config import Config
+
+
+class ManagedConnection:
+    """A raw connector connection owned by one thread. Behaves like the
+    connection itself; close() hands it back to its owner instead of
+    closing it."""
+
+    def __init__(self, manager, raw, owner):
+        self._manager = manager
+        self._raw = raw
+        self._owner = owner # deque this connection returns to
+        self._in_use = False
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._in_use:
+            self._manager._checkin(self)
+
+
+class ConnectionManager:
+    """Sticky per-thread connections, replacing MySQLConnectionPool.
+
+    Each thread keeps the connections it has used and gets them back on
+    its next checkout, without a shared lock or a COM_RESET_CONNECTION
+    round trip. A nested checkout simply gives the thread a second
+    connection. On return an open transaction is rolled back (counted as
+    a reset); nothing else is reset, so callers must not leave session
+    state behind. A connection idle for more than `idle_check` seconds is
+    pinged (reconnecting if needed) before it is handed out, so busy
+    connections never pay for health checks. When a thread exits, its
+    connections go to a shared idle list for new threads.
+
+    At most `max_connections` are open; a checkout beyond that waits for
+    another thread to exit or for close_all(), and the wait is reported.
+    """
+
+    def __init__(self, max_connections=512, idle_check=30.0):
+        self.max_connections = max_connections
+        self.idle_check = idle_check
+        self._local = threading.local()
+        self._idle = deque() # connections of exited threads
+        # Guards _idle and _open_count; notified when either frees up
+        self._cond = threading.Condition()
+        self._open_count = 0
+        self._all = weakref.WeakSet()
+        self._stats_lock = threading.Lock()
+        self.stats = {'checkouts': 0, 'opened': 0, 'reused': 0, 'resets': 0, 'health_checks': 0,
+                      'reconnects': 0, 'wait_time': 0.0, 'max_wait': 0.0, 'checkout_time': 0.0}
+
+    def _free(self):
+        # This thread's idle connections; handed to the shared list on exit
+        free = getattr(self._local, 'free', None)
+        if free is None:
+            holder = self._local.holder = _Holder()
+            free = self._local.free = holder.free
+            weakref.finalize(holder, self._retire, free)
+        return free
+
+    def _retire(self, free):
+        with self._cond:
+            while free:
+                mc = free.popleft()
+                if mc in self._all: # not closed by close_all()
+                    mc._owner = self._idle
+                    self._idle.append(mc)
+                    self._cond.notify()
+
+    def _acquire(self, owner):
+        # (an exited thread's connection, or None when a new one may be
+        # opened; seconds waited for either)
+        start = time.perf_counter()
+        with self._cond:
+            while True:
+                if self._idle:
+                    mc = self._idle.pop()
+                    mc._owner = owner
+                    return mc, time.perf_counter() - start
+                if self._open_count < self.max_connections:
+                    self._open_count += 1
+                    return None, time.perf_counter() - start
+                self._cond.wait()
+
+    def _open(self, owner):
+        # The caller holds one of the max_connections places (_acquire)
+        try:
+            raw = mysql.connector.connect(
+                host=Config.DB_HOST,
+                port=Config.DB_PORT,
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                database=Config.DB_NAME,
+                autocommit=False # Important for batching
+            )
+        except Exception:
+            with self._cond:
+                self._open_count -= 1
+                self._cond.notify()
+            raise
+        mc = ManagedConnection(self, raw, owner)
+        self._all.add(mc)
+        return mc
+
+    def checkout(self):
+        start = time.perf_counter()
+        free = self._free()
+        waited = 0.0
+        reused = False
+        try:
+            mc = free.pop()
+            reused = True
+        except IndexError:
+            mc, waited = self._acquire(free)
+            if mc is None:
+                mc = self._open(free)
+            else:
+                reused = True
+
+        checked = reconnected = False
+        if reused and time.monotonic() - mc.last_used > self.idle_check:
+            # Only connections that sat unused get a round trip
+            checked = True
+            if not mc._raw.is_connected():
+                mc._raw.reconnect(attempts=3, delay=0)
+                reconnected = True
+
+        mc._in_use = True
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            s = self.stats
+            s['checkouts'] += 1
+            s['opened' if not reused else 'reused'] += 1
+            s['health_checks'] += checked
+            s['reconnects'] += reconnected
+            s['wait_time'] += waited
+            s['max_wait'] = max(s['max_wait'], waited)
+            s['checkout_time'] += elapsed
+        return mc
+
+    def _checkin(self, mc):
+        mc._in_use = False
+        if mc not in self._all:
+            return
+        raw = mc._raw
+        if raw.in_transaction:
+            try:
+                raw.rollback()
+            except Exception:
+                pass
+            with self._stats_lock:
+                self.stats['resets'] += 1
+        mc.last_used = time.monotonic()
+        mc._owner.append(mc)
+
+    def close_all(self):
+        # Closes every connection, in use or not (end of a run)
+        with self._cond:
+            for mc in list(self._all):
+                try:
+                    mc._raw.close()
+                except Exception:
+                    pass
+                self._all.discard(mc)
+                self._open_count -= 1
+            self._idle.clear()
+            self._local = threading.local()
+            self._cond.notify_all()
+
+    def summary(self):
+        with self._stats_lock:
+            s = dict(self.stats)
+        checkouts = s['checkouts']
+        s['open'] = len(self._all)
+        s['mean_checkout_us'] = s['checkout_time'] / checkouts * 1e6 if checkouts else 0.0
+        s['mean_wait_ms'] = s['wait_time'] / s['opened'] * 1000 if s['opened'] else 0.0
+        # Returns that would each have cost a COM_RESET_CONNECTION with
+        # pool_reset_session=True
+        s['resets_avoided'] = checkouts - s['resets']
+        return s
+
+
+class _Holder:
+    # Lives in a thread's threading.local; collected when the thread exits
+    def __init__(self):
+        self.free = deque()
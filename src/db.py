@@ -1,8 +1,12 @@
+import threading
 import mysql.connector
 from mysql.connector import pooling
 from src.config import Config
+from src.connections import ConnectionManager
 
 _pool = None
+_manager = None
+_manager_lock = threading.Lock()
 
 def get_pool():
     global _pool
@@ -20,7 +24,102 @@ def get_pool():
         )
     return _pool
 
+def get_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager(Config.MAX_CONNECTIONS, Config.IDLE_CHECK_SEC)
+    return _manager
+
 def get_connection():
-    pool = get_pool()
-    return pool.get_connection()
+    # Same contract either way: close() when done. Sticky connections go
+    # back to the calling thread without a session reset.
+    if Config.CONNECTIONS == 'pool':
+        return get_pool().get_connection()
+    return get_manager().checkout()
+
+
+def get_bulk_connection():
+    # Dedicated (unpooled) connection with LOAD DATA LOCAL INFILE enabled
+    return mysql.connector.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME,
+        allow_local_infile=True,
+        autocommit=False
+    )
+
+
+def get_monitor_connection():
+    # Dedicated (unpooled) autocommit connection for polling server
+    # metrics, so every read sees current values
+    return mysql.connector.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME,
+        autocommit=True
+    )
+
+
+class DedicatedConnection:
+    """One unpooled connection for a component's short side transactions
+    (dictionary inserts, closure rows), used by one thread at a time:
+
+        with self._side as conn:
+            ...
+
+    They run while the caller's write transaction holds its own
+    connection, so taking a second pooled or sticky connection would
+    double the caller's share. Opened on first use and reconnected if the
+    server dropped it.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            if self._conn is None:
+                self._conn = mysql.connector.connect(
+                    host=Config.DB_HOST,
+                    port=Config.DB_PORT,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME,
+                    autocommit=False
+                )
+            elif not self._conn.is_connected():
+                self._conn.reconnect(attempts=3, delay=0)
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
 
+def get_replica_connection():
+    # Dedicated connection to Config.REPLICA_HOST, or None when unset
+    if not Config.REPLICA_HOST:
+        return None
+    return mysql.connector.connect(
+        host=Config.REPLICA_HOST,
+        port=Config.REPLICA_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        autocommit=True
+    )
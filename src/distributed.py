@@ -0,0 +1,175 @@
+# Coordinator/agent mode: one run spread over several processes or hosts,
+# so the client side isn't limited to what one Python process can send.
+#
+# One JSON object per line over a plain TCP connection:
+#   coordinator -> agent  {"cmd": "prepare", "token": "...", "config": {...run options...}}
+#   agent -> coordinator  {"status": "ready", "host": "..."}  (after warmup)
+#   coordinator -> agent  {"cmd": "start", "at": <epoch seconds>}
+#   agent -> coordinator  {"status": "done", "started": <epoch s>, "elapsed": s, "results": [...]}
+# An agent that fails sends {"status": "error", "error": "..."} instead.
+# Results are Workload metrics with the histograms in to_dict() form, so
+# the coordinator merges them exactly as it merges its own workers'.
+#
+# A prepare message makes the agent run DDL and writes against its
+# database, so agents listen on loopback unless told otherwise, and one
+# listening elsewhere refuses to start without a token. Nothing is
+# encrypted: keep agents on a trusted network.
+
+import hmac
+import json
+import time
+import socket
+import ipaddress
+from src.histogram import LatencyHistogram
+
+DEFAULT_PORT = 7070
+
+# Between the last agent reporting ready and the common start time: long
+# enough for the start message to reach every agent
+START_DELAY = 1.0
+
+
+def parse_address(value):
+    # 'host:port', ':port' or 'host' (default port)
+    host, sep, port = value.rpartition(':')
+    if not sep:
+        return value, DEFAULT_PORT
+    return host or '127.0.0.1', int(port)
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False # a host name: may resolve to anything
+
+
+def dump_metrics(metrics):
+    d = dict(metrics)
+    d['histograms'] = {op: hist.to_dict() for op, hist in metrics['histograms'].items()}
+    return d
+
+
+def load_metrics(d):
+    metrics = dict(d)
+    metrics['histograms'] = {op: LatencyHistogram.from_dict(h) for op, h in d['histograms'].items()}
+    return metrics
+
+
+class Channel:
+    """Line-delimited JSON messages over a connected socket."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._file = sock.makefile('rwb')
+
+    def send(self, msg):
+        self._file.write(json.dumps(msg).encode('utf-8') + b'\n')
+        self._file.flush()
+
+    def recv(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("connection closed by peer")
+        return json.loads(line)
+
+    def close(self):
+        try:
+            self._file.close()
+        finally:
+            self.sock.close()
+
+
+def serve(address, session, token='', once=False):
+    # Agent side: takes coordinators one at a time and hands each
+    # connection to session(channel, config) once its prepare message
+    # carries `token`. With `once`, exits after one run.
+    if not token and not is_loopback(address[0]):
+        raise ValueError(f"listening on {address[0]} needs a token (AGENT_TOKEN)")
+    listener = socket.create_server(address)
+    print(f"Agent listening on {address[0]}:{address[1]}")
+    try:
+        while True:
+            sock, peer = listener.accept()
+            channel = Channel(sock)
+            try:
+                msg = channel.recv()
+                if msg.get('cmd') != 'prepare':
+                    raise ValueError(f"expected prepare, got {msg.get('cmd')!r}")
+                if not hmac.compare_digest(str(msg.get('token', '')), token):
+                    raise PermissionError(f"bad token from {peer[0]}")
+                session(channel, msg['config'])
+            except Exception as e:
+                print(f"Agent run failed: {e}")
+                try:
+                    channel.send({'status': 'error', 'error': str(e)})
+                except OSError:
+                    pass
+            finally:
+                channel.close()
+            if once:
+                break
+    finally:
+        listener.close()
+
+
+class Coordinator:
+    """Drives one run on several agents.
+
+    run() has every agent build its workload and warm up, then sends all
+    of them the same wall-clock start time, so the measured windows line
+    up (to within the hosts' clock offset). Agents on other hosts need
+    synchronized clocks (NTP); on one host they share the clock.
+    """
+
+    def __init__(self, addresses, tokens=None, connect_timeout=10.0):
+        # tokens[i]: what agent i expects (its AGENT_TOKEN, '' if unset)
+        self.addresses = addresses
+        self.tokens = tokens or [''] * len(addresses)
+        self.connect_timeout = connect_timeout
+        self.channels = []
+
+    def connect(self):
+        # Retries until connect_timeout: agents started just now may not
+        # be listening yet
+        for address in self.addresses:
+            deadline = time.monotonic() + self.connect_timeout
+            while True:
+                try:
+                    sock = socket.create_connection(address, timeout=self.connect_timeout)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.2)
+            sock.settimeout(None) # warmup and run take as long as they take
+            self.channels.append(Channel(sock))
+
+    def _expect(self, index, status):
+        msg = self.channels[index].recv()
+        if msg.get('status') != status:
+            host, port = self.addresses[index]
+            raise RuntimeError(f"agent {host}:{port}: {msg.get('error', msg)}")
+        return msg
+
+    def run(self, configs):
+        # configs[i] goes to agent i; returns (start time, [done message
+        # with the agent's host name added])
+        for channel, token, config in zip(self.channels, self.tokens, configs):
+            channel.send({'cmd': 'prepare', 'token': token, 'config': config})
+        ready = [self._expect(i, 'ready') for i in range(len(self.channels))]
+        at = time.time() + START_DELAY
+        for channel in self.channels:
+            channel.send({'cmd': 'start', 'at': at})
+        done = [self._expect(i, 'done') for i in range(len(self.channels))]
+        for msg, hello in zip(done, ready):
+            msg['host'] = hello.get('host')
+            msg['results'] = [load_metrics(r) for r in msg['results']]
+        return at, done
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+        self.channels = []
@@ -1,15 +1,171 @@
 import random
 import numpy as np
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+
+class Timeline:
+    """Maps global batch numbers onto consecutive slices of the seed window.
+
+    Batch k covers [start + k * step, start + (k + 1) * step). Workers that
+    stride over batch numbers (k = i, i + C, ...) therefore advance through
+    time together, so inserts arrive roughly in created_at order.
+    """
+
+    def __init__(self, anchor, total_batches, days=30, jitter_sec=0.0):
+        self.end = np.datetime64(anchor, 'us')
+        self.start = self.end - np.timedelta64(days * 86400 * 10**6, 'us')
+        self.step = (self.end - self.start) // max(total_batches, 1)
+        self.jitter_us = int(jitter_sec * 1e6)
+
+    def window(self, batch_no):
+        start = self.start + batch_no * self.step
+        return start, start + self.step
+
+
+@lru_cache(maxsize=65536)
+def _cached_prefixes(type_path):
+    # Batches repeat the same heavy paths; expand each one once
+    return tuple(Generator.expand_prefixes(type_path))
+
+
+class OpBatch:
+    """Columnar batch of generated operations.
+
+    Rows reference `paths` through `path_idx`, so per-path work (string
+    building, prefix expansion) runs once per distinct path, not per row.
+    """
+
+    def __init__(self, paths, path_idx, created_at, status, payload_json="{}"):
+        self.paths = paths              # list of distinct type paths
+        self.path_idx = path_idx        # int32[n] index into paths
+        self.created_at = created_at    # datetime64[us][n]
+        self.status = status            # uint8[n]
+        self.payload_json = payload_json
+
+    def __len__(self):
+        return len(self.path_idx)
+
+    @staticmethod
+    def concat(batches):
+        # One batch holding the rows of `batches`, in order. Only the paths
+        # each batch actually uses are carried over.
+        paths = []
+        path_idx = []
+        for b in batches:
+            used, inverse = np.unique(b.path_idx, return_inverse=True)
+            path_idx.append(inverse.reshape(-1) + len(paths))
+            paths.extend(b.paths[i] for i in used.tolist())
+        return OpBatch(
+            paths,
+            np.concatenate(path_idx).astype(np.int32),
+            np.concatenate([b.created_at for b in batches]),
+            np.concatenate([b.status for b in batches]),
+            batches[0].payload_json,
+        )
+
+    def used_paths(self):
+        # Distinct paths some row of the batch has; `paths` may hold more
+        # (drawn but unused, or left over from a slice)
+        return [self.paths[i] for i in np.unique(self.path_idx).tolist()]
+
+    def type_paths(self):
+        paths = self.paths
+        return [paths[i] for i in self.path_idx.tolist()]
+
+    def created_at_list(self):
+        # datetime64[us] converts to datetime.datetime
+        return self.created_at.tolist()
+
+    def operation_params(self, first_id=None):
+        # Flattened (type_path, created_at, status, payload_json) per row,
+        # led by the row's id when `first_id` is given
+        n = len(self)
+        width = 4 if first_id is None else 5
+        flat = [self.payload_json] * (width * n)
+        if first_id is not None:
+            flat[0::5] = range(first_id, first_id + n)
+        start = width - 4
+        flat[start::width] = self.type_paths()
+        flat[start + 1::width] = self.created_at_list()
+        flat[start + 2::width] = self.status.tolist()
+        return flat
+
+    def row_prefixes(self):
+        # Expanded prefixes of each row, in row order
+        expanded = [_cached_prefixes(p) for p in self.paths]
+        return [expanded[i] for i in self.path_idx.tolist()]
+
+    def prefix_columns(self, op_ids):
+        # (operation_ids, prefixes, created_at) with one entry per expanded prefix
+        expanded = [_cached_prefixes(p) for p in self.paths]
+        depths = np.fromiter((len(e) for e in expanded), dtype=np.int64, count=len(expanded))
+        counts = depths[self.path_idx]
+        idx = self.path_idx.tolist()
+
+        ids = np.repeat(np.asarray(op_ids, dtype=np.int64), counts)
+        prefixes = list(chain.from_iterable(map(expanded.__getitem__, idx)))
+        created_at = np.repeat(self.created_at, counts)
+        return ids, prefixes, created_at
+
+    def prefix_params(self, op_ids):
+        # Flattened (operation_id, prefix, created_at) per expanded prefix
+        ids, prefixes, created_at = self.prefix_columns(op_ids)
+        flat = [None] * (3 * len(prefixes))
+        flat[0::3] = ids.tolist()
+        flat[1::3] = prefixes
+        flat[2::3] = created_at.tolist()
+        return flat
+
+    def rollup_rows(self):
+        # (prefix, hour_bucket, total, errors) per prefix and hour, sorted by
+        # the rollup primary key so concurrent upserts lock rows in order.
+        # Aggregates per (hour, path) in NumPy first, then fans out to prefixes.
+        n_paths = len(self.paths)
+        hours = self.created_at.astype('datetime64[h]').astype(np.int64)
+        uniq, inverse = np.unique(hours * n_paths + self.path_idx, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        totals = np.bincount(inverse)
+        errors = np.bincount(inverse, weights=self.status).astype(np.int64)
+
+        agg = {}
+        for key, total, errs in zip(uniq.tolist(), totals.tolist(), errors.tolist()):
+            hour, path_i = divmod(key, n_paths)
+            for prefix in _cached_prefixes(self.paths[path_i]):
+                t, e = agg.get((prefix, hour), (0, 0))
+                agg[(prefix, hour)] = (t + total, e + errs)
+
+        return [
+            (prefix, np.datetime64(hour, 'h').astype('datetime64[us]').item(), t, e)
+            for (prefix, hour), (t, e) in sorted(agg.items())
+        ]
+
+    def to_dicts(self):
+        return [
+            {"type_path": p, "created_at": c, "status": s, "payload_json": self.payload_json}
+            for p, c, s in zip(self.type_paths(), self.created_at_list(), self.status.tolist())
+        ]
+
 
 class Generator:
-    def __init__(self, heavy_prefixes_count=20):
+    def __init__(self, heavy_prefixes_count=20, seed=None, anchor=None, heavy_paths=None):
+        # seed + anchor make generate_batch bit-for-bit reproducible
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.anchor = anchor
+
         self.top_level = ['labs', 'pharmacy', 'billing', 'auth', 'etl', 'notifications', 'analytics']
         self.l2_labs = ['result_webhooks', 'orders', 'catalog_sync', 'providers']
         self.l3_vendors = ['quest', 'labcorp', 'bioreference', 'avalon']
         
-        # Pre-generate some heavy paths to skew traffic towards
-        self.heavy_paths = self._generate_heavy_paths(heavy_prefixes_count)
+        # Pre-generate some heavy paths to skew traffic towards (or reuse
+        # a recorded set, see fork and src/trace.py)
+        self.heavy_paths = list(heavy_paths) if heavy_paths else self._generate_heavy_paths(heavy_prefixes_count)
+
+    def fork(self, seed):
+        # Generator with the same heavy paths and anchor and its own seed:
+        # what a single traced insert regenerates its rows from
+        return Generator(seed=seed, anchor=self.anchor, heavy_paths=self.heavy_paths)
         
     def _generate_heavy_paths(self, count):
         paths = []
@@ -24,31 +180,31 @@ class Generator:
 
     def _random_path(self, max_depth=5):
         # Zipfian-like depth choice (simplified)
-        depth = np.random.zipf(2.0)  # Zipf param > 1
+        depth = self.rng.zipf(2.0)  # Zipf param > 1
         if depth > max_depth:
             depth = max_depth
             
         parts = []
         # Level 1
-        t1 = random.choice(self.top_level)
+        t1 = self.random.choice(self.top_level)
         parts.append(t1)
         
         if depth > 1:
             if t1 == 'labs':
-                t2 = random.choice(self.l2_labs)
+                t2 = self.random.choice(self.l2_labs)
             else:
-                t2 = f"sub_{random.randint(1, 10)}"
+                t2 = f"sub_{self.random.randint(1, 10)}"
             parts.append(t2)
             
         if depth > 2:
             if len(parts) == 2 and parts[0] == 'labs' and parts[1] == 'result_webhooks':
-                t3 = random.choice(self.l3_vendors)
+                t3 = self.random.choice(self.l3_vendors)
             else:
-                t3 = f"comp_{random.randint(1, 50)}"
+                t3 = f"comp_{self.random.randint(1, 50)}"
             parts.append(t3)
             
         while len(parts) < depth:
-            parts.append(f"node_{random.randint(1, 100)}")
+            parts.append(f"node_{self.random.randint(1, 100)}")
             
         return ".".join(parts)
 
@@ -59,19 +215,19 @@ class Generator:
         
         for _ in range(batch_size):
             # 60% chance of heavy path
-            if random.random() < 0.6:
-                type_path = random.choice(self.heavy_paths)
+            if self.random.random() < 0.6:
+                type_path = self.random.choice(self.heavy_paths)
             else:
                 type_path = self._random_path()
                 
             # Time generation
-            if random.random() < 0.2: # 20% recent burst
-                delta = timedelta(hours=random.uniform(0, 48))
+            if self.random.random() < 0.2: # 20% recent burst
+                delta = timedelta(hours=self.random.uniform(0, 48))
             else:
-                delta = timedelta(days=random.uniform(0, 30))
+                delta = timedelta(days=self.random.uniform(0, 30))
             created_at = now - delta
             
-            status = 1 if random.random() < error_rate else 0
+            status = 1 if self.random.random() < error_rate else 0
             payload = "{}" # Placeholder JSON
             
             ops.append({
@@ -82,6 +238,89 @@ class Generator:
             })
         return ops
 
+    def _random_paths(self, n, max_depth=5):
+        # Vectorized _random_path: draw every level as an integer column,
+        # then build strings only for the distinct combinations.
+        rng = self.rng
+        depth = np.minimum(rng.zipf(2.0, n), max_depth)
+        t1 = rng.integers(0, len(self.top_level), n)
+        is_labs = t1 == self.top_level.index('labs')
+        t2 = np.where(is_labs, rng.integers(0, len(self.l2_labs), n), rng.integers(1, 11, n))
+        is_webhooks = is_labs & (t2 == self.l2_labs.index('result_webhooks'))
+        t3 = np.where(is_webhooks, rng.integers(0, len(self.l3_vendors), n), rng.integers(1, 51, n))
+        t4 = rng.integers(1, 101, n)
+        t5 = rng.integers(1, 101, n)
+
+        # Levels beyond a row's depth don't exist; zero them so equal paths
+        # share one mixed-radix key.
+        t2 = np.where(depth > 1, t2, 0)
+        t3 = np.where(depth > 2, t3, 0)
+        t4 = np.where(depth > 3, t4, 0)
+        t5 = np.where(depth > 4, t5, 0)
+        key = ((((depth * 8 + t1) * 11 + t2) * 51 + t3) * 101 + t4) * 101 + t5
+        uniq, inverse = np.unique(key, return_inverse=True)
+
+        paths = []
+        for k in uniq.tolist():
+            k, c5 = divmod(k, 101)
+            k, c4 = divmod(k, 101)
+            k, c3 = divmod(k, 51)
+            k, c2 = divmod(k, 11)
+            d, c1 = divmod(k, 8)
+            l1 = self.top_level[c1]
+            parts = [l1]
+            if d > 1:
+                parts.append(self.l2_labs[c2] if l1 == 'labs' else f"sub_{c2}")
+            if d > 2:
+                if l1 == 'labs' and parts[1] == 'result_webhooks':
+                    parts.append(self.l3_vendors[c3])
+                else:
+                    parts.append(f"comp_{c3}")
+            if d > 3:
+                parts.append(f"node_{c4}")
+            if d > 4:
+                parts.append(f"node_{c5}")
+            paths.append(".".join(parts))
+        return paths, inverse.reshape(-1)
+
+    def generate_batch(self, batch_size, error_rate=0.05, window=None, jitter_us=0):
+        # Columnar equivalent of generate_batch_ops: same distributions,
+        # drawn for the whole batch at once. With a `window` (from Timeline)
+        # rows are emitted in increasing time order inside that slice,
+        # displaced by up to +/- jitter_us.
+        rng = self.rng
+        n = batch_size
+        anchor = self.anchor if self.anchor is not None else datetime.utcnow()
+        now = np.datetime64(anchor, 'us')
+
+        # 60% chance of heavy path
+        heavy = rng.random(n) < 0.6
+        heavy_idx = rng.integers(0, len(self.heavy_paths), n)
+        random_paths, random_idx = self._random_paths(n)
+        paths = self.heavy_paths + random_paths
+        path_idx = np.where(heavy, heavy_idx, random_idx + len(self.heavy_paths)).astype(np.int32)
+
+        if window is None:
+            # Time distribution: uniform over last 30 days, 20% burst in last 48h
+            burst = rng.random(n) < 0.2
+            delta_us = np.where(
+                burst,
+                rng.uniform(0, 48 * 3600e6, n),
+                rng.uniform(0, 30 * 86400e6, n),
+            ).astype(np.int64)
+            created_at = now - delta_us.astype('timedelta64[us]')
+        else:
+            start, end = window
+            width = max(int((end - start) / np.timedelta64(1, 'us')), 1)
+            offsets = np.sort(rng.integers(0, width, n))
+            if jitter_us:
+                offsets = offsets + rng.integers(-jitter_us, jitter_us + 1, n)
+            created_at = np.minimum(start + offsets.astype('timedelta64[us]'), now)
+
+        status = (rng.random(n) < error_rate).astype(np.uint8)
+
+        return OpBatch(paths, path_idx, created_at, status)
+
     @staticmethod
     def expand_prefixes(type_path):
         parts = type_path.split('.')
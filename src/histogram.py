@@ -0,0 +1,129 @@
+from collections import defaultdict
+import numpy as np
+
+
+class LatencyHistogram:
+    """Fixed-size, log-bucketed latency histogram (HdrHistogram layout).
+
+    Values are recorded in microseconds. Each power-of-two bucket is split
+    into enough linear sub-buckets to keep `significant_digits` of precision,
+    so memory never depends on how many values were recorded. Histograms
+    with the same settings can be merged.
+
+    Only buckets that were hit are stored (index -> count), so memory
+    follows the spread of the recorded latencies rather than the size of
+    the layout: 5 digits has 2M buckets, of which a run touches a few
+    thousand at most.
+    """
+
+    def __init__(self, significant_digits=3, max_value_us=3600 * 10**6):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.significant_digits = significant_digits
+        self.max_value_us = max_value_us
+
+        largest_single_unit = 2 * 10**significant_digits
+        self._half_mag = max(int(np.ceil(np.log2(largest_single_unit))) - 1, 0)
+        self._half = 1 << self._half_mag
+        self._sub_bucket_count = self._half << 1
+        self._sub_bucket_mask = self._sub_bucket_count - 1
+        self._unit_shift = self._half_mag + 1
+
+        buckets = 1
+        smallest_untrackable = self._sub_bucket_count
+        while smallest_untrackable <= max_value_us:
+            smallest_untrackable <<= 1
+            buckets += 1
+
+        self._size = (buckets + 1) * self._half
+        # Sparse: a dict slot increment is about as cheap as a list slot's
+        self.counts = defaultdict(int)
+        self.total = 0
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _highest_equivalent(self, index):
+        bucket = (index >> self._half_mag) - 1
+        sub = (index & (self._half - 1)) + self._half
+        if bucket < 0:
+            sub -= self._half
+            bucket = 0
+        return (sub << bucket) + (1 << bucket) - 1
+
+    def record(self, seconds):
+        value = int(seconds * 1e6)
+        if value < 0:
+            value = 0
+        elif value > self.max_value_us:
+            value = self.max_value_us
+        # counts index: power-of-two bucket, then linear sub-bucket within it
+        bucket = (value | self._sub_bucket_mask).bit_length() - self._unit_shift
+        self.counts[((bucket + 1) << self._half_mag) + (value >> bucket) - self._half] += 1
+        self.total += 1
+        self.sum_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def merge(self, other):
+        if other._size != self._size or other._half != self._half:
+            raise ValueError("Cannot merge histograms with different precision or range")
+        counts = self.counts
+        for i, c in list(other.counts.items()):
+            counts[i] += c
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def _arrays(self):
+        # (bucket indexes, counts) of the non-empty buckets, in index order
+        items = sorted((i, c) for i, c in list(self.counts.items()) if c)
+        indexes = np.array([i for i, _ in items], dtype=np.int64)
+        counts = np.array([c for _, c in items], dtype=np.int64)
+        return indexes, counts
+
+    def percentile(self, p):
+        # Value (s) at or below which p percent of recorded values fall
+        if self.total == 0:
+            return 0.0
+        indexes, counts = self._arrays()
+        target = max(int(np.ceil(p / 100.0 * self.total)), 1)
+        pos = min(int(np.searchsorted(np.cumsum(counts), target)), len(indexes) - 1)
+        return min(self._highest_equivalent(int(indexes[pos])), self.max_us) / 1e6
+
+    def max(self):
+        return self.max_us / 1e6
+
+    def mean(self):
+        return self.sum_us / self.total / 1e6 if self.total else 0.0
+
+    def to_dict(self):
+        # JSON-safe form for sending to another process; counts as
+        # (index, count) pairs
+        return {
+            'significant_digits': self.significant_digits,
+            'max_value_us': self.max_value_us,
+            'counts': [[i, c] for i, c in sorted(self.counts.items()) if c],
+            'total': self.total,
+            'sum_us': self.sum_us,
+            'max_us': self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        hist = cls(d['significant_digits'], d['max_value_us'])
+        for i, c in d['counts']:
+            hist.counts[i] = c
+        hist.total = d['total']
+        hist.sum_us = d['sum_us']
+        hist.max_us = d['max_us']
+        return hist
+
+    def resampled_percentiles(self, p, rounds, rng):
+        # Percentile p (s) of `rounds` bootstrap resamples of the recorded
+        # values, all drawn at once over the non-empty buckets only
+        indexes, counts = self._arrays()
+        draws = rng.multinomial(self.total, counts / self.total, size=rounds)
+        target = max(int(np.ceil(p / 100.0 * self.total)), 1)
+        positions = (np.cumsum(draws, axis=1) < target).sum(axis=1)
+        return np.array([min(self._highest_equivalent(int(indexes[i])), self.max_us) / 1e6 for i in positions])
@@ -0,0 +1,79 @@
+import threading
+from src.db import get_connection
+
+# Brings the sequence row up to MAX(id) + 1, so blocks never overlap ids
+# written earlier through AUTO_INCREMENT or LOAD DATA
+SYNC_SEQUENCE_SQL = """
+    INSERT INTO id_sequences (name, next_id)
+    SELECT * FROM (SELECT %s AS name, COALESCE(MAX(id), 0) + 1 AS next_id FROM operations) AS new
+    ON DUPLICATE KEY UPDATE next_id = GREATEST(id_sequences.next_id, new.next_id)
+"""
+
+# LAST_INSERT_ID(expr) makes the bumped value readable on this connection
+# without a second locking read
+RESERVE_SQL = """
+    UPDATE id_sequences SET next_id = LAST_INSERT_ID(next_id + %s) WHERE name = %s
+"""
+
+
+class IdAllocator:
+    """Hands out operation ids from blocks reserved in `id_sequences`.
+
+    Each thread reserves its own block of `block_size` ids in a short
+    transaction of its own (one row lock, committed at once), then assigns
+    ids from it locally. Rows of both tables can therefore be built before
+    anything is sent, and the operations INSERT no longer needs contiguous
+    AUTO_INCREMENT values, so it is safe under innodb_autoinc_lock_mode=2.
+    Ids left in a block when a worker exits are skipped: expect gaps.
+
+    Every writer of `operations` must use an allocator while one is in use;
+    an AUTO_INCREMENT insert could take an id inside someone's block.
+    """
+
+    def __init__(self, block_size=1000, name='operations'):
+        self.block_size = block_size
+        self.name = name
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._synced = False
+        self.blocks = 0
+
+    def _sync(self, cursor):
+        with self._lock:
+            if not self._synced:
+                cursor.execute(SYNC_SEQUENCE_SQL, (self.name,))
+                self._synced = True
+
+    def reserve(self, n):
+        # Reserves n consecutive ids; returns the first
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            self._sync(cursor)
+            cursor.execute(RESERVE_SQL, (n, self.name))
+            if cursor.rowcount != 1:
+                raise Exception(f"No id_sequences row for '{self.name}' (run `make init-sp`)")
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            self.blocks += 1
+        return end - n
+
+    def allocate(self, n):
+        # First of n consecutive ids, from this thread's current block. A
+        # request the block can't fit starts a new one (the rest is skipped).
+        local = self._local
+        if getattr(local, 'end', 0) - getattr(local, 'next', 0) < n:
+            size = max(n, self.block_size)
+            local.next = self.reserve(size)
+            local.end = local.next + size
+        first = local.next
+        local.next += n
+        return first
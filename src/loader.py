@@ -1,32 +1,65 @@
 import time
 import json
+import numpy as np
 from src.db import get_connection
 from src.generator import Generator
+from src.rollup import upsert_rollup
+from src.ids import IdAllocator
+from src.strategies import make_strategies
 
 class Loader:
-    def __init__(self):
-        self.gen = Generator()
+    def __init__(self, seed=None, anchor=None, rollup=False, id_block=0, strategy='side_table', heavy_paths=None):
+        self.gen = Generator(seed=seed, anchor=anchor, heavy_paths=heavy_paths)
+        # Also maintain operation_prefix_rollup on every write
+        self.rollup = rollup
+        # id_block > 0: assign operation ids client-side from blocks of this
+        # size (id_sequences) instead of AUTO_INCREMENT
+        self.ids = IdAllocator(id_block) if id_block else None
+        # Prefix-lookup strategies write_batch maintains ('a,b,...', see
+        # src/strategies); the first one serves reads
+        self.strategies = make_strategies(strategy)
+        self._prefix_rows = any(s.PREFIX_ROWS for s in self.strategies)
+        # False when a strategy needs rows the stored procedures don't write:
+        # the procedure write paths then go through write_batch instead
+        self.uses_procedures = all(s.PROCEDURE_WRITES for s in self.strategies)
+        # Called after each commit with (id or None, created_at, status, type_path) rows
+        self.write_listeners = []
 
-    def insert_single_optimized(self):
+    def _notify(self, rows):
+        for listener in self.write_listeners:
+            listener(rows)
+
+    def insert_single_optimized(self, rollup=None, gen=None):
+        # `gen`: generate from this Generator instead (e.g. a traced op's fork)
+        rollup = self.rollup if rollup is None else rollup
+        if not self.uses_procedures:
+            self.insert_batch(1, rollup=rollup, gen=gen)
+            return 1
         conn = get_connection()
         cursor = conn.cursor()
         
         # Generate 1 op
-        ops = self.gen.generate_batch_ops(1)
+        ops = (gen or self.gen).generate_batch_ops(1)
         op = ops[0]
         prefixes = self.gen.expand_prefixes(op['type_path'])
         prefixes_json = json.dumps(prefixes)
+        op_id = self.ids.allocate(1) if self.ids else None
         
         try:
-            # Use Stored Procedure
-            cursor.callproc('insert_operation_with_prefixes', [
+            # Use Stored Procedure (NULL id: AUTO_INCREMENT)
+            proc = 'insert_operation_with_prefixes_rollup' if rollup else 'insert_operation_with_prefixes'
+            cursor.callproc(proc, [
                 op['type_path'],
                 op['created_at'],
                 op['status'],
                 op['payload_json'],
-                prefixes_json
+                prefixes_json,
+                op_id
             ])
             conn.commit()
+            if self.write_listeners:
+                # Without an allocator the procedure doesn't return the new id
+                self._notify([(op_id, op['created_at'], op['status'], op['type_path'])])
             return 1
         except Exception as e:
             conn.rollback()
@@ -36,26 +69,36 @@ class Loader:
             cursor.close()
             conn.close()
 
-    def insert_batch(self, batch_size=1000):
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        ops = self.gen.generate_batch_ops(batch_size)
-        
-        # 1. Bulk insert operations
-        # Construct INSERT INTO ... VALUES (...), (...), ...
-        placeholders = "(%s, %s, %s, %s)"
-        sql_ops = f"""
-            INSERT INTO operations (type_path, created_at, status, payload_json)
-            VALUES {', '.join([placeholders] * len(ops))}
-        """
-        
-        # Flatten params
-        val_ops = []
-        for op in ops:
-            val_ops.extend([op['type_path'], op['created_at'], op['status'], op['payload_json']])
+    def write_batch(self, cursor, batch, rollup=None):
+        # Writes an OpBatch to operations, each strategy's rows (and the
+        # rollup) on the caller's cursor without committing.
+        # Returns (first_id, row_count, pref_count).
+        rollup = self.rollup if rollup is None else rollup
+
+        if self.ids is not None:
+            # Ids reserved client-side: both tables' rows are built before
+            # anything is sent, and nothing relies on contiguous AUTO_INCREMENT
+            first_id = self.ids.allocate(len(batch))
+            val_ops = batch.operation_params(first_id)
+            val_pref_flat = batch.prefix_params(range(first_id, first_id + len(batch))) if self._prefix_rows else []
+            sql_ops = f"""
+                INSERT INTO operations (id, type_path, created_at, status, payload_json)
+                VALUES {', '.join(["(%s, %s, %s, %s, %s)"] * len(batch))}
+            """
+            cursor.execute(sql_ops, val_ops)
+            row_count = cursor.rowcount
+        else:
+            # 1. Bulk insert operations
+            # Construct INSERT INTO ... VALUES (...), (...), ...
+            placeholders = "(%s, %s, %s, %s)"
+            sql_ops = f"""
+                INSERT INTO operations (type_path, created_at, status, payload_json)
+                VALUES {', '.join([placeholders] * len(batch))}
+            """
+            
+            # Flatten params straight from the columns
+            val_ops = batch.operation_params()
             
-        try:
             cursor.execute(sql_ops, val_ops)
             first_id = cursor.lastrowid
             row_count = cursor.rowcount
@@ -64,27 +107,36 @@ class Loader:
                 # Should not happen with auto_increment and single INSERT
                 raise Exception("Failed to retrieve lastrowid")
 
-            # 2. Bulk insert prefixes
-            val_pref_flat = []
-            placeholders_pref = []
-            
-            for i, op in enumerate(ops):
-                op_id = first_id + i
-                prefixes = self.gen.expand_prefixes(op['type_path'])
-                for p in prefixes:
-                    placeholders_pref.append("(%s, %s, %s)")
-                    val_pref_flat.extend([op_id, p, op['created_at']])
+            val_pref_flat = batch.prefix_params(range(first_id, first_id + len(batch))) if self._prefix_rows else []
+
+        # 2. Prefix lookup structures (side table rows by default)
+        pref_count = 0
+        for strategy in self.strategies:
+            pref_count += strategy.write(cursor, batch, first_id, val_pref_flat)
+
+        # 3. Optional rollup counters, same transaction
+        if rollup:
+            upsert_rollup(cursor, batch.rollup_rows())
+
+        return first_id, row_count, pref_count
+
+    def notify_written(self, batch, first_id):
+        # Tell write listeners about a committed batch
+        if self.write_listeners:
+            self._notify(list(zip(range(first_id, first_id + len(batch)), batch.created_at_list(),
+                                  batch.status.tolist(), batch.type_paths())))
+
+    def insert_batch(self, batch_size=1000, window=None, jitter_us=0, rollup=None, gen=None):
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        batch = (gen or self.gen).generate_batch(batch_size, window=window, jitter_us=jitter_us)
             
-            if val_pref_flat:
-                sql_pref = f"""
-                    INSERT INTO operation_prefixes (operation_id, prefix, created_at)
-                    VALUES {', '.join(placeholders_pref)}
-                """
-                cursor.execute(sql_pref, val_pref_flat)
-                
+        try:
+            first_id, row_count, pref_count = self.write_batch(cursor, batch, rollup)
             conn.commit()
-            
-            return row_count, len(placeholders_pref)
+            self.notify_written(batch, first_id)
+            return row_count, pref_count
             
         except Exception as e:
             conn.rollback()
@@ -94,6 +146,39 @@ class Loader:
             cursor.close()
             conn.close()
 
+    def insert_batch_sp(self, batch_size=100, gen=None):
+        # Whole batch in one CALL to insert_operations_batch (JSON array)
+        if not self.uses_procedures:
+            return self.insert_batch(batch_size, gen=gen)[0]
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        batch = (gen or self.gen).generate_batch(batch_size)
+        created_at = [t.replace('T', ' ') for t in np.datetime_as_string(batch.created_at, unit='us').tolist()]
+        ops_json = json.dumps([
+            {"type_path": p, "created_at": c, "status": s, "payload": {}, "prefixes": list(pre)}
+            for p, c, s, pre in zip(batch.type_paths(), created_at, batch.status.tolist(), batch.row_prefixes())
+        ])
+
+        first_id = self.ids.allocate(len(batch)) if self.ids else None
+
+        try:
+            cursor.callproc('insert_operations_batch', [ops_json, first_id])
+            conn.commit()
+            if self.write_listeners:
+                # Without an allocator the procedure doesn't return the new ids
+                ids = range(first_id, first_id + len(batch)) if first_id else [None] * len(batch)
+                self._notify([(i, c, s, p) for i, p, c, s in
+                              zip(ids, batch.type_paths(), batch.created_at_list(), batch.status.tolist())])
+            return len(batch)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error inserting batch via procedure: {e}")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
     def run_load(self, total_ops, batch_size, workers=1):
         # This would be called by the main loop
         pass
@@ -0,0 +1,208 @@
+# Optional daily RANGE COLUMNS(created_at) partitioning of operations and
+# operation_prefixes. Expired days go with DROP PARTITION (a metadata
+# change plus removing the partition's tablespace files) instead of
+# DELETEs through every index of both tables.
+
+import time
+import datetime
+from src.config import Config
+from src.db import get_connection
+from src.actors import BackgroundActor
+
+PARTITIONED_TABLES = ('operation_prefixes', 'operations')
+
+# Every unique key of a partitioned table must contain the partitioning
+# column. created_at is copied into operation_prefixes on every write, so
+# uniqueness is unchanged and the side table can join on the full key.
+PRIMARY_KEYS = {
+    'operations': '(id, created_at)',
+    'operation_prefixes': '(operation_id, prefix, created_at)',
+}
+
+# Catch-all past the newest day. New days are split off it with
+# REORGANIZE PARTITION, which only copies the rows it holds (normally none).
+FUTURE_PARTITION = 'pfuture'
+
+# The generator spreads created_at over the 30 days before its anchor
+WINDOW_DAYS = 30
+
+# MySQL error: Lock wait timeout exceeded
+ER_LOCK_WAIT_TIMEOUT = 1205
+
+
+def partition_name(day):
+    # Named after the day it holds: rows with created_at < day + 1
+    return day.strftime('p%Y%m%d')
+
+
+def table_partitions(cursor, table):
+    # [(name, upper bound date or None for MAXVALUE, approx rows)], oldest
+    # first; empty when the table isn't partitioned
+    cursor.execute("""
+        SELECT partition_name, partition_description, table_rows
+        FROM information_schema.PARTITIONS
+        WHERE table_schema = %s AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    """, (Config.DB_NAME, table))
+    parts = []
+    for name, bound, rows in cursor.fetchall():
+        # RANGE COLUMNS bounds read back as "'2025-01-02 00:00:00'"
+        upper = None if bound == 'MAXVALUE' else datetime.date.fromisoformat(bound.strip("'")[:10])
+        parts.append((name, upper, rows))
+    return parts
+
+
+def _definitions(days):
+    return [f"PARTITION {partition_name(day)} VALUES LESS THAN ('{day + datetime.timedelta(days=1)}')"
+            for day in days]
+
+
+def _days(first, last):
+    return [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+class PartitionManager:
+    """Creates and maintains one partition per day on both tables.
+
+    create() converts unpartitioned tables (instant when empty, a full
+    rebuild otherwise). maintain() keeps `future_days` partitions ahead of
+    today and drops every partition whose rows are all older than
+    `retention_days`. Both tables always get the same boundaries, so a
+    dropped day removes an operation and its prefix rows together.
+    """
+
+    def __init__(self, retention_days=30, future_days=3):
+        self.retention_days = retention_days
+        self.future_days = future_days
+
+    def is_partitioned(self, cursor):
+        return all(table_partitions(cursor, table) for table in PARTITIONED_TABLES)
+
+    def create(self, cursor, first_day, today=None):
+        # Day partitions first_day .. today + future_days; the first one
+        # also holds anything older
+        today = today or datetime.date.today()
+        days = _days(first_day, today + datetime.timedelta(days=self.future_days))
+        defs = _definitions(days) + [f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)"]
+        created = []
+        for table in PARTITIONED_TABLES:
+            if table_partitions(cursor, table):
+                continue
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                DROP PRIMARY KEY, ADD PRIMARY KEY {PRIMARY_KEYS[table]}
+                PARTITION BY RANGE COLUMNS(created_at) ({', '.join(defs)})
+            """)
+            created.append(table)
+        return created
+
+    def add_future(self, cursor, today=None):
+        # Splits new days off the catch-all; returns the partitions added
+        last_day = (today or datetime.date.today()) + datetime.timedelta(days=self.future_days)
+        added = []
+        for table in PARTITIONED_TABLES:
+            bounds = [upper for _, upper, _ in table_partitions(cursor, table) if upper is not None]
+            if not bounds or bounds[-1] > last_day:
+                continue
+            days = _days(bounds[-1], last_day)
+            defs = _definitions(days) + [f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)"]
+            cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(defs)})")
+            added = [partition_name(day) for day in days]
+        return added
+
+    def expired(self, cursor, today=None):
+        # Day partitions holding only rows older than the retention window,
+        # oldest first. A name still in either table counts, so a drop that
+        # failed after the side table is finished on the next call.
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=self.retention_days)
+        names = set()
+        for table in PARTITIONED_TABLES:
+            names.update(name for name, upper, _ in table_partitions(cursor, table)
+                         if upper is not None and upper <= cutoff)
+        return sorted(names) # p<YYYYMMDD>: name order is day order
+
+    def drop(self, cursor, names):
+        # Side table first, so no read ever joins prefix rows to dropped
+        # operations. Each ALTER waits for running transactions on its
+        # table (metadata lock) and blocks new ones until it's done.
+        for table in PARTITIONED_TABLES:
+            present = {name for name, _, _ in table_partitions(cursor, table)}
+            found = [name for name in names if name in present]
+            if found:
+                cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(found)}")
+
+    def maintain(self, conn, today=None):
+        # Returns (partitions added, partitions dropped)
+        cursor = conn.cursor()
+        try:
+            added = self.add_future(cursor, today)
+            dropped = self.expired(cursor, today)
+            self.drop(cursor, dropped)
+        finally:
+            cursor.close()
+        return added, dropped
+
+
+def explain_partitions(cursor, sql, params):
+    # (table, partitions read, access type, key) per table of the plan
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [d[0] for d in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [(r['table'], r['partitions'], r['type'], r['key']) for r in rows]
+
+
+class PartitionDropper(BackgroundActor):
+    """Retention actor for a benchmark run: every `interval` seconds drops
+    the oldest expired day from both tables.
+
+    A drop that waits more than `lock_wait_timeout` seconds for the
+    metadata lock fails and is retried on the next tick: while it waits,
+    every new transaction on the table queues behind it, so a long wait
+    would stall the whole mix."""
+
+    tag = 'drop'
+
+    def __init__(self, manager, interval=5.0, lock_wait_timeout=5):
+        super().__init__()
+        self.manager = manager
+        self.interval = interval
+        self.lock_wait_timeout = lock_wait_timeout
+        self.drops = [] # (partition, seconds)
+        self.timeouts = 0
+
+    def run(self):
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SET SESSION lock_wait_timeout = %s", (self.lock_wait_timeout,))
+            while not self._stop_event.wait(self.interval):
+                expired = self.manager.expired(cursor)
+                conn.commit() # no snapshot held between ticks
+                if not expired:
+                    continue
+                self._begin()
+                start = time.perf_counter()
+                try:
+                    self.manager.drop(cursor, expired[:1])
+                    self.drops.append((expired[0], time.perf_counter() - start))
+                except Exception as e:
+                    if getattr(e, 'errno', None) == ER_LOCK_WAIT_TIMEOUT:
+                        self.timeouts += 1
+                    print(f"Partition drop error ({expired[0]}): {e}")
+                finally:
+                    self._end()
+        finally:
+            # Sticky connections keep their session
+            cursor.execute("SET SESSION lock_wait_timeout = DEFAULT")
+            cursor.close()
+            conn.close()
+
+    def summary(self):
+        times = [sec for _, sec in self.drops]
+        return {
+            'drops': len(times),
+            'partitions': [name for name, _ in self.drops],
+            'mean_drop_ms': sum(times) / len(times) * 1000 if times else 0.0,
+            'max_drop_ms': max(times) * 1000 if times else 0.0,
+            'timeouts': self.timeouts,
+        }
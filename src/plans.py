@@ -0,0 +1,232 @@
+# Query plan capture: every read shape of the workload at every prefix
+# depth, EXPLAIN FORMAT=JSON reduced to what matters for a regression
+# (per table: access type, index, key parts used, index-only or not,
+# estimated rows; plus filesort / temporary table), and the rows the
+# query really examined. Saved as JSON and diffed against a baseline.
+
+import json
+import datetime
+from src.config import Config
+from src.benchmark import SQL_EXACT_TYPE_PATH, SQL_COUNT_24H_ROLLUP, SQL_ERROR_RATE_ROLLUP, SEEK_START
+from src.results import git_revision
+
+PLANS_VERSION = 1
+
+LEVELS = (1, 2, 3, 4)
+
+# Offset of the latest_offset shape: deep enough that the plan has to
+# skip rows (Mix C draws 0..5000)
+DEEP_OFFSET = 5000
+
+# Counters of rows read through the storage engine, summed as "rows examined"
+HANDLER_READS = ('Handler_read_first', 'Handler_read_key', 'Handler_read_last', 'Handler_read_next',
+                 'Handler_read_prev', 'Handler_read_rnd', 'Handler_read_rnd_next')
+
+
+def sample_path(cursor):
+    # A deep type_path from the data: the oldest one with at least four
+    # levels, so the same data gives the same path
+    cursor.execute("SELECT type_path FROM operations WHERE type_path LIKE '%.%.%.%' ORDER BY id LIMIT 1")
+    row = cursor.fetchone()
+    return row[0] if row else 'labs.result_webhooks.quest.alpha'
+
+
+def _table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE table_schema = %s AND table_name = %s
+    """, (Config.DB_NAME, table))
+    return cursor.fetchone()[0] > 0
+
+
+def query_shapes(cursor, strategies, path):
+    # [(key, sql, params)] for every read shape the mixes send
+    parts = path.split('.')
+    prefixes = [(level, '.'.join(parts[:level])) for level in LEVELS if level <= len(parts)]
+    shapes = [('operations/exact', SQL_EXACT_TYPE_PATH, (path, 100))]
+    for strategy in strategies:
+        for level, prefix in prefixes:
+            name = f"{strategy.name}/%s/L{level}"
+            shapes += [
+                (name % 'latest', *strategy.latest(prefix, 100, 0)),
+                (name % 'latest_offset', *strategy.latest(prefix, 100, DEEP_OFFSET)),
+                (name % 'seek', *strategy.seek(prefix, SEEK_START[0], SEEK_START[1], 100)),
+                (name % 'count_24h', *strategy.count_24h(prefix)),
+                (name % 'error_rate', *strategy.error_rate(prefix)),
+            ]
+    if _table_exists(cursor, 'operation_prefix_rollup'):
+        for level, prefix in prefixes:
+            shapes += [
+                (f"rollup/count_24h/L{level}", SQL_COUNT_24H_ROLLUP, (prefix,)),
+                (f"rollup/error_rate/L{level}", SQL_ERROR_RATE_ROLLUP, (prefix,)),
+            ]
+    return shapes
+
+
+def normalize(plan):
+    """EXPLAIN FORMAT=JSON document -> {'tables': [...], 'filesort',
+    'temporary', 'cost'}. Tables in plan order, each with only the fields
+    that don't depend on the literal values searched for."""
+    tables = []
+    flags = {'filesort': False, 'temporary': False}
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('using_filesort'):
+                flags['filesort'] = True
+            if node.get('using_temporary_table'):
+                flags['temporary'] = True
+            table = node.get('table')
+            if isinstance(table, dict) and 'table_name' in table:
+                tables.append({
+                    'table': table['table_name'],
+                    'access': table.get('access_type'),
+                    'key': table.get('key'),
+                    'key_parts': table.get('used_key_parts', []),
+                    'covering': bool(table.get('using_index')),
+                    'rows': table.get('rows_examined_per_scan'),
+                    'partitions': len(table.get('partitions', [])),
+                })
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    cost = plan.get('query_block', {}).get('cost_info', {}).get('query_cost')
+    return {'tables': tables, 'cost': float(cost) if cost is not None else None, **flags}
+
+
+def _handler_reads(cursor):
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return sum(int(value) for name, value in cursor.fetchall() if name in HANDLER_READS)
+
+
+def _examine(cursor, sql, params, analyze):
+    # Runs the query once (inside EXPLAIN ANALYZE when asked) and returns
+    # (rows examined, EXPLAIN ANALYZE tree or None). The status query's
+    # own handler reads are measured first and subtracted.
+    first = _handler_reads(cursor)
+    before = _handler_reads(cursor)
+    overhead = before - first
+    tree = None
+    if analyze:
+        cursor.execute("EXPLAIN ANALYZE " + sql, params)
+        tree = cursor.fetchall()[0][0]
+    else:
+        cursor.execute(sql, params)
+        cursor.fetchall()
+    return max(_handler_reads(cursor) - before - overhead, 0), tree
+
+
+def capture(conn, strategies, path, analyze=True):
+    """Plans for every shape of query_shapes(). A shape that fails (e.g. a
+    strategy whose tables were never built) is kept with its error."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT VERSION()")
+        version = cursor.fetchone()[0]
+        queries = {}
+        for key, sql, params in query_shapes(cursor, strategies, path):
+            entry = {'sql': ' '.join(sql.split()), 'params': [str(p) for p in params]}
+            try:
+                cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+                entry['plan'] = normalize(json.loads(cursor.fetchall()[0][0]))
+                entry['rows_examined'], entry['analyze'] = _examine(cursor, sql, params, analyze)
+            except Exception as e:
+                entry['error'] = str(e)
+            conn.rollback() # no snapshot carried from one shape to the next
+            queries[key] = entry
+    finally:
+        cursor.close()
+    revision, dirty = git_revision()
+    return {
+        'plans': PLANS_VERSION,
+        'captured_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git': {'revision': revision, 'dirty': dirty},
+        'server_version': version,
+        'path': path,
+        'strategies': [s.name for s in strategies],
+        'queries': queries,
+    }
+
+
+def write_plans(path, doc):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=1)
+
+
+def load_plans(path):
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    if doc.get('plans') != PLANS_VERSION:
+        raise ValueError(f"{path} is not a version {PLANS_VERSION} plan capture")
+    return doc
+
+
+def describe(entry):
+    # One line: tables in join order with access, index and rows examined
+    if 'error' in entry:
+        return f"error: {entry['error']}"
+    plan = entry['plan']
+    steps = []
+    for t in plan['tables']:
+        step = f"{t['table']} {t['access']} {t['key'] or '-'}"
+        if t['covering']:
+            step += ' (index-only)'
+        steps.append(step)
+    extra = [flag for flag in ('filesort', 'temporary') if plan[flag]]
+    return (f"{' -> '.join(steps)}{'; ' + ', '.join(extra) if extra else ''}; "
+            f"{entry['rows_examined']} rows examined")
+
+
+def _signature(t):
+    covering = ' index-only' if t['covering'] else ''
+    key = f"{t['key']}({','.join(t['key_parts'])})" if t['key'] else 'no index'
+    return f"{t['table']} {t['access']} {key}{covering}"
+
+
+def diff(baseline, current, rows_factor=2.0, min_rows=1000):
+    """[(key, severity, message)] with severity 'regression' (index or
+    access change, new filesort / temporary table, rows examined up more
+    than rows_factor times and by at least min_rows, or a query that now
+    fails) or 'change' (anything else that moved)."""
+    changes = []
+    base_q, cur_q = baseline['queries'], current['queries']
+    for key in sorted(set(base_q) | set(cur_q)):
+        b, c = base_q.get(key), cur_q.get(key)
+        if b is None:
+            changes.append((key, 'change', 'not in the baseline'))
+            continue
+        if c is None:
+            changes.append((key, 'change', 'not captured this time'))
+            continue
+        if 'error' in c or 'error' in b:
+            if 'error' in c and 'error' not in b:
+                changes.append((key, 'regression', f"now fails: {c['error']}"))
+            elif 'error' in b and 'error' not in c:
+                changes.append((key, 'change', 'failed in the baseline, works now'))
+            continue
+
+        bt, ct = b['plan']['tables'], c['plan']['tables']
+        if [t['table'] for t in bt] != [t['table'] for t in ct]:
+            changes.append((key, 'regression', f"join order / tables changed: {describe(b)} => {describe(c)}"))
+        else:
+            for old, new in zip(bt, ct):
+                if _signature(old) != _signature(new):
+                    changes.append((key, 'regression', f"{_signature(old)} => {_signature(new)}"))
+        for flag, label in (('filesort', 'filesort'), ('temporary', 'temporary table')):
+            if c['plan'][flag] and not b['plan'][flag]:
+                changes.append((key, 'regression', f"now uses a {label}"))
+            elif b['plan'][flag] and not c['plan'][flag]:
+                changes.append((key, 'change', f"no longer uses a {label}"))
+
+        old_rows, new_rows = b['rows_examined'], c['rows_examined']
+        if new_rows > old_rows * rows_factor and new_rows - old_rows >= min_rows:
+            ratio = f"{new_rows / old_rows:.1f}x" if old_rows else 'from 0'
+            changes.append((key, 'regression', f"rows examined {old_rows} => {new_rows} ({ratio})"))
+        elif old_rows > new_rows * rows_factor and old_rows - new_rows >= min_rows:
+            changes.append((key, 'change', f"rows examined {old_rows} => {new_rows}"))
+    return changes
+
@@ -0,0 +1,96 @@
+# prefix <-> prefix_id mapping for the dictionary and covering strategies
+# (src/strategies/)
+
+import threading
+from src.db import DedicatedConnection
+
+PREFIXES_DDL = """
+    CREATE TABLE IF NOT EXISTS prefixes (
+      prefix_id     INT UNSIGNED NOT NULL AUTO_INCREMENT,
+      prefix        VARCHAR(191) NOT NULL,
+      PRIMARY KEY (prefix_id),
+      UNIQUE KEY ux_prefix (prefix)
+    ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+"""
+
+
+class PrefixDictionary:
+    """Client-side prefix -> prefix_id cache over the `prefixes` table.
+
+    Unknown prefixes are inserted (INSERT IGNORE, sorted so concurrent
+    writers take the unique-key locks in the same order) and read back on
+    the dictionary's own connection, committed at once, so the caller's
+    write transaction never holds dictionary locks and no lookup takes a
+    second connection from the caller's pool. Misses from different
+    threads take turns on it; they stop once the dictionary is warm. The
+    dictionary only grows, so cached ids never go stale.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = {} # prefix_id -> prefix
+        self._lock = threading.Lock()
+        self._side = DedicatedConnection()
+        self.misses = 0
+
+    def _fetch(self, prefixes, create):
+        with self._side as conn:
+            cursor = conn.cursor()
+            try:
+                if create:
+                    cursor.execute(
+                        f"INSERT IGNORE INTO prefixes (prefix) VALUES {', '.join(['(%s)'] * len(prefixes))}",
+                        prefixes)
+                cursor.execute(
+                    f"SELECT prefix, prefix_id FROM prefixes WHERE prefix IN ({', '.join(['%s'] * len(prefixes))})",
+                    prefixes)
+                found = dict(cursor.fetchall())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        with self._lock:
+            self._ids.update(found)
+            self._names.update((i, p) for p, i in found.items())
+            self.misses += len(prefixes)
+        return found
+
+    def resolve(self, prefixes):
+        # prefix -> prefix_id for every given prefix, creating missing ones
+        ids = self._ids
+        missing = sorted({p for p in prefixes if p not in ids})
+        if missing:
+            self._fetch(missing, create=True)
+        return ids
+
+    def lookup(self, prefix):
+        # Id for a read; 0 (never assigned) when the prefix doesn't exist,
+        # so the query simply finds no rows
+        prefix_id = self._ids.get(prefix)
+        if prefix_id is None:
+            prefix_id = self._fetch([prefix], create=False).get(prefix, 0)
+        return prefix_id
+
+    def names(self, prefix_ids):
+        # prefix_id -> prefix for every given id (ids from the table, so
+        # they all exist)
+        names = self._names
+        missing = sorted({i for i in prefix_ids if i not in names})
+        if missing:
+            with self._side as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(
+                        f"SELECT prefix, prefix_id FROM prefixes WHERE prefix_id IN ({', '.join(['%s'] * len(missing))})",
+                        missing)
+                    found = dict(cursor.fetchall())
+                    conn.commit() # no snapshot kept for the next lookup
+                finally:
+                    cursor.close()
+            with self._lock:
+                self._ids.update(found)
+                self._names.update((i, p) for p, i in found.items())
+                self.misses += len(missing)
+        return names
@@ -0,0 +1,191 @@
+# Retention purge: deletes operations older than N days, with their
+# prefix rows, in primary-key range chunks small enough not to stall the
+# writers. Unlike a partition drop (src/partitions.py) this works on the
+# plain tables, at the cost of deleting row by row through every index.
+
+import time
+from src.db import get_connection, get_replica_connection
+from src.histogram import LatencyHistogram
+from src.actors import BackgroundActor
+
+# Both are range scans on the clustered key. created_at is copied into
+# operation_prefixes, so the side table is filtered on its own copy
+# instead of joining operations. Side table first: a reader never sees
+# prefix rows whose operation is already gone.
+DELETE_PREFIXES_SQL = """
+    DELETE FROM operation_prefixes
+    WHERE operation_id >= %s AND operation_id < %s AND created_at < %s
+"""
+
+DELETE_OPERATIONS_SQL = """
+    DELETE FROM operations
+    WHERE id >= %s AND id < %s AND created_at < %s
+"""
+
+HISTORY_LENGTH_SQL = """
+    SELECT count FROM information_schema.INNODB_METRICS
+    WHERE name = 'trx_rseg_history_len'
+"""
+
+MIN_SPAN = 100
+MAX_SPAN = 1000000
+
+
+class Purger(BackgroundActor):
+    """Walks operations' id range in chunks, deleting rows older than
+    `days` from operation_prefixes and operations in one short transaction
+    per chunk.
+
+    The id span of the next chunk is scaled so a chunk takes about
+    `target_chunk` seconds (at most 2x up or down per step). Before each
+    chunk the purge waits, with exponential backoff, while the InnoDB
+    history list is longer than `max_history` (undo the purge thread still
+    has to clean up) or the replica at Config.REPLICA_HOST is more than
+    `max_lag` seconds behind. After `max_wait` seconds of waiting it goes
+    on anyway: a history list that doesn't shrink is pinned by a
+    long-running transaction's read view, which deleting less won't help.
+    `pause` seconds between chunks leave the writers room.
+
+    run_pass() does one pass over the ids present when it starts. As a
+    thread (e.g. next to a benchmark run) it repeats passes every
+    `interval` seconds until stopped.
+    """
+
+    tag = 'purge'
+
+    def __init__(self, days, target_chunk=0.05, pause=0.01, max_history=100000, max_lag=5.0,
+                 max_wait=60.0, span=1000, interval=5.0):
+        super().__init__()
+        self.days = days
+        self.target_chunk = target_chunk
+        self.pause = pause
+        self.max_history = max_history
+        self.max_lag = max_lag
+        self.max_wait = max_wait
+        self.span = span
+        self.interval = interval
+        self.chunk_latency = LatencyHistogram()
+        self.stats = {'passes': 0, 'chunks': 0, 'operations': 0, 'prefixes': 0,
+                      'chunk_time': 0.0, 'stalls': 0, 'stall_time': 0.0, 'forced': 0, 'errors': 0}
+        self._replica = None
+
+    def _pressure(self, cursor):
+        # (history list length, replica lag in s or None)
+        cursor.execute(HISTORY_LENGTH_SQL)
+        row = cursor.fetchone()
+        history = row[0] if row else 0
+        lag = None
+        if self._replica is None:
+            self._replica = get_replica_connection()
+        if self._replica is not None:
+            replica_cursor = self._replica.cursor(dictionary=True)
+            try:
+                replica_cursor.execute("SHOW REPLICA STATUS")
+                status = replica_cursor.fetchone()
+            finally:
+                replica_cursor.close()
+            if status:
+                lag = status.get('Seconds_Behind_Source')
+        return history, lag
+
+    def _throttle(self, conn, cursor):
+        # Waits until the server has caught up, or for max_wait at most;
+        # False if stopped meanwhile
+        delay = 0.1
+        waited = 0.0
+        while True:
+            history, lag = self._pressure(cursor)
+            conn.commit()
+            if history <= self.max_history and (lag is None or lag <= self.max_lag):
+                return True
+            if waited >= self.max_wait:
+                self.stats['forced'] += 1
+                if self.stats['forced'] <= 5:
+                    cause = (f"history list at {history}: a long-running transaction is pinning it"
+                             if history > self.max_history else f"replica {lag}s behind")
+                    print(f"Purge went on after waiting {waited:.0f}s ({cause})")
+                return True
+            self.stats['stalls'] += 1
+            self.stats['stall_time'] += delay
+            if self._stop_event.wait(delay):
+                return False
+            waited += delay
+            delay = min(delay * 2, 5.0)
+
+    def _chunk(self, conn, cursor, lo, hi, cutoff):
+        self._begin()
+        start = time.perf_counter()
+        try:
+            cursor.execute(DELETE_PREFIXES_SQL, (lo, hi, cutoff))
+            prefixes = cursor.rowcount
+            cursor.execute(DELETE_OPERATIONS_SQL, (lo, hi, cutoff))
+            operations = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._end()
+        elapsed = time.perf_counter() - start
+        self.chunk_latency.record(elapsed)
+        s = self.stats
+        s['chunks'] += 1
+        s['operations'] += operations
+        s['prefixes'] += prefixes
+        s['chunk_time'] += elapsed
+        # Next span aims at target_chunk, changing at most 2x per chunk
+        scale = min(max(self.target_chunk / max(elapsed, 1e-4), 0.5), 2.0)
+        self.span = int(min(max(self.span * scale, MIN_SPAN), MAX_SPAN))
+
+    def run_pass(self, conn, progress=None):
+        # One walk over the current id range; rows are expired against the
+        # server's clock, like the windowed reads
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT NOW(6) - INTERVAL %s DAY, MIN(id), MAX(id) FROM operations", (self.days,))
+            cutoff, lo, last = cursor.fetchone()
+            conn.commit()
+            if lo is None:
+                return
+            while lo <= last:
+                if not self._throttle(conn, cursor):
+                    return
+                hi = lo + self.span
+                self._chunk(conn, cursor, lo, hi, cutoff)
+                if progress is not None:
+                    progress(self, hi, last)
+                lo = hi
+                if self._stop_event.wait(self.pause):
+                    return
+            self.stats['passes'] += 1
+        finally:
+            cursor.close()
+
+    def run(self):
+        conn = get_connection()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.run_pass(conn)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    if self.stats['errors'] <= 5:
+                        print(f"Purge error: {e}")
+                self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+            self.close()
+
+    def close(self):
+        if self._replica is not None:
+            self._replica.close()
+            self._replica = None
+
+    def summary(self):
+        s = dict(self.stats)
+        chunks = s['chunks']
+        s['mean_chunk_ms'] = s['chunk_time'] / chunks * 1000 if chunks else 0.0
+        s['p99_chunk_ms'] = self.chunk_latency.percentile(99) * 1000 if chunks else 0.0
+        s['max_chunk_ms'] = self.chunk_latency.max() * 1000 if chunks else 0.0
+        s['span'] = self.span
+        return s
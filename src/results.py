@@ -0,0 +1,279 @@
+# Results files: one JSON document per run with the config, git revision,
+# per-op percentiles, QPS and the latency histograms themselves, and the
+# statistics behind `main.py compare`.
+#
+# A run with --repeat N holds N measured repetitions under "runs"; compare
+# treats them as independent samples of each metric.
+
+import json
+import math
+import os
+import datetime
+import subprocess
+import numpy as np
+from src.histogram import LatencyHistogram
+
+RESULTS_VERSION = 1
+RESULTS_DIR = 'results'
+
+PERCENTILES = (50, 95, 99, 99.9, 99.99)
+
+# compare metrics: name -> higher is worse
+METRICS = {'qps': False, 'mean': True, 'p50': True, 'p95': True, 'p99': True, 'p99.9': True}
+
+
+def merge_results(results, hist_digits):
+    # Totals and per-op histograms merged over every worker's metrics
+    totals = {'ops': 0, 'errors': 0, 'missed': 0, 'short_walks': 0}
+    all_histograms = {} # type -> merged LatencyHistogram
+    for r in results:
+        if r:
+            for key in totals:
+                totals[key] += r.get(key, 0)
+            for op_type, hist in r['histograms'].items():
+                if op_type not in all_histograms:
+                    all_histograms[op_type] = LatencyHistogram(hist_digits)
+                all_histograms[op_type].merge(hist)
+    return totals, all_histograms
+
+
+def git_revision():
+    # (short revision, uncommitted changes?) of the working tree, or
+    # (None, None) outside a git checkout
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return rev.stdout.strip(), bool(status.stdout.strip())
+
+
+def default_path(mix):
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(RESULTS_DIR, f"run-{mix}-{stamp}.json")
+
+
+def _op_stats(hist, errors, duration):
+    stats = {'count': hist.total, 'errors': errors, 'qps': hist.total / duration if duration else 0.0,
+             'mean_ms': hist.mean() * 1000, 'max_ms': hist.max() * 1000}
+    for q in PERCENTILES:
+        stats[f'p{q:g}_ms'] = hist.percentile(q) * 1000
+    return stats
+
+
+def _run_entry(metrics, duration, elapsed, hist_digits):
+    totals, histograms = merge_results(metrics, hist_digits)
+    op_errors = {}
+    for m in metrics:
+        for op_type, n in m['op_errors'].items():
+            op_errors[op_type] = op_errors.get(op_type, 0) + n
+    return {
+        'elapsed': elapsed,
+        'ops': totals['ops'],
+        'errors': totals['errors'],
+        'missed': totals['missed'],
+        'short_walks': totals['short_walks'],
+        'qps': totals['ops'] / duration if duration else 0.0,
+        'op_types': {op: _op_stats(h, op_errors.get(op, 0), duration) for op, h in histograms.items() if h.total},
+        'histograms': {op: h.to_dict() for op, h in histograms.items() if h.total},
+    }
+
+
+def build_results(config, runs, duration, hist_digits, intervals=None):
+    """Results document. `config`: the run's options (JSON-safe values
+    only are kept); `runs`: [(wall seconds, worker metrics)] per measured
+    repetition; `duration`: the configured seconds each repetition ran;
+    `intervals`: the client timeline with aligned server samples
+    (server_metrics.align)."""
+    revision, dirty = git_revision()
+    return {
+        'results': RESULTS_VERSION,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git': {'revision': revision, 'dirty': dirty},
+        'mix': config.get('mix'),
+        'config': {k: v for k, v in config.items() if isinstance(v, (str, int, float, bool, type(None)))},
+        'duration': duration,
+        'runs': [_run_entry(metrics, duration, elapsed, hist_digits) for elapsed, metrics in runs],
+        'intervals': intervals or [],
+    }
+
+
+def write_results(path, doc):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=1)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    if doc.get('results') != RESULTS_VERSION:
+        raise ValueError(f"{path} is not a version {RESULTS_VERSION} results file")
+    return doc
+
+
+# Student's t distribution, for Welch's test without SciPy
+
+def _betacf(a, b, x):
+    # Continued fraction of the incomplete beta function (Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    # Regularized incomplete beta I_x(a, b)
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_two_sided_p(t, df):
+    return _betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def t_critical(confidence, df):
+    # t such that P(|T| <= t) = confidence, by bisection
+    lo, hi = 0.0, 1.0
+    while t_two_sided_p(hi, df) > 1.0 - confidence:
+        hi *= 2.0
+    for _ in range(100):
+        mid = (lo + hi) / 2.0
+        if t_two_sided_p(mid, df) > 1.0 - confidence:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def welch(base, new, confidence=0.95):
+    # (difference of means new - base, CI low, CI high, p-value) for two
+    # samples of at least 2 values each
+    base, new = np.asarray(base, dtype=float), np.asarray(new, dtype=float)
+    diff = new.mean() - base.mean()
+    vb, vn = base.var(ddof=1) / len(base), new.var(ddof=1) / len(new)
+    se = math.sqrt(vb + vn)
+    if se == 0.0:
+        return diff, diff, diff, 0.0 if diff else 1.0
+    df = (vb + vn) ** 2 / (vb ** 2 / (len(base) - 1) + vn ** 2 / (len(new) - 1))
+    half = t_critical(confidence, df) * se
+    return diff, diff - half, diff + half, t_two_sided_p(diff / se, df)
+
+
+def bootstrap_percentile(base, new, q, confidence=0.95, rounds=1000, seed=0):
+    # (difference new - base of percentile q in s, CI low, CI high) from
+    # resampling each histogram's recorded values. Sampling noise within a
+    # run only; run-to-run variance needs repeated runs.
+    rng = np.random.default_rng(seed)
+    diffs = new.resampled_percentiles(q, rounds, rng) - base.resampled_percentiles(q, rounds, rng)
+    tail = (1.0 - confidence) / 2.0 * 100
+    low, high = np.percentile(diffs, [tail, 100 - tail])
+    return new.percentile(q) - base.percentile(q), float(low), float(high)
+
+
+def _metric_values(doc, op_type, metric):
+    # One value per run that has the op (ms for latencies, ops/s for qps);
+    # op '_all' is the run's total QPS
+    values = []
+    for run in doc['runs']:
+        if op_type == '_all':
+            values.append(run['qps'])
+            continue
+        stats = run['op_types'].get(op_type)
+        if stats is not None:
+            key = 'qps' if metric == 'qps' else 'mean_ms' if metric == 'mean' else f'{metric}_ms'
+            values.append(stats[key])
+    return values
+
+
+def _op_types(doc):
+    return set().union(*(run['op_types'] for run in doc['runs']))
+
+
+def _merged_histogram(doc, op_type):
+    merged = None
+    for run in doc['runs']:
+        h = run['histograms'].get(op_type)
+        if h:
+            hist = LatencyHistogram.from_dict(h)
+            merged = hist if merged is None else merged.merge(hist)
+    return merged
+
+
+def compare(base, new, metrics=('qps', 'p50', 'p99'), confidence=0.95, threshold=5.0, rounds=1000):
+    """Per op type (plus '_all' for total QPS) and metric, one row:
+    {op, metric, base, new, change_pct, low_pct, high_pct, method,
+    significant, verdict}. Means of the per-run values are compared with
+    Welch's t-test when both sides have at least two runs. Otherwise
+    percentiles are taken from each side's merged histogram (all its runs)
+    and compared with a bootstrap over those histograms. A change
+    is significant when its confidence interval excludes zero, and is a
+    'regression' or 'improvement' when it is also larger than
+    `threshold` percent."""
+    ops = ['_all'] + sorted(_op_types(base) & _op_types(new))
+    rows = []
+    for op_type in ops:
+        for metric in metrics:
+            if op_type == '_all' and metric != 'qps':
+                continue
+            b, n = _metric_values(base, op_type, metric), _metric_values(new, op_type, metric)
+            if not b or not n:
+                continue
+            b_mean, n_mean = float(np.mean(b)), float(np.mean(n))
+            low = high = None
+            if len(b) >= 2 and len(n) >= 2:
+                method = f'welch n={len(b)}/{len(n)}'
+                _, low, high, _ = welch(b, n, confidence)
+                low, high = float(low), float(high)
+            elif metric.startswith('p'):
+                # The percentile of each side's merged histogram, for the
+                # values and the change as well as the interval
+                method = 'bootstrap'
+                q = float(metric[1:])
+                base_hist, new_hist = _merged_histogram(base, op_type), _merged_histogram(new, op_type)
+                _, low, high = bootstrap_percentile(base_hist, new_hist, q, confidence, rounds)
+                b_mean, n_mean = base_hist.percentile(q) * 1000, new_hist.percentile(q) * 1000
+                low, high = low * 1000, high * 1000 # to ms
+            else:
+                method = 'single run'
+            change = (n_mean - b_mean) / b_mean * 100 if b_mean else 0.0
+            significant = low is not None and (low > 0 or high < 0)
+            worse = change > 0 if METRICS[metric] else change < 0
+            verdict = ''
+            if significant and abs(change) > threshold:
+                verdict = 'regression' if worse else 'improvement'
+            rows.append({
+                'op': op_type, 'metric': metric, 'base': b_mean, 'new': n_mean, 'change_pct': change,
+                'low_pct': low / b_mean * 100 if low is not None and b_mean else None,
+                'high_pct': high / b_mean * 100 if high is not None and b_mean else None,
+                'method': method, 'significant': significant, 'verdict': verdict,
+            })
+    return rows
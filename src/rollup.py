@@ -0,0 +1,41 @@
+# Optional per-prefix hourly rollup (operation_prefix_rollup in schema.sql).
+# Trades extra upserts on every write for windowed counts / error rates
+# that read a few dozen bucket rows instead of every side-table row.
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO operation_prefix_rollup (prefix, hour_bucket, total, errors)
+    VALUES {values} AS new
+    ON DUPLICATE KEY UPDATE
+        total = operation_prefix_rollup.total + new.total,
+        errors = operation_prefix_rollup.errors + new.errors
+"""
+
+REBUILD_ROLLUP_SQL = """
+    INSERT INTO operation_prefix_rollup (prefix, hour_bucket, total, errors)
+    SELECT p.prefix,
+           DATE_FORMAT(p.created_at, '%Y-%m-%d %H:00:00'),
+           COUNT(*),
+           SUM(o.status = 1)
+    FROM operation_prefixes p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    GROUP BY 1, 2
+"""
+
+
+def upsert_rollup(cursor, rows):
+    # rows: (prefix, hour_bucket, total, errors), see OpBatch.rollup_rows
+    if not rows:
+        return
+    params = [v for row in rows for v in row]
+    cursor.execute(UPSERT_ROLLUP_SQL.format(values=', '.join(["(%s, %s, %s, %s)"] * len(rows))), params)
+
+
+def rebuild_rollup(conn):
+    # Recompute every bucket from the side table (e.g. after a bulk load)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("TRUNCATE TABLE operation_prefix_rollup")
+        cursor.execute(REBUILD_ROLLUP_SQL)
+        conn.commit()
+    finally:
+        cursor.close()
@@ -0,0 +1,228 @@
+# Server-side metrics next to a run: SHOW GLOBAL STATUS, INNODB_METRICS and
+# performance_schema statement digests, polled on a dedicated connection
+# and turned into per-interval deltas. align() lines them up with the
+# IntervalReporter timeline, so a client p99 spike can be read against
+# buffer pool misses, redo log waits or row lock waits at the same time.
+
+import time
+import threading
+from src.config import Config
+from src.db import get_monitor_connection
+
+# Cumulative counters: reported per second
+STATUS_COUNTERS = (
+    'Questions', 'Com_select', 'Com_insert', 'Com_delete', 'Com_commit', 'Com_call_procedure',
+    'Innodb_buffer_pool_read_requests', 'Innodb_buffer_pool_reads', 'Innodb_buffer_pool_wait_free',
+    'Innodb_buffer_pool_pages_flushed', 'Innodb_data_reads', 'Innodb_data_writes', 'Innodb_data_fsyncs',
+    'Innodb_log_waits', 'Innodb_log_write_requests', 'Innodb_os_log_fsyncs',
+    'Innodb_row_lock_waits', 'Innodb_row_lock_time',
+    'Innodb_rows_read', 'Innodb_rows_inserted', 'Innodb_rows_deleted',
+    'Created_tmp_disk_tables', 'Select_full_join', 'Sort_merge_passes', 'Bytes_received', 'Bytes_sent',
+)
+
+# Point-in-time values: reported as read
+STATUS_GAUGES = (
+    'Threads_running', 'Threads_connected', 'Innodb_row_lock_current_waits',
+    'Innodb_buffer_pool_pages_dirty', 'Innodb_buffer_pool_pages_free',
+)
+
+# INNODB_METRICS types that count up; 'value' metrics are gauges
+INNODB_COUNTER_TYPES = ('counter', 'status_counter')
+
+# Statement digests kept per interval, by time spent
+DIGEST_TOP = 10
+
+DIGESTS_SQL = """
+    SELECT DIGEST, LEFT(DIGEST_TEXT, 200), COUNT_STAR, SUM_TIMER_WAIT, SUM_LOCK_TIME,
+           SUM_ROWS_EXAMINED, SUM_NO_INDEX_USED
+    FROM performance_schema.events_statements_summary_by_digest
+    WHERE SCHEMA_NAME = %s
+"""
+
+# Shown next to the worst client interval in the run report
+INDICATORS = (
+    ('Innodb_buffer_pool_reads', 'buffer pool reads/s'),
+    ('Innodb_log_waits', 'redo log waits/s'),
+    ('Innodb_row_lock_waits', 'row lock waits/s'),
+    ('Innodb_data_fsyncs', 'fsyncs/s'),
+    ('Threads_running', 'threads running'),
+)
+
+
+class ServerSampler(threading.Thread):
+    """Polls the server every `interval` seconds on its own connection
+    (never one of the workers') and keeps one dict of deltas per interval
+    in `samples`. Ticks on the same schedule as IntervalReporter.
+
+    open() connects first, so a server that refuses the monitoring
+    queries is reported before the run instead of failing the sampler.
+    Digests are skipped when performance_schema isn't readable.
+    """
+
+    def __init__(self, interval=1.0, digests=True):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.digests = digests
+        self.samples = []
+        self.errors = 0
+        self._conn = None
+        self._prev = None
+        self._stop_event = threading.Event()
+
+    def open(self):
+        self._conn = get_monitor_connection()
+        cursor = self._conn.cursor()
+        try:
+            self._prev = self._snapshot(cursor)
+        finally:
+            cursor.close()
+
+    def _status(self, cursor):
+        cursor.execute("SHOW GLOBAL STATUS")
+        wanted = set(STATUS_COUNTERS) | set(STATUS_GAUGES)
+        return {name: int(value) for name, value in cursor.fetchall() if name in wanted}
+
+    def _innodb(self, cursor):
+        cursor.execute("SELECT name, count, type FROM information_schema.INNODB_METRICS WHERE status = 'enabled'")
+        return {name: (count, kind) for name, count, kind in cursor.fetchall()}
+
+    def _digests(self, cursor):
+        try:
+            cursor.execute(DIGESTS_SQL, (Config.DB_NAME,))
+        except Exception as e:
+            print(f"Statement digests unavailable, skipping them: {e}")
+            self.digests = False
+            return {}
+        return {row[0]: row[1:] for row in cursor.fetchall()}
+
+    def _snapshot(self, cursor):
+        return {
+            'time': time.time(),
+            'status': self._status(cursor),
+            'innodb': self._innodb(cursor),
+            'digests': self._digests(cursor) if self.digests else {},
+        }
+
+    def _delta(self, prev, cur, elapsed):
+        span = cur['time'] - prev['time']
+        status = {}
+        for name in STATUS_COUNTERS:
+            if name in cur['status']:
+                status[name] = round((cur['status'][name] - prev['status'].get(name, 0)) / span, 2)
+        for name in STATUS_GAUGES:
+            if name in cur['status']:
+                status[name] = cur['status'][name]
+        # Derived: share of page reads that went to disk, mean row lock wait
+        requests = cur['status'].get('Innodb_buffer_pool_read_requests', 0) - \
+            prev['status'].get('Innodb_buffer_pool_read_requests', 0)
+        misses = cur['status'].get('Innodb_buffer_pool_reads', 0) - prev['status'].get('Innodb_buffer_pool_reads', 0)
+        status['bp_miss_pct'] = round(misses / requests * 100, 3) if requests else 0.0
+        waits = cur['status'].get('Innodb_row_lock_waits', 0) - prev['status'].get('Innodb_row_lock_waits', 0)
+        lock_ms = cur['status'].get('Innodb_row_lock_time', 0) - prev['status'].get('Innodb_row_lock_time', 0)
+        status['row_lock_wait_ms'] = round(lock_ms / waits, 2) if waits else 0.0
+
+        innodb = {}
+        for name, (count, kind) in cur['innodb'].items():
+            if kind in INNODB_COUNTER_TYPES:
+                before = prev['innodb'].get(name, (count, kind))[0]
+                if count != before:
+                    innodb[name] = round((count - before) / span, 2)
+            elif count:
+                innodb[name] = count
+
+        digests = []
+        for digest, (text, calls, wait, lock, examined, no_index) in cur['digests'].items():
+            before = prev['digests'].get(digest, (text, 0, 0, 0, 0, 0))
+            calls_d = calls - before[1]
+            if calls_d <= 0:
+                continue
+            # performance_schema timers are in picoseconds
+            digests.append({
+                'digest': digest, 'text': text, 'calls': calls_d,
+                'time_ms': round((wait - before[2]) / 1e9, 3),
+                'lock_ms': round((lock - before[3]) / 1e9, 3),
+                'rows_examined': examined - before[4],
+                'no_index_used': no_index - before[5],
+            })
+        digests.sort(key=lambda d: d['time_ms'], reverse=True)
+        return {'ts': round(cur['time'], 3), 'elapsed': round(elapsed, 3), 'status': status, 'innodb': innodb,
+                'digests': digests[:DIGEST_TOP]}
+
+    def stop(self):
+        self._stop_event.set()
+        if self.ident is not None:
+            self.join()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def run(self):
+        cursor = self._conn.cursor()
+        start = time.time()
+        tick = 1
+        try:
+            while not self._stop_event.wait(max(start + tick * self.interval - time.time(), 0)):
+                tick += 1
+                try:
+                    cur = self._snapshot(cursor)
+                except Exception as e:
+                    self.errors += 1
+                    if self.errors <= 5:
+                        print(f"Server sampler error: {e}")
+                    continue
+                self.samples.append(self._delta(self._prev, cur, cur['time'] - start))
+                self._prev = cur
+        finally:
+            cursor.close()
+
+    def summary(self):
+        # Run-wide view: every value averaged over the samples (per-second
+        # counters stay per second), gauge maxima, digests summed
+        status, peak = {}, {}
+        n = len(self.samples)
+        for sample in self.samples:
+            for name, value in sample['status'].items():
+                status[name] = status.get(name, 0) + value / n
+                if name in STATUS_GAUGES:
+                    peak[name] = max(peak.get(name, 0), value)
+        # Ratios from the averaged counters, not averages of ratios
+        requests = status.get('Innodb_buffer_pool_read_requests', 0)
+        status['bp_miss_pct'] = status.get('Innodb_buffer_pool_reads', 0) / requests * 100 if requests else 0.0
+        waits = status.get('Innodb_row_lock_waits', 0)
+        status['row_lock_wait_ms'] = status.get('Innodb_row_lock_time', 0) / waits if waits else 0.0
+        history = max((s['innodb'].get('trx_rseg_history_len', 0) for s in self.samples), default=0)
+        digests = {}
+        for sample in self.samples:
+            for d in sample['digests']:
+                total = digests.setdefault(d['digest'], {'text': d['text'], 'calls': 0, 'time_ms': 0.0,
+                                                         'rows_examined': 0})
+                total['calls'] += d['calls']
+                total['time_ms'] += d['time_ms']
+                total['rows_examined'] += d['rows_examined']
+        top = sorted(digests.values(), key=lambda d: d['time_ms'], reverse=True)[:5]
+        return {'samples': n, 'status': status, 'max': peak, 'max_history_len': history, 'top_digests': top}
+
+
+def align(timeline, samples, interval):
+    """Per client interval of an IntervalReporter timeline: {'elapsed',
+    'ts', 'client': {'qps', 'errors', 'p99_ms' (worst op), 'ops': {op:
+    {'qps', 'p99_ms'}}}, 'server': the sample taken within half an
+    interval of it, or None}."""
+    intervals = {}
+    for row in timeline:
+        entry = intervals.setdefault(row['ts'], {'elapsed': row['elapsed'], 'ts': row['ts'],
+                                                'client': {'qps': 0.0, 'errors': 0, 'p99_ms': None, 'ops': {}}})
+        client = entry['client']
+        if row['op'] == '_all':
+            client['qps'] = row['qps']
+            client['errors'] = row['errors']
+        elif row['count']:
+            client['ops'][row['op']] = {'qps': row['qps'], 'p99_ms': row['p99_ms']}
+            client['p99_ms'] = max(client['p99_ms'] or 0.0, row['p99_ms'])
+    aligned = []
+    for ts in sorted(intervals):
+        entry = intervals[ts]
+        nearest = min(samples, key=lambda s: abs(s['ts'] - ts), default=None)
+        entry['server'] = nearest if nearest and abs(nearest['ts'] - ts) <= interval / 2 else None
+        aligned.append(entry)
+    return aligned
@@ -0,0 +1,84 @@
+from src.config import Config
+
+SEED_TABLES = ('operations', 'operation_prefixes')
+# Side-table layouts side by side: string prefixes vs dictionary ids
+LAYOUT_TABLES = ('operation_prefixes', 'prefixes', 'operation_prefix_ids')
+
+
+def existing_tables(cursor, tables):
+    # The given tables that exist in the schema, in the given order
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT table_name FROM information_schema.TABLES
+        WHERE table_schema = %s AND table_name IN ({placeholders})
+    """, (Config.DB_NAME, *tables))
+    found = {row[0] for row in cursor.fetchall()}
+    return tuple(t for t in tables if t in found)
+
+
+def table_sizes(cursor, tables=SEED_TABLES):
+    # Refresh persistent stats first so sizes reflect what was just written
+    cursor.execute(f"ANALYZE TABLE {', '.join(tables)}")
+    cursor.fetchall()
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT table_name, table_rows, data_length, index_length
+        FROM information_schema.TABLES
+        WHERE table_schema = %s AND table_name IN ({placeholders})
+        ORDER BY table_name
+    """, (Config.DB_NAME, *tables))
+    return cursor.fetchall()
+
+
+# innodb_index_stats names each partition of a partitioned table
+# '<table>#p#<partition>'; sizes are summed back per table
+BASE_TABLE = "SUBSTRING_INDEX(s.table_name, '#', 1)"
+
+
+def index_sizes(cursor, tables=SEED_TABLES):
+    # Per-index size; information_schema only exposes per-table totals
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT {BASE_TABLE} AS base_table, s.index_name, SUM(s.stat_value) * @@innodb_page_size
+        FROM mysql.innodb_index_stats s
+        WHERE s.database_name = %s AND {BASE_TABLE} IN ({placeholders})
+          AND s.stat_name = 'size'
+        GROUP BY base_table, s.index_name
+        ORDER BY base_table, s.index_name
+    """, (Config.DB_NAME, *tables))
+    return cursor.fetchall()
+
+
+def print_size_report(cursor, tables=SEED_TABLES):
+    mb = 1024 * 1024
+    print(f"\n{'Table':<25} | {'Rows (Approx)':<15} | {'Data (MB)':<10} | {'Index (MB)':<10}")
+    print("-" * 69)
+    for name, rows, data, index in table_sizes(cursor, tables):
+        print(f"{name:<25} | {rows:<15} | {data / mb:<10.2f} | {index / mb:<10.2f}")
+
+    print(f"\n{'Index':<45} | {'Size (MB)':<10}")
+    print("-" * 58)
+    for table, index, size in index_sizes(cursor, tables):
+        print(f"{table + '.' + index:<45} | {size / mb:<10.2f}")
+
+
+def index_residency(cursor, tables=LAYOUT_TABLES):
+    # (table, index, size bytes, bytes cached in the buffer pool) per index
+    placeholders = ', '.join(['%s'] * len(tables))
+    cursor.execute(f"""
+        SELECT {BASE_TABLE} AS base_table, s.index_name,
+               SUM(s.stat_value) * @@innodb_page_size,
+               SUM(COALESCE(c.n_cached_pages, 0)) * @@innodb_page_size
+        FROM mysql.innodb_index_stats s
+        JOIN information_schema.INNODB_TABLES t
+          ON t.name = CONCAT(s.database_name, '/', s.table_name)
+        JOIN information_schema.INNODB_INDEXES i
+          ON i.table_id = t.table_id AND i.name = s.index_name
+        LEFT JOIN information_schema.INNODB_CACHED_INDEXES c
+          ON c.index_id = i.index_id
+        WHERE s.database_name = %s AND {BASE_TABLE} IN ({placeholders})
+          AND s.stat_name = 'size'
+        GROUP BY base_table, s.index_name
+        ORDER BY base_table, s.index_name
+    """, (Config.DB_NAME, *tables))
+    return cursor.fetchall()
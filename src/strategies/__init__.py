@@ -0,0 +1,24 @@
+from src.strategies.base import PrefixStrategy
+from src.strategies.side_table import SideTableStrategy
+from src.strategies.dictionary import DictionaryStrategy
+from src.strategies.like_range import LikeRangeStrategy
+from src.strategies.depth_columns import DepthColumnsStrategy
+from src.strategies.closure import ClosureStrategy
+from src.strategies.covering import CoveringStrategy
+
+STRATEGIES = {
+    cls.name: cls
+    for cls in (SideTableStrategy, DictionaryStrategy, LikeRangeStrategy, DepthColumnsStrategy, ClosureStrategy,
+                CoveringStrategy)
+}
+
+
+def make_strategies(spec):
+    # 'a,b,...' -> strategy instances in that order. All are maintained on
+    # writes; the first one serves the reads.
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown or not names:
+        raise ValueError(f"Unknown strategy {', '.join(unknown) or spec!r}; choose from {', '.join(STRATEGIES)}")
+    return [STRATEGIES[name]() for name in dict.fromkeys(names)]
+
@@ -0,0 +1,98 @@
+from src.config import Config
+from src.stats import table_sizes, index_sizes
+
+
+def _existing_columns(cursor, table):
+    cursor.execute("""
+        SELECT column_name FROM information_schema.COLUMNS
+        WHERE table_schema = %s AND table_name = %s
+    """, (Config.DB_NAME, table))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _existing_indexes(cursor, table):
+    cursor.execute("""
+        SELECT DISTINCT index_name FROM information_schema.STATISTICS
+        WHERE table_schema = %s AND table_name = %s
+    """, (Config.DB_NAME, table))
+    return {row[0] for row in cursor.fetchall()}
+
+
+class PrefixStrategy:
+    """One way of answering "operations under prefix X".
+
+    A strategy owns everything outside the `operations` base columns that
+    its reads need: its DDL (`TABLES_DDL`, plus columns / indexes it adds to
+    `operations`), the extra rows written with each batch (`write`), a
+    backfill from existing data (`build`) and the SQL of the four prefix
+    reads. Every read returns the same rows as the side-table design:
+    latest / seek give (id, created_at, status, type_path) newest first.
+    """
+
+    name = None
+    TABLES_DDL = {}     # table -> CREATE TABLE IF NOT EXISTS ...
+    COLUMNS = ()        # (name, definition) added to operations
+    INDEXES = ()        # (name, definition) added to operations
+    PREFIX_ROWS = False # write() wants OpBatch.prefix_params rows
+    # The stored procedures' writes (operations plus the side table) keep
+    # this strategy current; False when write() adds rows of its own
+    PROCEDURE_WRITES = True
+
+    def create(self, cursor):
+        # Idempotent DDL
+        for ddl in self.TABLES_DDL.values():
+            cursor.execute(ddl)
+        adds = []
+        if self.COLUMNS:
+            existing = _existing_columns(cursor, 'operations')
+            adds += [f"ADD COLUMN {name} {ddl}" for name, ddl in self.COLUMNS if name not in existing]
+        if self.INDEXES:
+            existing = _existing_indexes(cursor, 'operations')
+            adds += [f"ADD KEY {name} {ddl}" for name, ddl in self.INDEXES if name not in existing]
+        if adds:
+            # One ALTER so InnoDB rebuilds / sorts once
+            cursor.execute(f"ALTER TABLE operations {', '.join(adds)}")
+
+    def write(self, cursor, batch, first_id, prefix_rows):
+        # Extra rows for a batch whose operations got ids first_id.., in
+        # the caller's transaction. Returns rows written.
+        return 0
+
+    def build(self, conn):
+        # Backfills this strategy's rows from data already loaded
+        cursor = conn.cursor()
+        try:
+            self.create(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def rows(self, rows):
+        # Maps fetched latest / seek rows to (id, created_at, status, type_path)
+        return rows
+
+    # Reads: (sql, params)
+    def latest(self, prefix, limit, offset):
+        raise NotImplementedError
+
+    def seek(self, prefix, created_at, op_id, limit):
+        raise NotImplementedError
+
+    def count_24h(self, prefix):
+        raise NotImplementedError
+
+    def error_rate(self, prefix):
+        raise NotImplementedError
+
+    def storage(self, cursor):
+        # (object, bytes) for everything this strategy adds
+        sizes = []
+        if self.TABLES_DDL:
+            for name, _, data, index in table_sizes(cursor, tuple(self.TABLES_DDL)):
+                sizes.append((name, data + index))
+        if self.INDEXES:
+            wanted = {name for name, _ in self.INDEXES}
+            for table, index, size in index_sizes(cursor, ('operations',)):
+                if index in wanted:
+                    sizes.append((f"{table}.{index}", size))
+        return sizes
@@ -0,0 +1,138 @@
+import threading
+from src.db import DedicatedConnection
+from src.generator import Generator
+from src.strategies.base import PrefixStrategy
+
+# Descendant paths of the prefix from the closure table, then each path's
+# operations through ix_type_path; created_at order needs a sort over all
+# of them
+SQL_LATEST_CLOSURE = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM path_closure c
+    JOIN operations o ON o.type_path = c.descendant
+    WHERE c.ancestor = %s
+    ORDER BY o.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQL_LATEST_SEEK_CLOSURE = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM path_closure c
+    JOIN operations o ON o.type_path = c.descendant
+    WHERE c.ancestor = %s
+      AND (o.created_at < %s OR (o.created_at = %s AND o.id > %s))
+    ORDER BY o.created_at DESC, o.id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H_CLOSURE = """
+    SELECT c.ancestor, COUNT(*) AS cnt
+    FROM path_closure c
+    JOIN operations o ON o.type_path = c.descendant
+    WHERE c.ancestor = %s
+      AND o.created_at >= NOW() - INTERVAL 1 DAY
+    GROUP BY c.ancestor
+"""
+
+SQL_ERROR_RATE_CLOSURE = """
+    SELECT c.ancestor,
+           SUM(o.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(o.status=1)/COUNT(*) AS error_rate
+    FROM path_closure c
+    JOIN operations o ON o.type_path = c.descendant
+    WHERE c.ancestor = %s
+      AND o.created_at >= NOW() - INTERVAL 7 DAY
+    GROUP BY c.ancestor
+"""
+
+
+class ClosureStrategy(PrefixStrategy):
+    """Closure table over distinct type paths: one (ancestor, descendant,
+    depth) row per path and ancestor prefix. Tiny (it grows with distinct
+    paths, not operations) and written only when a new path shows up, but
+    every read fans out to all descendant paths and sorts their rows.
+
+    New paths are added on the strategy's own connection, committed at
+    once (like PrefixDictionary), sorted so concurrent writers lock in
+    order.
+    """
+
+    name = 'closure'
+    PROCEDURE_WRITES = False
+    TABLES_DDL = {
+        'path_closure': """
+            CREATE TABLE IF NOT EXISTS path_closure (
+              ancestor      VARCHAR(191) NOT NULL,
+              descendant    VARCHAR(191) NOT NULL,
+              depth         TINYINT UNSIGNED NOT NULL,  -- labels between the two
+              PRIMARY KEY (ancestor, descendant),
+              KEY ix_descendant (descendant)
+            ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+        """,
+    }
+
+    def __init__(self):
+        self._known = set()
+        self._lock = threading.Lock()
+        self._side = DedicatedConnection()
+
+    @staticmethod
+    def _closure_rows(paths):
+        rows = []
+        for path in paths:
+            prefixes = Generator.expand_prefixes(path)
+            for prefix in prefixes:
+                rows.extend((prefix, path, len(prefixes) - prefix.count('.') - 1))
+        return rows
+
+    def _insert_paths(self, cursor, paths, chunk=1000):
+        for i in range(0, len(paths), chunk):
+            rows = self._closure_rows(paths[i:i + chunk])
+            cursor.execute(f"""
+                INSERT IGNORE INTO path_closure (ancestor, descendant, depth)
+                VALUES {', '.join(["(%s, %s, %s)"] * (len(rows) // 3))}
+            """, rows)
+
+    def write(self, cursor, batch, first_id, prefix_rows):
+        new = sorted(p for p in batch.used_paths() if p not in self._known)
+        if not new:
+            return 0
+        with self._side as conn:
+            own = conn.cursor()
+            try:
+                self._insert_paths(own, new)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                own.close()
+        with self._lock:
+            self._known.update(new)
+        return 0
+
+    def build(self, conn):
+        # From the distinct paths already in operations
+        cursor = conn.cursor()
+        try:
+            self.create(cursor)
+            cursor.execute("SELECT DISTINCT type_path FROM operations ORDER BY type_path")
+            paths = [row[0] for row in cursor.fetchall()]
+            self._insert_paths(cursor, paths)
+            conn.commit()
+            self._known.update(paths)
+        finally:
+            cursor.close()
+
+    def latest(self, prefix, limit, offset):
+        return SQL_LATEST_CLOSURE, (prefix, limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return SQL_LATEST_SEEK_CLOSURE, (prefix, created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return SQL_COUNT_24H_CLOSURE, (prefix,)
+
+    def error_rate(self, prefix):
+        return SQL_ERROR_RATE_CLOSURE, (prefix,)
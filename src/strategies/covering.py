@@ -0,0 +1,134 @@
+from itertools import chain, repeat
+from src.prefix_dict import PrefixDictionary, PREFIXES_DDL
+from src.strategies.base import PrefixStrategy
+
+# Same shapes as the side table, answered from ix_prefix_covering alone:
+# no per-row primary-key lookup into operations. type_path comes back as
+# path_id and is mapped to the string on the client (rows()).
+SQL_LATEST_COVERING = """
+    SELECT p.operation_id, p.created_at, p.status, p.path_id
+    FROM operation_prefixes_covering p
+    WHERE p.prefix = %s
+    ORDER BY p.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQL_LATEST_SEEK_COVERING = """
+    SELECT p.operation_id, p.created_at, p.status, p.path_id
+    FROM operation_prefixes_covering p
+    WHERE p.prefix = %s
+      AND (p.created_at < %s OR (p.created_at = %s AND p.operation_id > %s))
+    ORDER BY p.created_at DESC, p.operation_id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H_COVERING = """
+    SELECT p.prefix, COUNT(*) AS cnt
+    FROM operation_prefixes_covering p
+    WHERE p.created_at >= NOW() - INTERVAL 1 DAY
+    AND p.prefix = %s
+    GROUP BY p.prefix
+"""
+
+SQL_ERROR_RATE_COVERING = """
+    SELECT p.prefix,
+           SUM(p.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(p.status=1)/COUNT(*) AS error_rate
+    FROM operation_prefixes_covering p
+    WHERE p.prefix = %s
+      AND p.created_at >= NOW() - INTERVAL 7 DAY
+    GROUP BY p.prefix
+"""
+
+BUILD_SQL = [
+    "INSERT IGNORE INTO prefixes (prefix) SELECT DISTINCT type_path FROM operations ORDER BY type_path",
+    """
+    INSERT IGNORE INTO operation_prefixes_covering (operation_id, prefix, created_at, status, path_id)
+    SELECT p.operation_id, p.prefix, p.created_at, o.status, d.prefix_id
+    FROM operation_prefixes p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    JOIN prefixes d ON d.prefix = o.type_path
+    """,
+]
+
+
+class CoveringStrategy(PrefixStrategy):
+    """The side table with status and a 4-byte type_path reference (the
+    path's id in the `prefixes` dictionary) copied into every row and into
+    the (prefix, created_at) index. latest-N, keyset pages and error rates
+    become index-only reads; the cost is 5 more bytes per side-table row in
+    both the clustered and the secondary index."""
+
+    name = 'covering'
+    TABLES_DDL = {
+        'prefixes': PREFIXES_DDL,
+        'operation_prefixes_covering': """
+            CREATE TABLE IF NOT EXISTS operation_prefixes_covering (
+              operation_id  BIGINT UNSIGNED NOT NULL,
+              prefix        VARCHAR(191) NOT NULL,
+              created_at    DATETIME(6) NOT NULL,
+              status        TINYINT UNSIGNED NOT NULL,
+              path_id       INT UNSIGNED NOT NULL,      -- prefixes.prefix_id of type_path
+              PRIMARY KEY (operation_id, prefix),
+              KEY ix_prefix_covering (prefix, created_at DESC, operation_id, status, path_id)
+            ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+        """,
+    }
+    PREFIX_ROWS = True
+    PROCEDURE_WRITES = False
+
+    def __init__(self):
+        self.prefixes = PrefixDictionary()
+
+    def write(self, cursor, batch, first_id, prefix_rows):
+        if not prefix_rows:
+            return 0
+        # Per-row status and path_id, repeated once per expanded prefix
+        counts = [len(p) for p in batch.row_prefixes()]
+        path_ids = self.prefixes.resolve(batch.used_paths())
+        per_row = zip(batch.status.tolist(), [path_ids[p] for p in batch.type_paths()])
+        extra = list(chain.from_iterable(repeat(v, c) for v, c in zip(per_row, counts)))
+
+        count = len(prefix_rows) // 3
+        params = [None] * (5 * count)
+        params[0::5] = prefix_rows[0::3]
+        params[1::5] = prefix_rows[1::3]
+        params[2::5] = prefix_rows[2::3]
+        params[3::5] = [s for s, _ in extra]
+        params[4::5] = [p for _, p in extra]
+        cursor.execute(f"""
+            INSERT INTO operation_prefixes_covering (operation_id, prefix, created_at, status, path_id)
+            VALUES {', '.join(["(%s, %s, %s, %s, %s)"] * count)}
+        """, params)
+        return count
+
+    def build(self, conn):
+        # From operation_prefixes + operations
+        cursor = conn.cursor()
+        try:
+            self.create(cursor)
+            for sql in BUILD_SQL:
+                cursor.execute(sql)
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def rows(self, rows):
+        # path_id -> type_path, so callers see the usual row shape
+        if not rows:
+            return rows
+        names = self.prefixes.names([r[3] for r in rows])
+        return [(r[0], r[1], r[2], names[r[3]]) for r in rows]
+
+    def latest(self, prefix, limit, offset):
+        return SQL_LATEST_COVERING, (prefix, limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return SQL_LATEST_SEEK_COVERING, (prefix, created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return SQL_COUNT_24H_COVERING, (prefix,)
+
+    def error_rate(self, prefix):
+        return SQL_ERROR_RATE_COVERING, (prefix,)
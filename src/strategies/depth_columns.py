@@ -0,0 +1,78 @@
+from src.strategies.base import PrefixStrategy
+
+# Deepest path the generator produces
+MAX_DEPTH = 5
+
+SQL_LATEST_DEPTH = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operations o
+    WHERE o.{col} = %s
+    ORDER BY o.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQL_LATEST_SEEK_DEPTH = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operations o
+    WHERE o.{col} = %s
+      AND (o.created_at < %s OR (o.created_at = %s AND o.id > %s))
+    ORDER BY o.created_at DESC, o.id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H_DEPTH = """
+    SELECT COUNT(*) AS cnt
+    FROM operations o
+    WHERE o.{col} = %s
+      AND o.created_at >= NOW() - INTERVAL 1 DAY
+"""
+
+SQL_ERROR_RATE_DEPTH = """
+    SELECT SUM(o.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(o.status=1)/COUNT(*) AS error_rate
+    FROM operations o
+    WHERE o.{col} = %s
+      AND o.created_at >= NOW() - INTERVAL 7 DAY
+"""
+
+
+class DepthColumnsStrategy(PrefixStrategy):
+    """Virtual generated columns p1..p5 on operations (the first k labels of
+    type_path), each with a (pk, created_at DESC, id) index. A depth-k
+    prefix is an equality seek on pk: no extra rows to write, no join, but
+    one index per depth. A path shallower than k has pk = the whole path,
+    which never equals a k-label prefix, so there are no false matches."""
+
+    name = 'depth_columns'
+    COLUMNS = tuple(
+        (f"p{k}", f"VARCHAR(191) GENERATED ALWAYS AS (SUBSTRING_INDEX(type_path, '.', {k})) VIRTUAL")
+        for k in range(1, MAX_DEPTH + 1)
+    )
+    # Same order as ix_prefix_created, so seek pages need no sort
+    INDEXES = tuple((f"ix_p{k}_created", f"(p{k}, created_at DESC, id)") for k in range(1, MAX_DEPTH + 1))
+
+    # One statement per depth, formatted once
+    _SQL = {
+        shape: [sql.format(col=f"p{k}") for k in range(1, MAX_DEPTH + 1)]
+        for shape, sql in (('latest', SQL_LATEST_DEPTH), ('seek', SQL_LATEST_SEEK_DEPTH),
+                           ('count_24h', SQL_COUNT_24H_DEPTH), ('error_rate', SQL_ERROR_RATE_DEPTH))
+    }
+
+    def _sql(self, shape, prefix):
+        depth = prefix.count('.') + 1
+        if depth > MAX_DEPTH:
+            raise ValueError(f"Prefix deeper than {MAX_DEPTH} labels: {prefix}")
+        return self._SQL[shape][depth - 1]
+
+    def latest(self, prefix, limit, offset):
+        return self._sql('latest', prefix), (prefix, limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return self._sql('seek', prefix), (prefix, created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return self._sql('count_24h', prefix), (prefix,)
+
+    def error_rate(self, prefix):
+        return self._sql('error_rate', prefix), (prefix,)
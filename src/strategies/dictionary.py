@@ -0,0 +1,118 @@
+from src.prefix_dict import PrefixDictionary, PREFIXES_DDL
+from src.strategies.base import PrefixStrategy
+
+# Same shapes as the side table, keyed by the prefix_id that
+# PrefixDictionary resolved on the client
+SQL_LATEST_BY_PREFIX_ID = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operation_prefix_ids p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix_id = %s
+    ORDER BY p.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQL_LATEST_SEEK_ID = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operation_prefix_ids p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix_id = %s
+      AND (p.created_at < %s OR (p.created_at = %s AND p.operation_id > %s))
+    ORDER BY p.created_at DESC, p.operation_id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H_ID = """
+    SELECT p.prefix_id, COUNT(*) AS cnt
+    FROM operation_prefix_ids p
+    WHERE p.created_at >= NOW() - INTERVAL 1 DAY
+    AND p.prefix_id = %s
+    GROUP BY p.prefix_id
+"""
+
+SQL_ERROR_RATE_ID = """
+    SELECT p.prefix_id,
+           SUM(o.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(o.status=1)/COUNT(*) AS error_rate
+    FROM operation_prefix_ids p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix_id = %s
+      AND p.created_at >= NOW() - INTERVAL 7 DAY
+    GROUP BY p.prefix_id
+"""
+
+BUILD_SQL = [
+    "INSERT IGNORE INTO prefixes (prefix) SELECT DISTINCT prefix FROM operation_prefixes ORDER BY prefix",
+    """
+    INSERT IGNORE INTO operation_prefix_ids (operation_id, prefix_id, created_at)
+    SELECT p.operation_id, d.prefix_id, p.created_at
+    FROM operation_prefixes p
+    JOIN prefixes d ON d.prefix = p.prefix
+    """,
+]
+
+
+class DictionaryStrategy(PrefixStrategy):
+    """The side table with each prefix string stored once in `prefixes` and
+    rows keyed by a 4-byte prefix_id, in both the clustered key and the
+    (prefix_id, created_at) index. Reads resolve the id client-side first
+    (part of the timed read); 0 is never assigned, so an unknown prefix
+    simply finds no rows."""
+
+    name = 'dict'
+    TABLES_DDL = {
+        'prefixes': PREFIXES_DDL,
+        'operation_prefix_ids': """
+            CREATE TABLE IF NOT EXISTS operation_prefix_ids (
+              operation_id  BIGINT UNSIGNED NOT NULL,
+              prefix_id     INT UNSIGNED NOT NULL,
+              created_at    DATETIME(6) NOT NULL,
+              PRIMARY KEY (operation_id, prefix_id),
+              KEY ix_prefix_id_created (prefix_id, created_at DESC, operation_id)
+            ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+        """,
+    }
+    PREFIX_ROWS = True
+    PROCEDURE_WRITES = False
+
+    def __init__(self):
+        self.prefixes = PrefixDictionary()
+
+    def write(self, cursor, batch, first_id, prefix_rows):
+        if not prefix_rows:
+            return 0
+        prefixes = prefix_rows[1::3]
+        ids = self.prefixes.resolve(prefixes)
+        params = list(prefix_rows)
+        params[1::3] = [ids[p] for p in prefixes]
+        count = len(params) // 3
+        cursor.execute(f"""
+            INSERT INTO operation_prefix_ids (operation_id, prefix_id, created_at)
+            VALUES {', '.join(["(%s, %s, %s)"] * count)}
+        """, params)
+        return count
+
+    def build(self, conn):
+        # From operation_prefixes (e.g. after a LOAD DATA seed, which only
+        # writes the side table)
+        cursor = conn.cursor()
+        try:
+            self.create(cursor)
+            for sql in BUILD_SQL:
+                cursor.execute(sql)
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def latest(self, prefix, limit, offset):
+        return SQL_LATEST_BY_PREFIX_ID, (self.prefixes.lookup(prefix), limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return SQL_LATEST_SEEK_ID, (self.prefixes.lookup(prefix), created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return SQL_COUNT_24H_ID, (self.prefixes.lookup(prefix),)
+
+    def error_rate(self, prefix):
+        return SQL_ERROR_RATE_ID, (self.prefixes.lookup(prefix),)
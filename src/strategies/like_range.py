@@ -0,0 +1,64 @@
+from src.strategies.base import PrefixStrategy
+
+# A path is under X when it is X or starts with 'X.'; the LIKE is a range
+# on ix_type_path, but created_at order has to come from a sort (or a
+# backwards ix_created_at walk filtering on type_path)
+UNDER = "(o.type_path = %s OR o.type_path LIKE %s)"
+
+SQL_LATEST_LIKE = f"""
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operations o
+    WHERE {UNDER}
+    ORDER BY o.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+SQL_LATEST_SEEK_LIKE = f"""
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operations o
+    WHERE {UNDER}
+      AND (o.created_at < %s OR (o.created_at = %s AND o.id > %s))
+    ORDER BY o.created_at DESC, o.id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H_LIKE = f"""
+    SELECT COUNT(*) AS cnt
+    FROM operations o
+    WHERE {UNDER}
+      AND o.created_at >= NOW() - INTERVAL 1 DAY
+"""
+
+SQL_ERROR_RATE_LIKE = f"""
+    SELECT SUM(o.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(o.status=1)/COUNT(*) AS error_rate
+    FROM operations o
+    WHERE {UNDER}
+      AND o.created_at >= NOW() - INTERVAL 7 DAY
+"""
+
+
+def _like_children(prefix):
+    # 'labs.result_webhooks' -> 'labs.result\_webhooks.%' ('_' is a wildcard)
+    escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '.%'
+
+
+class LikeRangeStrategy(PrefixStrategy):
+    """No extra storage: prefix reads are `type_path LIKE 'x.%'` range scans
+    on the existing ix_type_path."""
+
+    name = 'like_range'
+
+    def latest(self, prefix, limit, offset):
+        return SQL_LATEST_LIKE, (prefix, _like_children(prefix), limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return SQL_LATEST_SEEK_LIKE, (prefix, _like_children(prefix), created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return SQL_COUNT_24H_LIKE, (prefix, _like_children(prefix))
+
+    def error_rate(self, prefix):
+        return SQL_ERROR_RATE_LIKE, (prefix, _like_children(prefix))
@@ -0,0 +1,90 @@
+from src.strategies.base import PrefixStrategy
+
+# Joins to operations on (id, created_at): created_at is copied from the
+# operation, so it changes nothing on a plain table, and on a partitioned
+# one (src/partitions.py) the full primary key lets each lookup go to a
+# single partition instead of probing every day.
+
+SQL_LATEST_BY_PREFIX = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operation_prefixes p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix = %s
+    ORDER BY p.created_at DESC
+    LIMIT %s OFFSET %s
+"""
+
+# Keyset pagination: the (created_at, operation_id) of the last row seen is
+# the cursor. ORDER BY matches ix_prefix_created (created_at DESC,
+# operation_id ASC), so each page is a fresh index seek instead of
+# scanning and discarding OFFSET entries.
+SQL_LATEST_SEEK = """
+    SELECT o.id, o.created_at, o.status, o.type_path
+    FROM operation_prefixes p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix = %s
+      AND (p.created_at < %s OR (p.created_at = %s AND p.operation_id > %s))
+    ORDER BY p.created_at DESC, p.operation_id ASC
+    LIMIT %s
+"""
+
+SQL_COUNT_24H = """
+    SELECT p.prefix, COUNT(*) AS cnt
+    FROM operation_prefixes p
+    WHERE p.created_at >= NOW() - INTERVAL 1 DAY
+    AND p.prefix = %s
+    GROUP BY p.prefix
+"""
+
+SQL_ERROR_RATE = """
+    SELECT p.prefix,
+           SUM(o.status=1) AS errors,
+           COUNT(*) AS total,
+           SUM(o.status=1)/COUNT(*) AS error_rate
+    FROM operation_prefixes p
+    JOIN operations o ON o.id = p.operation_id AND o.created_at = p.created_at
+    WHERE p.prefix = %s
+      AND p.created_at >= NOW() - INTERVAL 7 DAY
+    GROUP BY p.prefix
+"""
+
+
+class SideTableStrategy(PrefixStrategy):
+    """operation_prefixes: one row per (operation, ancestor prefix), with
+    created_at copied in so latest-N is a single (prefix, created_at) seek.
+    The default, and the layout schema.sql and the procedures write."""
+
+    name = 'side_table'
+    TABLES_DDL = {
+        'operation_prefixes': """
+            CREATE TABLE IF NOT EXISTS operation_prefixes (
+              operation_id  BIGINT UNSIGNED NOT NULL,
+              prefix        VARCHAR(191) NOT NULL,
+              created_at    DATETIME(6) NOT NULL,
+              PRIMARY KEY (operation_id, prefix),
+              KEY ix_prefix_created (prefix, created_at DESC, operation_id)
+            ) ENGINE=InnoDB ROW_FORMAT=DYNAMIC
+        """,
+    }
+    PREFIX_ROWS = True
+
+    def write(self, cursor, batch, first_id, prefix_rows):
+        count = len(prefix_rows) // 3
+        if count:
+            cursor.execute(f"""
+                INSERT INTO operation_prefixes (operation_id, prefix, created_at)
+                VALUES {', '.join(["(%s, %s, %s)"] * count)}
+            """, prefix_rows)
+        return count
+
+    def latest(self, prefix, limit, offset):
+        return SQL_LATEST_BY_PREFIX, (prefix, limit, offset)
+
+    def seek(self, prefix, created_at, op_id, limit):
+        return SQL_LATEST_SEEK, (prefix, created_at, created_at, op_id, limit)
+
+    def count_24h(self, prefix):
+        return SQL_COUNT_24H, (prefix,)
+
+    def error_rate(self, prefix):
+        return SQL_ERROR_RATE, (prefix,)
@@ -0,0 +1,119 @@
+import csv
+import json
+import time
+import threading
+
+PERCENTILES = (50, 95, 99)
+
+
+class IntervalReporter(threading.Thread):
+    """Publishes per-interval QPS, errors and latency percentiles per op type.
+
+    Workers never wait on this thread. It gives each worker's metrics an
+    'interval' dict of histograms, which the worker records into next to
+    its cumulative ones, and swaps in a fresh dict every tick: the cost of
+    a tick follows the samples of the interval, not the size of the
+    histograms. Counters are diffed from the previous tick. A sample
+    recorded during the swap may show up in either interval.
+    """
+
+    def __init__(self, worker_metrics, interval=1.0, path=None, live=True):
+        super().__init__(daemon=True)
+        self.worker_metrics = worker_metrics
+        self.interval = interval
+        self.path = path
+        self.live = live
+        self.timeline = [] # one dict per (interval, op type), incl. op '_all'
+        self._stop_event = threading.Event()
+        for metrics in worker_metrics:
+            metrics['interval'] = {}
+        self._prev = [self._counters(m) for m in worker_metrics]
+
+    @staticmethod
+    def _counters(metrics):
+        return {'ops': metrics['ops'], 'errors': metrics['errors'], 'op_errors': dict(metrics['op_errors'])}
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        out = open(self.path, 'w', newline='') if self.path else None
+        writer = None
+        start = time.time()
+        last = start
+        tick = 1
+        try:
+            while True:
+                stopped = self._stop_event.wait(max(start + tick * self.interval - time.time(), 0))
+                tick += 1
+                now = time.time()
+                if stopped and now - last < 0.001:
+                    break
+                # On stop, the partial interval since the last tick
+                rows = self._collect(now, now - start, now - last)
+                last = now
+                self.timeline.extend(rows)
+                if out:
+                    if self.path.endswith('.csv'):
+                        if writer is None:
+                            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+                            writer.writeheader()
+                        writer.writerows(rows)
+                    else:
+                        out.writelines(json.dumps(r) + "\n" for r in rows)
+                    out.flush()
+                if self.live:
+                    self._print_live(rows)
+                if stopped:
+                    break
+        finally:
+            for metrics in self.worker_metrics:
+                metrics.pop('interval', None)
+            if out:
+                out.close()
+            if self.live:
+                print()
+
+    def _collect(self, ts, elapsed, span):
+        ops = errors = 0
+        op_errors = {}
+        merged = {}
+        for i, metrics in enumerate(self.worker_metrics):
+            histograms = metrics['interval']
+            metrics['interval'] = {}
+            cur = self._counters(metrics)
+            prev = self._prev[i]
+            self._prev[i] = cur
+            ops += cur['ops'] - prev['ops']
+            errors += cur['errors'] - prev['errors']
+            for op, n in cur['op_errors'].items():
+                op_errors[op] = op_errors.get(op, 0) + n - prev['op_errors'].get(op, 0)
+            for op, hist in list(histograms.items()):
+                if op in merged:
+                    merged[op].merge(hist)
+                else:
+                    merged[op] = hist
+
+        def row(op, count, errs, hist):
+            r = {'ts': round(ts, 3), 'elapsed': round(elapsed, 3), 'op': op,
+                 'count': count, 'qps': round(count / span, 2) if span > 0 else 0.0, 'errors': errs}
+            for p in PERCENTILES:
+                r[f'p{p}_ms'] = round(hist.percentile(p) * 1000, 3) if hist else None
+            r['max_ms'] = round(hist.max() * 1000, 3) if hist else None
+            return r
+
+        rows = [row('_all', ops, errors, None)]
+        for op in sorted(set(merged) | set(op_errors)):
+            hist = merged.get(op)
+            rows.append(row(op, hist.total if hist else 0, op_errors.get(op, 0), hist))
+        return rows
+
+    @staticmethod
+    def _print_live(rows):
+        total = rows[0]
+        parts = [f"[{total['elapsed']:6.0f}s] {total['qps']:8.0f} ops/s  err {total['errors']}"]
+        for r in rows[1:]:
+            if r['count']:
+                parts.append(f"{r['op']} p99 {r['p99_ms']:.1f}ms")
+        print(" | ".join(parts)[:200].ljust(120), end='\r', flush=True)
@@ -0,0 +1,132 @@
+# Workload traces: every operation of a run with its parameters and
+# intended send time, so a later run can send exactly the same workload.
+#
+# JSONL (gzip when the path ends in .gz). The first line is a header:
+#   {"trace": 1, "heavy_paths": [...], "mix": "D", "recorded_at": "..."}
+# then one line per operation, in send order:
+#   {"t": 1.234567, "op": "latest_l2", "args": {"prefix": "labs.orders"}}
+# t is seconds from the start of the recorded run; args are what
+# Workload._op_args drew (inserts carry the seed their rows come from).
+
+import gzip
+import json
+import time
+import datetime
+import threading
+
+TRACE_VERSION = 1
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class TraceWriter:
+    """Appends ops from every worker thread to one trace file. Times are
+    perf_counter() values, stored relative to start()."""
+
+    def __init__(self, path, heavy_paths, **header):
+        self.path = path
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.count = 0
+        header = {'trace': TRACE_VERSION, 'heavy_paths': list(heavy_paths),
+                  'recorded_at': datetime.datetime.utcnow().isoformat(), **header}
+        self._file.write(json.dumps(header) + '\n')
+
+    def start(self):
+        # Start of the recorded run: t = 0
+        self.t0 = time.perf_counter()
+
+    def write(self, sent, op_type, args):
+        line = json.dumps({'t': round(sent - self.t0, 6), 'op': op_type, 'args': args})
+        with self._lock:
+            self._file.write(line + '\n')
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_trace(path):
+    # (header, iterator of (t, op_type, args)). Streams: one line in memory
+    # at a time, however long the trace.
+    f = _open(path, 'r')
+    header = json.loads(f.readline() or '{}')
+    if header.get('trace') != TRACE_VERSION:
+        f.close()
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} trace (convert other logs with trace-import)")
+
+    def ops():
+        with f:
+            for line in f:
+                if line.strip():
+                    op = json.loads(line)
+                    yield op['t'], op['op'], op.get('args') or {}
+
+    return header, ops()
+
+
+def _timestamp(value):
+    # Epoch seconds (number or numeric string) or an ISO-8601 timestamp
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def import_trace(src, dst, workload, op_types, default_op='latest_l2', ts_field='timestamp',
+                 op_field='op', prefix_field='prefix', rate=100.0):
+    """Converts a foreign JSONL request log into a trace, streaming.
+
+    Each input object becomes one op. Its time comes from `ts_field` (epoch
+    seconds or ISO-8601, relative to the first stamped line); lines without
+    one are spaced at `rate` ops/s after the previous op. `op_field` picks
+    the op type when it names one in `op_types`, else `default_op`.
+    `prefix_field` (or `path` for 'exact') overrides the prefix; any
+    parameter the log doesn't have is drawn by `workload` (seeded, so the
+    import is reproducible). Returns (ops written, lines skipped).
+    """
+    writer = TraceWriter(dst, workload.gen.heavy_paths, source=src)
+    written = skipped = 0
+    first = None
+    t = -1.0 / rate
+    try:
+        with _open(src, 'r') as f:
+            for line in f:
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if not isinstance(req, dict):
+                    skipped += 1
+                    continue
+                op_type = req.get(op_field)
+                if op_type not in op_types:
+                    op_type = default_op
+                args = workload._op_args(op_type)
+                prefix = req.get(prefix_field)
+                if isinstance(prefix, str) and prefix:
+                    args['path' if op_type == 'exact' else 'prefix'] = prefix
+                stamp = _timestamp(req[ts_field]) if ts_field in req else None
+                if stamp is not None:
+                    first = stamp if first is None else first
+                    t = max(stamp - first, t)
+                else:
+                    t += 1.0 / rate
+                writer.write(writer.t0 + t, op_type, args)
+                written += 1
+    finally:
+        writer.close()
+    return written, skipped